@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : parallel POD plot and waveform exporter
+#-----------------------------------------------------------------------------
+# File       : BatchExporter.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Exports a selection of PODs of a RunFile. The waveforms are written as a
+# single NPZ bundle (all samples concatenated plus the POD index records)
+# and the PNG plots are rendered by a process pool. Every worker maps the
+# run file and builds one Agg figure which is reused for all its plots.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import os
+import mmap
+import multiprocessing
+import numpy as np
+
+from lztsData._lztsData import *
+
+# per worker state, set by _initWorker
+_worker = {}
+
+
+def podName(podNo, pod):
+    """File name stem used by the dataParsing scripts"""
+    ch = int(pod['channel'])
+    adcType = 'slow' if ch < NUM_SADC_CH else 'fast'
+    return 'POD%d_ch%d%s_T%d' %(podNo, ch % NUM_SADC_CH, adcType, int(pod['trigTime']))
+
+
+def _initWorker(path, figSize, dpi, style):
+    # Agg canvas without pyplot, the figure lives as long as the worker
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    f = open(path, 'rb')
+    _worker['mmap']   = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _worker['file']   = f
+    _worker['fig']    = Figure(figsize=figSize, dpi=dpi)
+    _worker['canvas'] = FigureCanvasAgg(_worker['fig'])
+    _worker['axes']   = _worker['fig'].add_subplot(111)
+    _worker['line'],  = _worker['axes'].plot([], [], style)
+
+
+def _renderChunk(tasks):
+    data = np.frombuffer(_worker['mmap'], dtype=np.uint8)
+    axes = _worker['axes']
+    line = _worker['line']
+    for fileName, offset, title in tasks:
+        samples = podSamples(data, offset)
+        line.set_data(np.arange(len(samples)), samples)
+        axes.relim()
+        axes.autoscale_view()
+        axes.set_title(title, fontsize=8)
+        _worker['fig'].savefig(fileName)
+    return len(tasks)
+
+
+def exportPods(runFile, indices, outDir='.', bundle='pods.npz', png=True, csv=False,
+               processes=None, chunkSize=16, figSize=(6.4, 4.8), dpi=100, style='.'):
+    """
+    Exports the PODs of runFile listed in indices to outDir. Writes the
+    waveform bundle (if bundle is not None), one PNG per POD (if png) and
+    one CSV per POD (if csv). Returns the list of file name stems.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    pods  = runFile.pods[indices]
+    names = [podName(n, pod) for n, pod in zip(indices, pods)]
+    if not os.path.isdir(outDir):
+        os.makedirs(outDir)
+
+    sizes  = pods['trigSize'].astype(np.int64)
+    starts = np.zeros(len(indices)+1, dtype=np.int64)
+    np.cumsum(sizes, out=starts[1:])
+
+    if bundle is not None or csv:
+        samples = np.empty(starts[-1], dtype=np.uint16)
+        for i, n in enumerate(indices):
+            samples[starts[i]:starts[i+1]] = runFile.samples(n)
+        if bundle is not None:
+            np.savez(os.path.join(outDir, bundle), samples=samples, starts=starts[:-1],
+                     lengths=sizes, pods=pods, podNo=indices, names=np.array(names))
+        if csv:
+            for i, name in enumerate(names):
+                np.savetxt(os.path.join(outDir, name + '.csv'), samples[starts[i]:starts[i+1]], fmt='%d')
+
+    if png and len(indices):
+        tasks = [(os.path.join(outDir, name + '.png'), int(pod['offset']), name)
+                 for name, pod in zip(names, pods)]
+        chunks = [tasks[i:i+chunkSize] for i in range(0, len(tasks), chunkSize)]
+        pool = multiprocessing.Pool(processes, initializer=_initWorker,
+                                    initargs=(runFile.path, figSize, dpi, style))
+        try:
+            for done in pool.imap_unordered(_renderChunk, chunks):
+                pass
+        finally:
+            pool.close()
+            pool.join()
+
+    return names
+
+
+def loadBundle(path):
+    """Returns (podNo, pods, list of waveforms) from an exported bundle"""
+    bundle  = np.load(path)
+    samples = bundle['samples']
+    waveforms = [samples[s:s+n] for s, n in zip(bundle['starts'], bundle['lengths'])]
+    return bundle['podNo'], bundle['pods'], waveforms
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : cross channel correlation and coherence
+#-----------------------------------------------------------------------------
+# File       : Crosstalk.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Crosstalk analysis over many events. Each event gives one segment per
+# channel: the channel's POD resampled (TimeAlign) onto a common grid of
+# length points starting preNs before the event trigTime. Channels without
+# a POD covering the whole segment are missing from that event.
+#
+# CrosstalkAccumulator sums, over batches of events, the moments needed
+# for the channel x channel correlation matrix and the cross and auto
+# spectra (one batched rfft per batch, einsum over the events) needed for
+# the coherence. Every pair only uses the events where both channels are
+# present. Memory is bounded by the batch size, the accumulated state is
+# a few channels x channels (x frequencies) arrays.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import numpy as np
+
+from lztsData._lztsData import *
+from lztsData.TimeAlign import podStartNs, podPeriod, resampleLinear, resamplePolyphase
+from lztsData.EventBuilder import buildEvents
+
+
+class CrosstalkAccumulator(object):
+    """Streaming sums for the correlation and coherence matrices"""
+
+    def __init__(self, length=256, step=SADC_PERIOD_NS, numChannels=NUM_CH, window=np.hanning):
+        self.length      = length
+        self.step        = step
+        self.numChannels = numChannels
+        self.window      = window(length).astype(np.float32)
+        c = numChannels
+        f = length // 2 + 1
+        self.events  = 0
+        self.pairs   = np.zeros((c, c))              # events with both channels
+        self.sumX    = np.zeros((c, c))              # sum of x_i where j present
+        self.sumXX   = np.zeros((c, c))
+        self.sumXY   = np.zeros((c, c))
+        self.cross   = np.zeros((c, c, f), dtype=np.complex128)
+        self.power   = np.zeros((c, c, f))           # |X_i|^2 where j present
+
+    def add(self, segments):
+        """
+        Adds a (events x channels x length) batch, missing channels are
+        NaN. The mean of every segment is removed.
+        """
+        seg = np.asarray(segments, dtype=np.float32)
+        present = ~np.isnan(seg).any(axis=2)
+        m = present.astype(np.float64)
+        x = np.where(present[:, :, None], seg, 0.0).astype(np.float32)
+        x -= x.mean(axis=2)[:, :, None]
+        x *= present[:, :, None]
+
+        self.events += len(seg)
+        self.pairs  += np.einsum('ei,ej->ij', m, m)
+        self.sumX   += np.einsum('ei,ej->ij', x.sum(axis=2, dtype=np.float64), m)
+        self.sumXX  += np.einsum('ei,ej->ij', np.einsum('eit,eit->ei', x, x, dtype=np.float64), m)
+        self.sumXY  += np.einsum('eit,ejt->ij', x, x, dtype=np.float64)
+
+        spec = np.fft.rfft(x * self.window, axis=2)
+        self.cross += np.einsum('eif,ejf->ijf', spec.conj(), spec)
+        self.power += np.einsum('eif,ej->ijf', (spec.real**2 + spec.imag**2), m)
+
+    def correlation(self):
+        """Pearson correlation of the sample values (NaN for pairs without events)"""
+        n   = self.pairs * self.length
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = self.sumXY - self.sumX * self.sumX.T / n
+            var = self.sumXX - self.sumX**2 / n
+            return cov / np.sqrt(var * var.T)
+
+    def crossSpectrum(self):
+        """Mean cross spectrum conj(X_i) X_j per event (channels x channels x frequencies)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.cross / self.pairs[:, :, None]
+
+    def coherence(self):
+        """Magnitude squared coherence (channels x channels x frequencies)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.abs(self.cross)**2 / (self.power * self.power.transpose(1, 0, 2))
+
+    def frequencies(self):
+        """Frequencies in Hz of the spectra"""
+        return np.fft.rfftfreq(self.length, self.step * 1e-9)
+
+
+def eventSegments(runFile, events, eventPods, length=256, step=SADC_PERIOD_NS, preNs=None,
+                  method='polyphase', delays=None):
+    """
+    (events x NUM_CH x length) float32 array of the event segments, NaN for
+    missing channels. events/eventPods as returned by buildEvents, the
+    first POD of a channel in an event is used.
+    """
+    if preNs is None:
+        preNs = length * step / 4.0
+    numEvents = len(events)
+    out = np.full((numEvents, NUM_CH, length), np.nan, dtype=np.float32)
+    counts = events['numPods'].astype(np.int64)
+    if counts.sum() == 0:
+        return out
+    first = events['first'].astype(np.int64)
+    rows  = np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    eventOf = np.repeat(np.arange(numEvents), counts)
+    chans = eventPods['channel'][rows].astype(np.int64)
+    keep  = np.unique(eventOf * NUM_CH + chans, return_index=True)[1]
+    eventOf, chans = eventOf[keep], chans[keep]
+    podIdx = eventPods['pod'][rows[keep]].astype(np.int64)
+
+    pods   = runFile.pods[podIdx]
+    start  = podStartNs(pods, delays)
+    period = podPeriod(pods)
+    grid   = (events['trigTime'][eventOf].astype(np.float64) * TIME_CLK_NS - preNs)[:, None] + \
+             np.arange(length) * step
+    resample = resamplePolyphase if method == 'polyphase' else resampleLinear
+    sizes = pods['trigSize'].astype(np.int64)
+    for size in np.unique(sizes):
+        sel = np.flatnonzero(sizes == size)
+        waveforms = runFile.waveforms(podIdx[sel])
+        out[eventOf[sel], chans[sel]] = resample(waveforms, start[sel], period[sel], grid[sel])
+    return out
+
+
+def crosstalkRun(runFile, window=0, length=256, step=SADC_PERIOD_NS, batchEvents=256, minChannels=2,
+                 channels=None, **params):
+    """
+    Builds the events of a RunFile and accumulates the events with at
+    least minChannels channels. Returns the CrosstalkAccumulator.
+    """
+    indices = None if channels is None else runFile.select(channels=channels)
+    events, eventPods = buildEvents(runFile, window, indices)
+    mask = np.zeros(len(events), dtype=np.int64)
+    for ch in range(NUM_CH):
+        mask += (events['channelMask'] >> ch) & 1
+    events = events[mask >= minChannels]
+    acc = CrosstalkAccumulator(length, step)
+    for i in range(0, len(events), batchEvents):
+        acc.add(eventSegments(runFile, events[i:i+batchEvents], eventPods, length, step, **params))
+    return acc
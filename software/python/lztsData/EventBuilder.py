@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : streaming event builder
+#-----------------------------------------------------------------------------
+# File       : EventBuilder.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Merges the PODs of all sources (one source per PGP lane and channel, each
+# one sorted by trigTime) with a heap holding only the head of every source
+# queue, and groups the merged stream into events: an event holds the PODs
+# whose trigTime is within window ticks of its first POD.
+#
+# A POD is released from the heap once it is maxDelay ticks older than the
+# newest trigTime seen, when more than maxPending PODs are queued or, if
+# the expected sources are given, as soon as every one of them has a
+# queued POD (the head is then the global minimum). PODs arriving behind
+# the released stream or behind the last queued POD of their source (a
+# source going backwards) are counted as late and emitted as single POD
+# events with EVENT_LATE set, so the released stream never goes back.
+#
+# Events reference PODs by number (RunFile index or stream sequence), no
+# waveform is copied. drain() (or the callback, every batchEvents events)
+# returns the finished events as two arrays:
+# EVENT_DTYPE records whose first/numPods select rows of the
+# EVENT_POD_DTYPE array.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import heapq
+import bisect
+import collections
+import numpy as np
+
+from lztsData._lztsData import *
+
+EVENT_DTYPE = np.dtype([
+    ('event',       '<u8'),
+    ('trigTime',    '<u8'),   # trigTime of the first POD
+    ('span',        '<u4'),   # last minus first trigTime
+    ('first',       '<u8'),   # first row in the event POD array
+    ('numPods',     '<u4'),
+    ('channelMask', '<u2'),   # OR of 1 << channel over all lanes
+    ('laneMask',    '<u2'),
+    ('flags',       'u1'),    # OR of the POD FLAG_* bits, EVENT_LATE
+])
+
+EVENT_POD_DTYPE = np.dtype([
+    ('pod',         '<i8'),
+    ('lane',        'u1'),
+    ('channel',     'u1'),
+    ('dt',          '<u4'),   # trigTime minus the event trigTime
+])
+
+# event flag for PODs which arrived after their time slot was released
+EVENT_LATE = 0x80
+
+
+class EventBuilder(object):
+    """k-way merge of per source POD streams into coincidence events"""
+
+    def __init__(self, window=0, maxDelay=250000, maxPending=65536, callback=None, batchEvents=1024, sources=None):
+        self.window     = window
+        self.maxDelay   = maxDelay
+        self.maxPending = maxPending
+        self.callback   = callback
+        self.batchEvents = batchEvents
+        self.queues     = {}      # (lane, channel) -> deque of (trigTime, pod, flags)
+        self.allSources = sources is not None
+        for source in (sources or []):
+            self.queues[tuple(source)] = collections.deque()
+        self.heap       = []      # (trigTime, seq, source) of the queue heads
+        self.seq        = 0
+        self.pending    = 0
+        self.newest     = 0
+        self.released   = -1      # trigTime of the last released POD
+        self.eventCount = 0
+        self.late       = 0
+        self.current    = []      # PODs of the open event
+        self.eventStart = 0
+        self.events     = []
+        self.eventPods  = []
+        self.podRows    = 0
+
+    def push(self, trigTime, lane, channel, pod, flags=0):
+        """Adds one POD, O(log sources)"""
+        trigTime = int(trigTime)
+        source = (lane, channel)
+        queue = self.queues.get(source)
+        if trigTime < self.released or (queue and trigTime < queue[-1][0]):
+            self.late += 1
+            self._emit([(trigTime, lane, channel, pod, flags)], EVENT_LATE)
+            return
+        if queue is None:
+            queue = self.queues[source] = collections.deque()
+        if not queue:
+            heapq.heappush(self.heap, (trigTime, self.seq, source))
+            self.seq += 1
+        queue.append((trigTime, pod, flags))
+        self.pending += 1
+        if trigTime > self.newest:
+            self.newest = trigTime
+        self._release()
+
+    def pushPods(self, pods, podNumbers=None):
+        """Adds a POD_INDEX_DTYPE array (e.g. RunFile.pods[...]) in array order"""
+        if podNumbers is None:
+            podNumbers = np.arange(len(pods))
+        for t, lane, ch, flags, n in zip(pods['trigTime'].tolist(), pods['lane'].tolist(),
+                                         pods['channel'].tolist(), pods['flags'].tolist(),
+                                         np.asarray(podNumbers).tolist()):
+            self.push(t, lane, ch, n, flags)
+
+    def _release(self, force=False):
+        heap = self.heap
+        while heap:
+            trigTime, seq, source = heap[0]
+            ready = force or self.pending > self.maxPending or \
+                    trigTime + self.maxDelay <= self.newest or \
+                    (self.allSources and len(heap) == len(self.queues))
+            if not ready:
+                return
+            heapq.heappop(heap)
+            queue = self.queues[source]
+            t, pod, flags = queue.popleft()
+            self.pending -= 1
+            if queue:
+                heapq.heappush(heap, (queue[0][0], self.seq, source))
+                self.seq += 1
+            self.released = max(self.released, t)
+            self._group(t, source[0], source[1], pod, flags)
+
+    def _group(self, t, lane, channel, pod, flags):
+        if self.current and t - self.eventStart > self.window:
+            self._emit(self.current, 0)
+            self.current = []
+        if not self.current:
+            self.eventStart = t
+        self.current.append((t, lane, channel, pod, flags))
+
+    def _emit(self, pods, eventFlags):
+        t0 = pods[0][0]
+        chMask = laneMask = 0
+        for t, lane, ch, pod, flags in pods:
+            chMask |= 1 << ch
+            laneMask |= 1 << lane
+            eventFlags |= flags
+            self.eventPods.append((pod, lane, ch, t - t0))
+        self.events.append((self.eventCount, t0, pods[-1][0] - t0, self.podRows, len(pods),
+                            chMask, laneMask, eventFlags))
+        self.eventCount += 1
+        self.podRows += len(pods)
+        if self.callback is not None and len(self.events) >= self.batchEvents:
+            self.callback(*self.drain())
+
+    def flush(self):
+        """Releases and groups everything queued (end of run)"""
+        self._release(force=True)
+        if self.current:
+            self._emit(self.current, 0)
+            self.current = []
+        if self.callback is not None and self.events:
+            self.callback(*self.drain())
+
+    def drain(self):
+        """Returns and forgets the finished (events, eventPods) arrays"""
+        events = np.array(self.events, dtype=EVENT_DTYPE)
+        pods   = np.array(self.eventPods, dtype=EVENT_POD_DTYPE)
+        if len(events):
+            events['first'] -= events['first'][0]
+        self.events    = []
+        self.eventPods = []
+        return events, pods
+
+
+def buildEvents(runFile, window=0, indices=None):
+    """
+    Offline event building of a RunFile (all PODs if indices is None), same
+    grouping as EventBuilder. Returns (events, eventPods).
+    """
+    pods = runFile.pods
+    if indices is None:
+        order = runFile.timeOrder()
+    else:
+        indices = np.asarray(indices, dtype=np.int64)
+        order = indices[np.argsort(pods['trigTime'][indices], kind='stable')]
+    times = pods['trigTime'][order].astype(np.int64)
+    # greedy windows: each event opens at the first POD after the previous one
+    timeList = times.tolist()
+    starts = []
+    i = 0
+    while i < len(timeList):
+        starts.append(i)
+        i = bisect.bisect_right(timeList, timeList[i] + window, i)
+    starts = np.array(starts, dtype=np.int64)
+    stops  = np.append(starts[1:], len(order))
+    eventOf = np.repeat(np.arange(len(starts)), stops - starts)
+
+    sel = pods[order]
+    eventPods = np.zeros(len(order), dtype=EVENT_POD_DTYPE)
+    eventPods['pod']     = order
+    eventPods['lane']    = sel['lane']
+    eventPods['channel'] = sel['channel']
+    eventPods['dt']      = times - times[starts][eventOf] if len(order) else 0
+
+    events = np.zeros(len(starts), dtype=EVENT_DTYPE)
+    events['event']    = np.arange(len(starts))
+    if len(starts):
+        events['trigTime'] = times[starts]
+        events['span']     = times[stops-1] - times[starts]
+        events['first']    = starts
+        events['numPods']  = stops - starts
+        events['channelMask'] = np.bitwise_or.reduceat(np.left_shift(1, sel['channel'].astype(np.int64)), starts)
+        events['laneMask']    = np.bitwise_or.reduceat(np.left_shift(1, sel['lane'].astype(np.int64)), starts)
+        events['flags']       = np.bitwise_or.reduceat(sel['flags'], starts)
+    return events, eventPods
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : batched FIR/IIR filter bank
+#-----------------------------------------------------------------------------
+# File       : FilterBank.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Applies a set of filters to a (PODs x samples) batch. Filtering is causal
+# (like scipy.signal.lfilter) and the rows are extended to the left with their first
+# sample so a baseline does not produce a start up transient.
+#
+# Short kernels are applied by direct convolution (one multiply-add per tap
+# over the whole batch). Long kernels use the FFT: one transform if the
+# record and kernel fit in maxFft points, overlap-save blocks otherwise.
+# The input blocks are transformed once for all filters sharing an FFT
+# size and the kernel spectra are cached per FFT size.
+#
+# IIR designs (b, a) are applied through their impulse response truncated
+# where its remaining energy falls below tol, so they share the batched
+# FFT path. The filter designs only need numpy.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import math
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from lztsData._lztsData import *
+
+# kernels up to this length are applied by direct convolution
+DIRECT_TAPS = 32
+
+
+def _nextPow2(n):
+    return 1 << max(int(n) - 1, 0).bit_length()
+
+
+###########################################
+# filter designs
+###########################################
+class FirFilter(object):
+    """Finite impulse response filter"""
+
+    def __init__(self, taps, name='fir'):
+        self.taps = np.asarray(taps, dtype=np.float64)
+        self.name = name
+
+    def kernel(self):
+        return self.taps
+
+
+class IirFilter(object):
+    """Recursive filter b/a, used through its truncated impulse response"""
+
+    def __init__(self, b, a, name='iir', tol=1e-6, maxTaps=1 << 16):
+        self.b = np.asarray(b, dtype=np.float64)
+        self.a = np.asarray(a, dtype=np.float64)
+        self.name = name
+        self.tol = tol
+        self.maxTaps = maxTaps
+        self._kernel = None
+
+    def kernel(self):
+        if self._kernel is None:
+            self._kernel = impulseResponse(self.b, self.a, self.tol, self.maxTaps)
+        return self._kernel
+
+
+def impulseResponse(b, a, tol=1e-6, maxTaps=1 << 16):
+    """
+    Impulse response of b/a, cut where the energy of the remaining tail is
+    below tol times the total (estimated from the decay of the last chunk)
+    """
+    chunk = 1024
+    x = np.zeros(chunk)
+    x[0] = 1.0
+    h = []
+    zi = None
+    total = 0.0
+    while len(h) * chunk < maxTaps:
+        y, zi = _lfilterState(b, a, x, zi)
+        h.append(y)
+        e = float(np.sum(y**2))
+        total += e
+        x = np.zeros(chunk)
+        if len(h) > 1 and e <= tol * total:
+            break
+    h = np.concatenate(h)[:maxTaps]
+    energy = np.cumsum((h**2)[::-1])[::-1]
+    keep = np.flatnonzero(energy > tol * energy[0])
+    return h[:keep[-1]+1] if len(keep) else h[:1]
+
+
+def _lfilterState(b, a, x, zi):
+    # transposed direct form II of one row, zi is the filter state
+    b = np.asarray(b, dtype=np.float64) / a[0]
+    a = np.asarray(a, dtype=np.float64) / a[0]
+    order = max(len(a), len(b))
+    b = np.pad(b, (0, order - len(b))).tolist()
+    a = np.pad(a, (0, order - len(a))).tolist()
+    z = [0.0] * order if zi is None else list(zi)
+    y = np.empty(len(x))
+    for t, xt in enumerate(x.tolist()):
+        yt = b[0] * xt + z[0]
+        for k in range(1, order):
+            z[k-1] = b[k] * xt - a[k] * yt + (z[k] if k < order-1 else 0.0)
+        y[t] = yt
+    return y, z
+
+
+def _windowedSinc(cutoff, taps, window):
+    n = np.arange(taps) - (taps - 1) / 2.0
+    return 2 * cutoff * np.sinc(2 * cutoff * n) * window(taps)
+
+
+def firLowpass(cornerHz, fs, taps=63, window=np.hamming):
+    """Windowed sinc low pass, unity DC gain"""
+    h = _windowedSinc(cornerHz / fs, taps, window)
+    return FirFilter(h / h.sum(), 'lowpass %g Hz' %(cornerHz))
+
+
+def firHighpass(cornerHz, fs, taps=63, window=np.hamming):
+    """Spectral inversion of the low pass (odd number of taps)"""
+    h = -firLowpass(cornerHz, fs, taps | 1, window).taps
+    h[len(h)//2] += 1.0
+    return FirFilter(h, 'highpass %g Hz' %(cornerHz))
+
+
+def firBandpass(lowHz, highHz, fs, taps=127, window=np.hamming):
+    """Difference of two windowed sinc low passes, unity gain at the band center"""
+    h = _windowedSinc(highHz / fs, taps, window) - _windowedSinc(lowHz / fs, taps, window)
+    center = 0.5 * (lowHz + highHz) / fs
+    gain = abs(np.sum(h * np.exp(-2j * np.pi * center * np.arange(taps))))
+    return FirFilter(h / gain, 'bandpass %g-%g Hz' %(lowHz, highHz))
+
+
+def movingAverage(samples):
+    return FirFilter(np.ones(samples) / samples, 'average %d' %(samples))
+
+
+def crRcShaper(tauNs, periodNs, order=1):
+    """
+    CR-(RC)^order shaper with equal time constants (bilinear transform of
+    each stage), step response peak normalized to 1
+    """
+    k = 2.0 * tauNs / periodNs
+    # CR: s tau / (1 + s tau), RC: 1 / (1 + s tau)
+    b = np.array([k, -k]) / (1 + k)
+    a = np.array([1.0, (1 - k) / (1 + k)])
+    rcB = np.array([1.0, 1.0]) / (1 + k)
+    for i in range(order):
+        b = np.convolve(b, rcB)
+        a = np.convolve(a, [1.0, (1 - k) / (1 + k)])
+    shaper = IirFilter(b, a, 'CR-RC%d %g ns' %(order, tauNs))
+    peak = np.abs(np.cumsum(shaper.kernel())).max()
+    shaper.b = b / peak
+    shaper._kernel = shaper._kernel / peak
+    return shaper
+
+
+###########################################
+# batched application
+###########################################
+class FilterBank(object):
+    """Applies a list of FIR/IIR designs to batches of equal length PODs"""
+
+    def __init__(self, filters, maxFft=1 << 16, directTaps=DIRECT_TAPS):
+        self.filters    = list(filters)
+        self.maxFft     = maxFft
+        self.directTaps = directTaps
+        self._spectra   = {}    # (filter index, nfft) -> rfft of the kernel
+
+    def _spectrum(self, i, nfft):
+        key = (i, nfft)
+        spec = self._spectra.get(key)
+        if spec is None:
+            spec = np.fft.rfft(self.filters[i].kernel(), nfft)
+            self._spectra[key] = spec
+        return spec
+
+    def apply(self, waveforms, dtype=np.float32):
+        """
+        Filters a (PODs x samples) array (or one waveform) with every
+        filter. Returns (filters x PODs x samples).
+        """
+        x = np.asarray(waveforms, dtype=np.float64)
+        single = x.ndim == 1
+        x = np.atleast_2d(x)
+        n, length = x.shape
+        out = np.empty((len(self.filters), n, length), dtype=dtype)
+        kernels = [f.kernel() for f in self.filters]
+
+        groups = {}
+        for i, h in enumerate(kernels):
+            if len(h) <= self.directTaps:
+                out[i] = self._direct(x, h)
+            else:
+                groups.setdefault(self._plan(length, len(h)), []).append(i)
+
+        for nfft, members in groups.items():
+            self._overlapSave(x, members, nfft, max(len(kernels[i]) for i in members), out)
+
+        return out[:, 0] if single else out
+
+    def _plan(self, length, taps):
+        """FFT size for a record length and kernel length"""
+        if length + taps - 1 <= self.maxFft:
+            return _nextPow2(length + taps - 1)
+        return max(min(self.maxFft, _nextPow2(8 * taps)), _nextPow2(2 * taps))
+
+    def _direct(self, x, h):
+        taps = len(h)
+        n, length = x.shape
+        xp = np.empty((n, length + taps - 1))
+        xp[:, :taps-1] = x[:, :1]
+        xp[:, taps-1:] = x
+        y = np.zeros((n, length))
+        for k in range(taps):
+            y += h[k] * xp[:, taps-1-k:taps-1-k+length]
+        return y
+
+    def _overlapSave(self, x, members, nfft, taps, out):
+        # blocks overlap by the longest kernel of the group, the samples
+        # kept from each block are valid (and aligned) for all its members
+        n, length = x.shape
+        step   = nfft - taps + 1
+        blocks = int(math.ceil(length / float(step)))
+        xp = np.zeros((n, (blocks - 1) * step + nfft))
+        xp[:, :taps-1] = x[:, :1]
+        xp[:, taps-1:taps-1+length] = x
+        frames = as_strided(xp, shape=(n, blocks, nfft),
+                            strides=(xp.strides[0], step * xp.strides[1], xp.strides[1]))
+        spectrum = np.fft.rfft(frames, nfft, axis=-1)
+        for i in members:
+            y = np.fft.irfft(spectrum * self._spectrum(i, nfft), nfft, axis=-1)
+            out[i] = y[:, :, taps-1:].reshape(n, blocks * step)[:, :length]
+
+
+def filterRun(runFile, filters, indices=None, maxPods=4096, **params):
+    """
+    Yields (POD indices, filters x PODs x samples) for the PODs of a
+    RunFile, grouped by trigSize
+    """
+    bank = filters if isinstance(filters, FilterBank) else FilterBank(filters, **params)
+    for batch, waveforms in runFile.batches(indices, maxPods):
+        yield batch, bank.apply(waveforms)
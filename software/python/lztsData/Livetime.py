@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : livetime and deadtime analysis
+#-----------------------------------------------------------------------------
+# File       : Livetime.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Livetime of a run from the footer table of a RunFile. Boards are told
+# apart by the footer DNA. The frames of a board are ordered by their
+# footer time min; the gap in front of a frame is its time min minus the
+# time max of the previous frame. A frame whose footer has the lost flag
+# set lost triggers somewhere in that gap, the gap is counted as dead time
+# (an upper bound, the board was busy for at most that long).
+#
+# Channels are handled the same way with the PODs of the channel: the gap
+# since the previous POD of the channel is dead when the POD has the lost
+# flag. Channel PODs are assigned to the board of the footer of their
+# frame (-1 for frames without footer).
+#
+# Everything works on the index arrays (no waveform is read) and is
+# vectorized over the frames and PODs of the whole run.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import numpy as np
+
+from lztsData._lztsData import *
+
+BOARD_LIVE_DTYPE = np.dtype([
+    ('dna',          'U32'),   # board DNA in hex
+    ('frames',       '<u8'),
+    ('start',        '<u8'),   # first footer time min (ticks)
+    ('stop',         '<u8'),   # last footer time max (ticks)
+    ('span',         '<f8'),   # s
+    ('live',         '<f8'),   # s
+    ('dead',         '<f8'),   # s
+    ('liveFraction', '<f8'),
+    ('lostFrames',   '<u8'),
+    ('vetoFrames',   '<u8'),
+    ('maxGap',       '<f8'),   # s
+])
+
+CHANNEL_LIVE_DTYPE = np.dtype([
+    ('board',        '<i4'),   # row in the board table, -1 if unknown
+    ('channel',      'u1'),
+    ('pods',         '<u8'),
+    ('lost',         '<u8'),   # PODs with the lost flag
+    ('veto',         '<u8'),
+    ('dead',         '<f8'),   # s
+    ('liveFraction', '<f8'),   # of the board span
+    ('podRate',      '<f8'),   # Hz
+    ('lostRate',     '<f8'),   # Hz
+    ('vetoRate',     '<f8'),   # Hz
+])
+
+
+def _boardFrames(runFile):
+    """
+    Footer frames sorted by board and time min. Returns (DNA strings,
+    board of each sorted footer, sorted footers, frame number of each
+    sorted footer).
+    """
+    dnas, frameBoard = runFile.frameBoards()
+    frames  = np.flatnonzero(frameBoard >= 0)
+    board   = frameBoard[frames]
+    footers = runFile.footers
+    order = np.lexsort((footers['timeMin'], board))
+    names = ['%032x' %(d) for d in dnas]
+    return names, board[order], footers[order], frames[order]
+
+
+def _gaps(group, start, stop):
+    """Gap in ticks in front of each interval, 0 for the first one of a group"""
+    gap = np.zeros(len(start), dtype=np.int64)
+    if len(start) > 1:
+        same = group[1:] == group[:-1]
+        gap[1:] = np.where(same, start[1:].astype(np.int64) - stop[:-1].astype(np.int64), 0)
+    return np.maximum(gap, 0)
+
+
+def livetime(runFile):
+    """
+    Livetime summary of a run. Returns (BOARD_LIVE_DTYPE array,
+    CHANNEL_LIVE_DTYPE array).
+    """
+    names, board, footers, frames = _boardFrames(runFile)
+    numBoards = len(names)
+    tMin = footers['timeMin']
+    tMax = footers['timeMax']
+    lost = (footers['flags'] & FLAG_LOST) != 0
+    veto = (footers['flags'] & FLAG_VETO) != 0
+    gap  = _gaps(board, tMin, tMax)
+
+    boards = np.zeros(numBoards, dtype=BOARD_LIVE_DTYPE)
+    boards['dna'] = names
+    if numBoards:
+        first = np.flatnonzero(np.diff(board, prepend=-1))
+        last  = np.append(first[1:], len(board)) - 1
+        boards['frames']     = last - first + 1
+        boards['start']      = tMin[first]
+        boards['stop']       = np.maximum.reduceat(tMax, first)
+        boards['span']       = (boards['stop'].astype(np.int64) - boards['start'].astype(np.int64)) / TIME_CLK_HZ
+        boards['dead']       = np.bincount(board, gap * lost, numBoards) / TIME_CLK_HZ
+        boards['live']       = boards['span'] - boards['dead']
+        boards['liveFraction'] = np.where(boards['span'] > 0, boards['live'] / np.maximum(boards['span'], 1e-300), 1.0)
+        boards['lostFrames'] = np.bincount(board, lost, numBoards)
+        boards['vetoFrames'] = np.bincount(board, veto, numBoards)
+        boards['maxGap']     = np.maximum.reduceat(gap, first) / TIME_CLK_HZ
+
+    # board of every POD through the footer of its frame
+    frameBoard = np.full(len(runFile.frames), -1, dtype=np.int64)
+    frameBoard[frames] = board
+    pods = runFile.pods
+    podBoard = frameBoard[pods['frame']] if len(pods) else np.zeros(0, dtype=np.int64)
+    channel  = pods['channel'].astype(np.int64)
+    group    = (podBoard + 1) * NUM_CH + channel
+    order    = np.lexsort((pods['trigTime'], group))
+    group    = group[order]
+    times    = pods['trigTime'][order]
+    flags    = pods['flags'][order]
+    podLost  = (flags & FLAG_LOST) != 0
+    podGap   = _gaps(group, times, times)
+
+    keys, first = np.unique(group, return_index=True)
+    counts = np.diff(np.append(first, len(group)))
+    channels = np.zeros(len(keys), dtype=CHANNEL_LIVE_DTYPE)
+    channels['board']   = keys // NUM_CH - 1
+    channels['channel'] = keys % NUM_CH
+    channels['pods']    = counts
+    if len(keys):
+        channels['lost'] = np.add.reduceat(podLost.astype(np.int64), first)
+        channels['veto'] = np.add.reduceat(((flags & FLAG_VETO) != 0).astype(np.int64), first)
+        channels['dead'] = np.add.reduceat(podGap * podLost, first) / TIME_CLK_HZ
+        # rates over the board span, the channel's own span without a footer
+        known = channels['board'] >= 0
+        span = np.where(known, boards['span'][np.maximum(channels['board'], 0)] if numBoards else 0.0,
+                        (np.maximum.reduceat(times, first) - times[first]) / TIME_CLK_HZ)
+        valid = span > 0
+        safe  = np.where(valid, span, 1.0)
+        channels['liveFraction'] = np.where(valid, 1.0 - channels['dead'] / safe, 1.0)
+        channels['podRate']  = np.where(valid, counts / safe, 0.0)
+        channels['lostRate'] = np.where(valid, channels['lost'] / safe, 0.0)
+        channels['vetoRate'] = np.where(valid, channels['veto'] / safe, 0.0)
+    return boards, channels
+
+
+def gapHistogram(runFile, bins=None):
+    """
+    Distribution of the gaps between consecutive frames of each board.
+    bins are edges in s (log spaced 1 ns - 10 s if None). Returns (DNA
+    strings, boards x bins counts, lost flagged counts, edges).
+    """
+    names, board, footers, frames = _boardFrames(runFile)
+    gap = _gaps(board, footers['timeMin'], footers['timeMax']) / TIME_CLK_HZ
+    lost = (footers['flags'] & FLAG_LOST) != 0
+    if bins is None:
+        bins = np.logspace(-9, 1, 101)
+    bins = np.asarray(bins, dtype=np.float64)
+    # the first frame of a board has no gap
+    real = np.ones(len(board), dtype=bool)
+    real[np.flatnonzero(np.diff(board, prepend=-1))] = False
+    col = np.clip(np.searchsorted(bins, gap, side='right') - 1, 0, len(bins) - 2)
+    inside = real & (gap >= bins[0]) & (gap <= bins[-1])
+    cells = len(names) * (len(bins) - 1)
+    flat = board * (len(bins) - 1) + col
+    counts = np.bincount(flat[inside], minlength=cells).reshape(len(names), -1)
+    lostCounts = np.bincount(flat[inside & lost], minlength=cells).reshape(len(names), -1)
+    return names, counts, lostCounts, bins
+
+
+def _cumulative(start, stop, edges):
+    """Total length of the disjoint sorted intervals [start, stop) below each edge"""
+    length = stop - start
+    cum = np.concatenate(([0.0], np.cumsum(length)))
+    k = np.searchsorted(stop, edges, side='right')
+    partial = np.zeros(len(edges))
+    inside = k < len(start)
+    kk = k[inside]
+    partial[inside] = np.clip(edges[inside] - start[kk], 0, None)
+    return cum[k] + partial
+
+
+def timeSeries(runFile, binSeconds=1.0):
+    """
+    Time binned series over the run for plotting. Returns a dict with the
+    bin edges (s from the first footer), the live fraction (boards x bins)
+    and the POD, lost and veto rates in Hz (channels x bins, all boards).
+    """
+    names, board, footers, frames = _boardFrames(runFile)
+    pods = runFile.pods
+    if len(footers):
+        t0 = int(footers['timeMin'].min())
+        t1 = int(footers['timeMax'].max())
+    elif len(pods):
+        t0 = int(pods['trigTime'].min())
+        t1 = int(pods['trigTime'].max())
+    else:
+        t0 = t1 = 0
+    step  = binSeconds * TIME_CLK_HZ
+    nBins = max(int(np.ceil((t1 - t0) / step)), 1)
+    edges = t0 + np.arange(nBins + 1) * step
+
+    live = np.ones((len(names), nBins))
+    lost = (footers['flags'] & FLAG_LOST) != 0
+    gap  = _gaps(board, footers['timeMin'], footers['timeMax'])
+    for b in range(len(names)):
+        sel  = np.flatnonzero((board == b) & lost & (gap > 0))
+        stop = footers['timeMin'][sel].astype(np.float64)
+        dead = np.diff(_cumulative(stop - gap[sel], stop, edges))
+        # bins outside the board's own span stay at 1
+        live[b] = 1.0 - dead / step
+
+    col = np.clip(((pods['trigTime'].astype(np.int64) - t0) / step).astype(np.int64), 0, nBins - 1)
+    flat = pods['channel'].astype(np.int64) * nBins + col
+    flags = pods['flags']
+    def rate(mask):
+        return np.bincount(flat[mask], minlength=NUM_CH * nBins).reshape(NUM_CH, nBins) / binSeconds
+    return dict(edges=(edges - t0) / TIME_CLK_HZ, dna=names, live=live,
+                pods=rate(np.ones(len(pods), dtype=bool)),
+                lost=rate((flags & FLAG_LOST) != 0),
+                veto=rate((flags & FLAG_VETO) != 0))
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : per channel pedestal and noise database
+#-----------------------------------------------------------------------------
+# File       : PedestalDb.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# measurePedestals() computes, for every board and channel of a run
+# (normally external trigger PODs with no signal), the baseline mean, the
+# total RMS, the noise (RMS around the mean of each POD) and the averaged
+# power spectral density (Welch, Hann window) in one pass over
+# RunFile.batches. The segments of a channel are the largest power of two
+# up to nfft that fits its PODs (512 for the 1023 sample FADC ExtTrig
+# PODs), channels with PODs shorter than PSD_MIN_SEGMENT get no PSD.
+#
+# PedestalDb stores the results in a sqlite file keyed by board DNA (hex()
+# of AxiVersion.DeviceDna or of the footer DNA), channel index and
+# timestamp. The latest pedestals of a board are kept in memory once read,
+# so online stages can subtract them without a database access per frame.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import time
+import sqlite3
+import numpy as np
+
+from lztsData._lztsData import *
+
+PEDESTAL_DTYPE = np.dtype([
+    ('dna',         'U40'),   # hex() of the board DNA, '' if unknown
+    ('channel',     'u1'),    # channel index, 0-7 SADC, 8-15 FADC
+    ('pods',        '<u8'),
+    ('samples',     '<u8'),
+    ('mean',        '<f8'),   # ADU
+    ('rms',         '<f8'),   # ADU, around the mean of all samples
+    ('noise',       '<f8'),   # ADU, around the mean of each POD
+])
+
+# shortest PSD segment, shorter PODs get no spectrum
+PSD_MIN_SEGMENT = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pedestals (
+    dna       TEXT    NOT NULL,
+    channel   INTEGER NOT NULL,
+    timestamp REAL    NOT NULL,
+    run       TEXT,
+    pods      INTEGER,
+    samples   INTEGER,
+    mean      REAL,
+    rms       REAL,
+    noise     REAL,
+    psdStep   REAL,
+    psd       BLOB,
+    PRIMARY KEY (dna, channel, timestamp)
+)
+"""
+
+
+def dnaKey(value):
+    """Database key of a board DNA given as an int or a hex string"""
+    if isinstance(value, str):
+        value = int(value, 16) if value else None
+    return '' if value is None else hex(int(value))
+
+
+def psdSegment(length, nfft):
+    """Welch segment length for PODs of length samples, 0 if none fits"""
+    seg = 1 << (int(min(length, nfft)).bit_length() - 1) if min(length, nfft) > 0 else 0
+    return seg if seg >= PSD_MIN_SEGMENT else 0
+
+
+def measurePedestals(runFile, indices=None, nfft=1024, maxPods=4096):
+    """
+    Pedestals of the PODs of a RunFile (the external trigger PODs if
+    indices is None). Returns (PEDESTAL_DTYPE array, list with the PSD in
+    ADU^2/Hz of every record, list with its frequencies in Hz). The PSD
+    and frequencies of a record are None when its PODs are too short.
+    """
+    if indices is None:
+        indices = runFile.select(flagsAll=FLAG_EXT)
+    boards, podBoard = runFile.podBoards()
+    names = [dnaKey(b) for b in boards] + ['']
+    numKeys = (len(boards) + 1) * NUM_CH
+    pods    = np.zeros(numKeys, dtype=np.int64)
+    samples = np.zeros(numKeys, dtype=np.int64)
+    sumX    = np.zeros(numKeys)
+    sumXX   = np.zeros(numKeys)
+    sumVar  = np.zeros(numKeys)
+    segs    = np.zeros(numKeys, dtype=np.int64)
+    # segment length of every key, fixed by its first batch
+    segLen  = np.zeros(numKeys, dtype=np.int64)
+    psd     = {}
+
+    for batch, waveforms in runFile.batches(indices, maxPods):
+        x = waveforms.astype(np.float64)
+        channel = runFile.pods['channel'][batch].astype(np.int64)
+        key = np.where(podBoard[batch] < 0, len(boards), podBoard[batch]) * NUM_CH + channel
+        length = x.shape[1]
+        podMean = x.mean(axis=1)
+        pods    += np.bincount(key, minlength=numKeys)
+        samples += np.bincount(key, minlength=numKeys) * length
+        sumX    += np.bincount(key, x.sum(axis=1), numKeys)
+        sumXX   += np.bincount(key, (x * x).sum(axis=1), numKeys)
+        sumVar  += np.bincount(key, x.var(axis=1) * length, numKeys)
+
+        new = np.unique(key[segLen[key] == 0])
+        segLen[new] = psdSegment(length, nfft)
+        podSeg = segLen[key]
+        for seg in np.unique(podSeg):
+            nseg = length // seg if seg else 0
+            if nseg == 0:
+                # no PSD for these PODs (a key first seen with longer PODs)
+                continue
+            rows = np.flatnonzero(podSeg == seg)
+            # Welch segments of every POD, mean removed per segment
+            sub = x[rows, :nseg*seg].reshape(len(rows), nseg, seg)
+            sub = (sub - sub.mean(axis=2, keepdims=True)) * np.hanning(seg)
+            power = (np.abs(np.fft.rfft(sub, axis=2))**2).sum(axis=1)
+            k = key[rows]
+            order = np.argsort(k, kind='stable')
+            starts = np.flatnonzero(np.diff(k[order], prepend=-1))
+            cells = k[order][starts]
+            sums = np.add.reduceat(power[order], starts, axis=0)
+            for cell, row in zip(cells.tolist(), sums):
+                psd[cell] = psd[cell] + row if cell in psd else row
+            segs[cells] += np.diff(np.append(starts, len(order))) * nseg
+
+    used = np.flatnonzero(pods)
+    result = np.zeros(len(used), dtype=PEDESTAL_DTYPE)
+    result['dna']     = [names[k // NUM_CH] for k in used]
+    result['channel'] = used % NUM_CH
+    result['pods']    = pods[used]
+    result['samples'] = samples[used]
+    result['mean']    = sumX[used] / samples[used]
+    result['rms']     = np.sqrt(np.maximum(sumXX[used] / samples[used] - result['mean']**2, 0))
+    result['noise']   = np.sqrt(sumVar[used] / samples[used])
+
+    # one sided density in ADU^2/Hz
+    densities = []
+    freqs = []
+    for k, ch in zip(used.tolist(), result['channel'].tolist()):
+        if k not in psd or segs[k] == 0:
+            densities.append(None)
+            freqs.append(None)
+            continue
+        seg = int(segLen[k])
+        period = (SADC_PERIOD_NS if ch < NUM_SADC_CH else FADC_PERIOD_NS) * 1e-9
+        density = psd[k] / segs[k] / (np.hanning(seg)**2).sum() * period
+        density[1:-1] *= 2
+        densities.append(density)
+        freqs.append(np.fft.rfftfreq(seg) / period)
+    return result, densities, freqs
+
+
+class PedestalDb(object):
+    """sqlite store of pedestal records with an in memory cache of the latest values"""
+
+    def __init__(self, path='pedestals.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(_SCHEMA)
+        self.conn.commit()
+        self._latest = {}     # dna -> (means, noise) arrays over NUM_CH, NaN if missing
+
+    def close(self):
+        self.conn.close()
+
+    def store(self, records, psd=None, freqs=None, timestamp=None, run='', dna=None):
+        """
+        Adds PEDESTAL_DTYPE records (with their PSD rows) measured at
+        timestamp (now if None). dna is used for the records without DNA
+        (frames without footer) if given.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        rows = []
+        for i, rec in enumerate(records):
+            key = str(rec['dna'])
+            if dna is not None and not key:
+                key = dnaKey(dna)
+            step = float(freqs[i][1] - freqs[i][0]) if freqs is not None and freqs[i] is not None and len(freqs[i]) > 1 else 0.0
+            blob = None
+            if psd is not None:
+                if psd[i] is None or not np.all(np.isfinite(psd[i])):
+                    print('PedestalDb: no PSD for %s channel %d (PODs too short)' %(key or '-', int(rec['channel'])))
+                else:
+                    blob = np.asarray(psd[i], dtype='<f4').tobytes()
+            rows.append((key, int(rec['channel']), float(timestamp), run, int(rec['pods']),
+                         int(rec['samples']), float(rec['mean']), float(rec['rms']), float(rec['noise']),
+                         step, blob))
+            self._latest.pop(key, None)
+        self.conn.executemany('INSERT OR REPLACE INTO pedestals VALUES (?,?,?,?,?,?,?,?,?,?,?)', rows)
+        self.conn.commit()
+
+    def boards(self):
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT dna FROM pedestals ORDER BY dna')]
+
+    def latest(self, dna, before=None):
+        """PEDESTAL_DTYPE records of the last measurement of every channel of a board (at or before a time)"""
+        key = dnaKey(dna)
+        limit = float('inf') if before is None else float(before)
+        cur = self.conn.execute(
+            'SELECT dna, channel, pods, samples, mean, rms, noise, MAX(timestamp) FROM pedestals '
+            'WHERE dna = ? AND timestamp <= ? GROUP BY channel ORDER BY channel', (key, limit))
+        return np.array([row[:7] for row in cur], dtype=PEDESTAL_DTYPE)
+
+    def history(self, dna, channel):
+        """(timestamps, PEDESTAL_DTYPE records) of one channel in time order"""
+        cur = self.conn.execute(
+            'SELECT timestamp, dna, channel, pods, samples, mean, rms, noise FROM pedestals '
+            'WHERE dna = ? AND channel = ? ORDER BY timestamp', (dnaKey(dna), int(channel)))
+        rows = cur.fetchall()
+        return np.array([r[0] for r in rows]), np.array([r[1:] for r in rows], dtype=PEDESTAL_DTYPE)
+
+    def psd(self, dna, channel, before=None):
+        """(frequencies in Hz, PSD in ADU^2/Hz) of the last measurement, None if there is none"""
+        limit = float('inf') if before is None else float(before)
+        row = self.conn.execute(
+            'SELECT psdStep, psd FROM pedestals WHERE dna = ? AND channel = ? AND timestamp <= ? '
+            'ORDER BY timestamp DESC LIMIT 1', (dnaKey(dna), int(channel), limit)).fetchone()
+        if row is None or row[1] is None:
+            return None
+        density = np.frombuffer(row[1], dtype='<f4')
+        return np.arange(len(density)) * row[0], density
+
+    def pedestals(self, dna):
+        """
+        Latest baseline means and noise of a board as two NUM_CH arrays (NaN
+        for channels never measured), read once and then served from memory
+        """
+        key = dnaKey(dna)
+        cached = self._latest.get(key)
+        if cached is None:
+            means = np.full(NUM_CH, np.nan)
+            noise = np.full(NUM_CH, np.nan)
+            rec = self.latest(key)
+            means[rec['channel']] = rec['mean']
+            noise[rec['channel']] = rec['noise']
+            cached = self._latest[key] = (means, noise)
+        return cached
+
+    def subtract(self, waveforms, dna, channel):
+        """Waveforms (one or a batch) minus the pedestals of their channel(s) as float32"""
+        means = self.pedestals(dna)[0]
+        channel = np.asarray(channel)
+        ped = means[channel] if channel.ndim == 0 else means[channel][:, None]
+        return np.asarray(waveforms, dtype=np.float32) - ped.astype(np.float32)
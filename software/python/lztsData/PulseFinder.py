@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : vectorized PMT pulse finder
+#-----------------------------------------------------------------------------
+# File       : PulseFinder.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Finds negative going PMT pulses in batches of equal length PODs. The
+# baseline is the mean of the pre trigger samples, the pulses are the runs
+# of samples more than threshold ADU below it. All PODs of a batch are
+# processed as one flattened array (one padding column per row keeps the
+# runs from crossing rows): edges from a single diff, areas and peaks from
+# one add.reduceat and one maximum.reduceat.
+#
+# Hit times are in ns relative to the POD trigTime (sample index minus
+# trigOffset times the sample period). Areas are in ADU x ns.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import numpy as np
+
+from lztsData._lztsData import *
+
+HIT_DTYPE = np.dtype([
+    ('pod',         '<i8'),   # POD number (RunFile index or stream sequence)
+    ('channel',     'u1'),    # channel index, 0-7 SADC, 8-15 FADC
+    ('start',       '<u4'),   # first sample below threshold
+    ('width',       '<u4'),   # samples below threshold
+    ('peakSample',  '<u4'),
+    ('time',        '<f8'),   # ns relative to trigTime
+    ('peak',        '<f4'),   # ADU below baseline
+    ('area',        '<f4'),   # ADU x ns
+    ('baseline',    '<f4'),
+])
+
+
+def samplePeriod(channel):
+    """Sample period in ns for channel indices"""
+    return np.where(np.asarray(channel) < NUM_SADC_CH, SADC_PERIOD_NS, FADC_PERIOD_NS)
+
+
+def findPulses(waveforms, channel, trigOffset, threshold=20.0, baselineSamples=32, minWidth=1, pods=None):
+    """
+    Finds the pulses in a (PODs x samples) array. channel and trigOffset
+    hold one entry per row, threshold is a scalar or one value per channel
+    index. pods gives the POD number stored in the hits (row number if
+    None). Returns a HIT_DTYPE array ordered by POD and time.
+    """
+    waveforms  = np.asarray(waveforms)
+    n, length  = waveforms.shape
+    channel    = np.asarray(channel, dtype=np.intp)
+    trigOffset = np.asarray(trigOffset, dtype=np.int64)
+    if pods is None:
+        pods = np.arange(n)
+    if n == 0 or length == 0:
+        return np.zeros(0, dtype=HIT_DTYPE)
+
+    # baseline from the pre trigger samples (baselineSamples if there are none)
+    nBase = np.where(trigOffset > 0, np.minimum(trigOffset, baselineSamples), baselineSamples)
+    nBase = np.clip(nBase, 1, length)
+    cs = np.cumsum(waveforms[:, :int(nBase.max())], axis=1, dtype=np.float64)
+    baseline = (cs[np.arange(n), nBase-1] / nBase).astype(np.float32)
+
+    # positive signal with a zero padding column after every row
+    signal = np.zeros((n, length+1), dtype=np.float32)
+    np.subtract(baseline[:, None], waveforms, out=signal[:, :length])
+    thr = np.asarray(threshold, dtype=np.float32)
+    if thr.ndim:
+        thr = thr[channel][:, None]
+    above = signal > thr
+    above[:, length] = False
+
+    flat  = signal.ravel()
+    edges = np.diff(above.ravel().view(np.int8), prepend=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    ends   = np.flatnonzero(edges == -1)
+    width  = ends - starts
+    if len(starts) == 0:
+        return np.zeros(0, dtype=HIT_DTYPE)
+
+    bounds = np.empty(2*len(starts), dtype=np.intp)
+    bounds[0::2] = starts
+    bounds[1::2] = ends
+    peak = np.maximum.reduceat(flat, bounds)[0::2]
+    area = np.add.reduceat(flat, bounds, dtype=np.float64)[0::2]
+
+    # first sample of each run equal to its peak (the runs are in flat order)
+    aboveIdx = np.flatnonzero(above.ravel())
+    run = np.repeat(np.arange(len(starts)), width)
+    atPeak = flat[aboveIdx] == np.repeat(peak, width)
+    peakRun = run[atPeak]
+    first = np.flatnonzero(np.diff(peakRun, prepend=-1))
+    peakIdx = aboveIdx[atPeak][first]
+
+    keep = width >= minWidth
+    row  = starts[keep] // (length+1)
+    col  = starts[keep] - row*(length+1)
+    period = samplePeriod(channel[row])
+
+    hits = np.zeros(len(row), dtype=HIT_DTYPE)
+    hits['pod']        = np.asarray(pods)[row]
+    hits['channel']    = channel[row]
+    hits['start']      = col
+    hits['width']      = width[keep]
+    hits['peakSample'] = peakIdx[keep] - row*(length+1)
+    hits['time']       = (col - trigOffset[row]) * period
+    hits['peak']       = peak[keep]
+    hits['area']       = area[keep] * period
+    hits['baseline']   = baseline[row]
+    return hits
+
+
+def findPulsesAt(data, offsets, pods=None, maxPods=4096, **params):
+    """
+    Runs findPulses over the PODs at the byte offsets of a uint8 array
+    (a mapped run file or a batch of stream frames). PODs are grouped by
+    trigSize into rectangular batches.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if pods is None:
+        pods = np.arange(len(offsets))
+    if len(offsets) == 0:
+        return np.zeros(0, dtype=HIT_DTYPE)
+    headers = gatherHeaders(data, offsets)
+    sizes   = trigSize(headers)
+    order   = np.argsort(sizes, kind='stable')
+    bounds  = np.flatnonzero(np.diff(sizes[order])) + 1
+    result  = []
+    for group in np.split(order, bounds):
+        for i in range(0, len(group), maxPods):
+            rows = group[i:i+maxPods]
+            waveforms = gatherSamples(data, offsets[rows], int(sizes[rows[0]]))
+            result.append(findPulses(waveforms, channelIndex(headers[rows]), headers['trigOffset'][rows],
+                                     pods=np.asarray(pods)[rows], **params))
+    return sortHits(np.concatenate(result))
+
+
+def findPulsesRun(runFile, indices=None, maxPods=4096, **params):
+    """Hit table of the PODs of a RunFile (all PODs if indices is None)"""
+    result = [findPulses(waveforms, runFile.pods['channel'][batch], runFile.pods['trigOffset'][batch],
+                         pods=batch, **params)
+              for batch, waveforms in runFile.batches(indices, maxPods)]
+    if len(result) == 0:
+        return np.zeros(0, dtype=HIT_DTYPE)
+    return sortHits(np.concatenate(result))
+
+
+def sortHits(hits):
+    """Orders a hit table by POD and time"""
+    return hits[np.lexsort((hits['time'], hits['pod']))]
+
+
+class StreamPulseFinder(object):
+    """
+    Online pulse finding: frames are collected until batchFrames are
+    pending and then processed as one batch. The hits are passed to
+    callback (or kept in self.hits if there is none). PODs are numbered in
+    arrival order.
+    """
+
+    def __init__(self, callback=None, batchFrames=256, **params):
+        self.callback    = callback
+        self.batchFrames = batchFrames
+        self.params      = params
+        self.pending     = []
+        self.podCount    = 0
+        self.hits        = []
+
+    def addFrame(self, buf):
+        self.pending.append(bytes(buf))
+        if len(self.pending) >= self.batchFrames:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        data = np.frombuffer(b''.join(self.pending), dtype=np.uint8)
+        offsets = []
+        start = 0
+        for buf in self.pending:
+            offsets, footer = scanFrame(data, start, start+len(buf), offsets)
+            start += len(buf)
+        self.pending = []
+        pods = np.arange(self.podCount, self.podCount+len(offsets))
+        self.podCount += len(offsets)
+        hits = findPulsesAt(data, offsets, pods, **self.params)
+        if self.callback is not None:
+            self.callback(hits)
+        else:
+            self.hits.append(hits)
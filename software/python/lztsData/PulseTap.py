@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : online pulse finder stream tap
+#-----------------------------------------------------------------------------
+# File       : PulseTap.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# rogue stream slave running the PulseFinder on the data VC. Not imported
+# by the lztsData package so the offline tools do not need rogue:
+#    import lztsData.PulseTap
+#    pyrogue.streamTap(pgpVc1, lztsData.PulseTap.PulseTap(outFile='hits.bin'))
+# The hit file holds raw HIT_DTYPE records (np.fromfile(path, HIT_DTYPE)).
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import rogue.interfaces.stream
+
+from lztsData._lztsData import *
+from lztsData.PulseFinder import StreamPulseFinder
+
+
+class PulseTap(rogue.interfaces.stream.Slave):
+    """Finds pulses in batches of received frames"""
+
+    def __init__(self, callback=None, outFile=None, batchFrames=256, dataVc=1, **params):
+        rogue.interfaces.stream.Slave.__init__(self)
+        self.dataVc   = dataVc
+        self.callback = callback
+        self.outFile  = open(outFile, 'ab') if outFile is not None else None
+        self.hitCount = 0
+        self.finder   = StreamPulseFinder(self._hits, batchFrames, **params)
+
+    def _hits(self, hits):
+        self.hitCount += len(hits)
+        if self.outFile is not None:
+            hits.tofile(self.outFile)
+        if self.callback is not None:
+            self.callback(hits)
+
+    def _acceptFrame(self, frame):
+        size = frame.getPayload()
+        if size < HEADER_BYTES:
+            return
+        buf = bytearray(size)
+        frame.read(buf, 0)
+        if (buf[0] & 0xF) != self.dataVc:
+            return
+        self.finder.addFrame(buf)
+
+    def close(self):
+        self.finder.flush()
+        if self.outFile is not None:
+            self.outFile.close()
+            self.outFile = None
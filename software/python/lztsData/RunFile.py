@@ -0,0 +1,462 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : indexed random access to recorded LZTS runs
+#-----------------------------------------------------------------------------
+# File       : RunFile.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# A run file is memory mapped and scanned once to build a POD index (one
+# fixed size record per POD with its file offset and decoded header). The
+# index is cached next to the data file so reopening a run is immediate.
+# Waveforms are returned as views into the mapped file, except for zero
+# suppressed PODs (FLAG_ZS) which are expanded to their original length.
+#
+# Supported file types:
+#   'rogue' : pyrogue StreamWriter files (lztsDAQ.py dataWriter), only the
+#             records of dataChannel are indexed (all if dataChannel is None)
+#   'lzrd'  : rogueFreeStreamRaw_PyMod.py processStream files
+#   'pods'  : plain concatenated PODs without any record framing
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import os
+import mmap
+import array
+import struct
+import threading
+import collections
+import numpy as np
+
+from lztsData._lztsData import *
+
+INDEX_VERSION = 2
+
+POD_INDEX_DTYPE = np.dtype([
+    ('offset',      '<u8'),   # byte offset of the POD header in the file
+    ('frame',       '<u4'),   # frame (record) number
+    ('channel',     'u1'),    # channel index, 0-7 SADC, 8-15 FADC
+    ('lane',        'u1'),
+    ('flags',       'u1'),    # FLAG_* bits
+    ('fastOfs',     'u1'),
+    ('trigSize',    '<u4'),   # original length of zero suppressed PODs
+    ('trigOffset',  '<u4'),
+    ('trigTime',    '<u8'),
+])
+
+FRAME_INDEX_DTYPE = np.dtype([
+    ('offset',      '<u8'),   # byte offset of the frame payload in the file
+    ('size',        '<u4'),
+    ('firstPod',    '<u4'),
+    ('numPods',     '<u4'),
+    ('footer',      '<i8'),   # byte offset of the footer, -1 if none
+])
+
+_U32 = struct.Struct('<I')
+
+# size of the dead time string written before each processStream frame
+_LZRD_DEADTIME_BYTES = len(b"deadtime_ns_high:") + 4 + len(b"deadtime_ns_low:") + 4
+
+
+class RunFile(object):
+    """Memory mapped run file with a POD index built in a single scan"""
+
+    def __init__(self, path, fileType='rogue', dataChannel=1, useCache=True):
+        self.path        = path
+        self.fileType    = fileType
+        self.dataChannel = dataChannel
+        self._file = open(path, 'rb')
+        self.fileSize = os.fstat(self._file.fileno()).st_size
+        if self.fileSize > 0:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data  = np.frombuffer(self._mmap, dtype=np.uint8)
+        else:
+            self._mmap = None
+            self.data  = np.zeros(0, dtype=np.uint8)
+
+        self.pods    = None
+        self.frames  = None
+        self.footers = None
+        if not (useCache and self._loadIndex()):
+            self._buildIndex()
+            if useCache:
+                self._saveIndex()
+        self._timeOrder = None
+
+    def close(self):
+        self.data = None
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self.pods)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    ###########################################
+    # index construction
+    ###########################################
+    def _records(self):
+        """Yields (payload start, payload end) of every data frame in the file"""
+        buf  = self._mmap
+        size = self.fileSize
+        if self.fileType == 'pods':
+            yield 0, size
+        elif self.fileType == 'rogue':
+            off = 0
+            while off + 8 <= size:
+                recSize = _U32.unpack_from(buf, off)[0]
+                header  = _U32.unpack_from(buf, off+4)[0]
+                end = off + 4 + recSize
+                if recSize < 4 or end > size:
+                    break
+                if self.dataChannel is None or (header >> 24) == self.dataChannel:
+                    yield off + 8, end
+                off = end
+        elif self.fileType == 'lzrd':
+            if size < 8 or _U32.unpack_from(buf, 0)[0] != 0x01020304:
+                raise ValueError('%s is not a processStream file' %(self.path))
+            off = 8 + _U32.unpack_from(buf, 4)[0]
+            while off + 4 <= size:
+                recSize = _U32.unpack_from(buf, off)[0]
+                end = off + 4 + recSize
+                if end > size:
+                    break
+                yield off + 4 + _LZRD_DEADTIME_BYTES, end
+                off = end
+        else:
+            raise ValueError('Invalid file type (%s)' %(self.fileType))
+
+    def _buildIndex(self):
+        offsets = array.array('Q')
+        frames  = []
+        footers = []
+        if self._mmap is not None:
+            for start, end in self._records():
+                first = len(offsets)
+                offsets, footer = scanFrame(self._mmap, start, end, offsets)
+                frames.append((start, end-start, first, len(offsets)-first, -1 if footer is None else footer))
+                if footer is not None:
+                    footers.append(footer)
+
+        self.frames = np.array(frames, dtype=FRAME_INDEX_DTYPE)
+        offsets = np.frombuffer(offsets, dtype=np.uint64) if len(offsets) else np.zeros(0, dtype=np.uint64)
+        headers = gatherHeaders(self.data, offsets)
+
+        pods = np.zeros(len(offsets), dtype=POD_INDEX_DTYPE)
+        pods['offset']     = offsets
+        pods['frame']      = np.repeat(np.arange(len(self.frames)), self.frames['numPods'])
+        pods['channel']    = channelIndex(headers)
+        pods['lane']       = headerLane(headers)
+        pods['flags']      = headerFlags(headers)
+        pods['fastOfs']    = fastOffset(headers)
+        pods['trigSize']   = trigSize(headers)
+        zs = np.flatnonzero(isZeroSuppressed(headers))
+        if len(zs):
+            raw = self.data[(offsets[zs].astype(np.int64) + HEADER_BYTES)[:, None] + np.arange(4)]
+            pods['trigSize'][zs] = raw.view('<u4').reshape(-1)
+        pods['trigOffset'] = headers['trigOffset']
+        pods['trigTime']   = headers['trigTime']
+        self.pods = pods
+
+        self.footers = gatherFooters(self.data, footers)
+
+    def _channelKey(self):
+        return -1 if self.dataChannel is None else self.dataChannel
+
+    def _indexPath(self):
+        return self.path + '.lzidx.npz'
+
+    def _loadIndex(self):
+        path = self._indexPath()
+        if not os.path.exists(path):
+            return False
+        try:
+            idx = np.load(path)
+            stat = os.stat(self.path)
+            if int(idx['version']) != INDEX_VERSION or int(idx['fileSize']) != self.fileSize or \
+               float(idx['mtime']) != stat.st_mtime or str(idx['fileType']) != self.fileType or \
+               int(idx['dataChannel']) != self._channelKey():
+                return False
+            self.pods    = idx['pods']
+            self.frames  = idx['frames']
+            self.footers = idx['footers']
+            return True
+        except (IOError, OSError, KeyError, ValueError):
+            return False
+
+    def _saveIndex(self):
+        try:
+            np.savez(self._indexPath(), version=INDEX_VERSION, fileSize=self.fileSize,
+                     mtime=os.stat(self.path).st_mtime, fileType=self.fileType,
+                     dataChannel=self._channelKey(), pods=self.pods, frames=self.frames,
+                     footers=self.footers)
+        except (IOError, OSError):
+            # read only location, the index is rebuilt next time
+            pass
+
+    ###########################################
+    # access
+    ###########################################
+    def header(self, i):
+        """Raw header of POD i"""
+        off = int(self.pods['offset'][i])
+        return self.data[off:off+HEADER_BYTES].view(HEADER_DTYPE)[0]
+
+    def samples(self, i):
+        """Waveform of POD i as a uint16 view into the mapped file (a copy if zero suppressed)"""
+        pod = self.pods[i]
+        if pod['flags'] & FLAG_ZS:
+            return podSamples(self.data, int(pod['offset']))
+        off = int(pod['offset']) + HEADER_BYTES
+        return self.data[off:off+2*int(pod['trigSize'])].view('<u2')
+
+    def waveforms(self, indices, length=None):
+        """
+        Samples of the listed PODs as a 2D uint16 array, truncated to
+        length (the shortest POD if None)
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if length is None:
+            length = int(self.pods['trigSize'][indices].min()) if len(indices) else 0
+        zs = (self.pods['flags'][indices] & FLAG_ZS) != 0
+        if not zs.any():
+            return gatherSamples(self.data, self.pods['offset'][indices], length)
+        out = np.empty((len(indices), length), dtype=np.uint16)
+        out[~zs] = gatherSamples(self.data, self.pods['offset'][indices[~zs]], length)
+        for row in np.flatnonzero(zs):
+            out[row] = self.samples(indices[row])[:length]
+        return out
+
+    def batches(self, indices=None, maxPods=4096):
+        """
+        Yields (indices, waveforms) with the PODs grouped by trigSize so
+        that each batch is one rectangular array of at most maxPods rows
+        """
+        if indices is None:
+            indices = np.arange(len(self.pods))
+        indices = np.asarray(indices, dtype=np.int64)
+        if len(indices) == 0:
+            return
+        sizes = self.pods['trigSize'][indices]
+        order = np.argsort(sizes, kind='stable')
+        bounds = np.flatnonzero(np.diff(sizes[order])) + 1
+        for group in np.split(indices[order], bounds):
+            for i in range(0, len(group), maxPods):
+                batch = group[i:i+maxPods]
+                yield batch, self.waveforms(batch)
+
+    def frameFooter(self, frame):
+        """Footer of a frame or None"""
+        off = int(self.frames['footer'][frame])
+        if off < 0:
+            return None
+        return self.data[off:off+FOOTER_BYTES].view(FOOTER_DTYPE)[0]
+
+    def frameBoards(self):
+        """
+        Board DNAs (ints, from the footers, sorted) and the board of every
+        frame as an index into them, -1 for frames without footer
+        """
+        keys = np.empty(len(self.footers), dtype=[('h', '<u8'), ('l', '<u8')])
+        keys['h'] = self.footers['dnaH']
+        keys['l'] = self.footers['dnaL']
+        unique, board = np.unique(keys, return_inverse=True)
+        frameBoard = np.full(len(self.frames), -1, dtype=np.int64)
+        frameBoard[self.frames['footer'] >= 0] = board.reshape(-1)
+        boards = [(int(k['h']) << 64) | int(k['l']) for k in unique]
+        return boards, frameBoard
+
+    def podBoards(self):
+        """
+        Board DNAs (ints, from the footers) and the board of every POD as
+        an index into them, -1 for PODs of frames without footer
+        """
+        boards, frameBoard = self.frameBoards()
+        return boards, frameBoard[self.pods['frame']]
+
+    def select(self, channels=None, flagsAll=0, flagsNone=0, flagsAny=0):
+        """
+        Indices of the PODs of the listed channels whose flags contain all
+        bits of flagsAll, none of flagsNone and at least one of flagsAny.
+        """
+        pods = self.pods
+        mask = np.ones(len(pods), dtype=bool)
+        if channels is not None:
+            mask &= np.isin(pods['channel'], channels)
+        flags = pods['flags']
+        if flagsAll:
+            mask &= (flags & flagsAll) == flagsAll
+        if flagsNone:
+            mask &= (flags & flagsNone) == 0
+        if flagsAny:
+            mask &= (flags & flagsAny) != 0
+        return np.flatnonzero(mask)
+
+    def timeOrder(self):
+        """POD indices sorted by trigTime"""
+        if self._timeOrder is None:
+            self._timeOrder = np.argsort(self.pods['trigTime'], kind='stable')
+        return self._timeOrder
+
+
+class PodCache(object):
+    """
+    LRU cache of waveforms copied out of a RunFile. A background thread
+    loads the PODs requested by prefetch() so that stepping through a run
+    never waits on the disk.
+    """
+
+    def __init__(self, runFile, maxPods=4096):
+        self.runFile = runFile
+        self.maxPods = maxPods
+        self.cache   = collections.OrderedDict()
+        self.lock    = threading.Lock()
+        self.hits    = 0
+        self.misses  = 0
+        self._queue  = collections.deque()
+        self._wake   = threading.Event()
+        self._thread = threading.Thread(target=self._prefetchLoop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def get(self, i):
+        i = int(i)
+        with self.lock:
+            wf = self.cache.get(i)
+            if wf is not None:
+                self.cache.move_to_end(i)
+                self.hits += 1
+                return wf
+            self.misses += 1
+        return self._load(i)
+
+    def prefetch(self, indices):
+        """Queues PODs to be loaded in the background, most urgent first"""
+        self._queue.clear()
+        self._queue.extend(int(i) for i in indices)
+        self._wake.set()
+
+    def _load(self, i):
+        wf = np.array(self.runFile.samples(i))
+        with self.lock:
+            self.cache[i] = wf
+            self.cache.move_to_end(i)
+            while len(self.cache) > self.maxPods:
+                self.cache.popitem(last=False)
+        return wf
+
+    def _prefetchLoop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while True:
+                try:
+                    i = self._queue.popleft()
+                except IndexError:
+                    break
+                with self.lock:
+                    cached = i in self.cache
+                if not cached:
+                    self._load(i)
+
+
+class RunBrowser(object):
+    """
+    Steps through the events of a RunFile. An event is the group of PODs
+    whose trigTime is within window ticks of the previous POD in time
+    order. Channel and flag filters select which PODs are considered.
+    """
+
+    def __init__(self, runFile, window=0, prefetch=8, cacheSize=4096):
+        self.runFile  = runFile
+        self.window   = window
+        self.prefetchEvents = prefetch
+        self.cache    = PodCache(runFile, cacheSize)
+        self.channels = None
+        self.flagsAll = 0
+        self.flagsNone = 0
+        self.flagsAny = 0
+        self.position = 0
+        self._build()
+
+    def setFilter(self, channels=None, flagsAll=0, flagsNone=0, flagsAny=0):
+        self.channels  = channels
+        self.flagsAll  = flagsAll
+        self.flagsNone = flagsNone
+        self.flagsAny  = flagsAny
+        self._build()
+
+    def _build(self):
+        rf = self.runFile
+        sel = rf.select(self.channels, self.flagsAll, self.flagsNone, self.flagsAny)
+        order = sel[np.argsort(rf.pods['trigTime'][sel], kind='stable')]
+        times = rf.pods['trigTime'][order].astype(np.int64)
+        # new event wherever the gap to the previous POD exceeds the window
+        newEvent = np.ones(len(order), dtype=bool)
+        newEvent[1:] = np.diff(times) > self.window
+        self.order  = order
+        self.starts = np.flatnonzero(newEvent)
+        self.stops  = np.append(self.starts[1:], len(order))
+        self.times  = times[self.starts] if len(order) else np.zeros(0, dtype=np.int64)
+        self.position = min(self.position, max(len(self.starts)-1, 0))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def podsOf(self, n):
+        """POD indices of event n"""
+        return self.order[self.starts[n]:self.stops[n]]
+
+    def event(self, n=None):
+        """Returns {channel: (pod index, waveform)} of event n (current if None)"""
+        if n is None:
+            n = self.position
+        result = {}
+        if n < 0 or n >= len(self.starts):
+            return result
+        for i in self.podsOf(n):
+            ch = int(self.runFile.pods['channel'][i])
+            # keep the first POD of a channel if the window groups several
+            if ch not in result:
+                result[ch] = (int(i), self.cache.get(i))
+        self._prefetch(n)
+        return result
+
+    def _prefetch(self, n):
+        # neighbours in stepping order: n+1, n-1, n+2, n-2, ...
+        pods = []
+        for k in range(1, self.prefetchEvents+1):
+            for m in (n+k, n-k):
+                if 0 <= m < len(self.starts):
+                    pods.extend(self.podsOf(m))
+        self.cache.prefetch(pods)
+
+    def goto(self, n):
+        if len(self.starts) == 0:
+            self.position = 0
+        else:
+            self.position = max(0, min(int(n), len(self.starts)-1))
+        return self.position
+
+    def gotoTime(self, seconds):
+        """Moves to the first event at or after the given trigTime in seconds"""
+        return self.goto(np.searchsorted(self.times, int(seconds * TIME_CLK_HZ)))
+
+    def next(self, step=1):
+        return self.goto(self.position + step)
+
+    def prev(self, step=1):
+        return self.goto(self.position - step)
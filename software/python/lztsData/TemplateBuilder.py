@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : pulse averaging and template library
+#-----------------------------------------------------------------------------
+# File       : TemplateBuilder.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Averages the pulses found by PulseFinder per channel and amplitude bin.
+# Every hit is aligned on its first sample below threshold ('threshold') or
+# on its peak sample ('peak') and a window of pre + post samples of the
+# baseline subtracted (positive going) signal is cut around it. Hits whose
+# window leaves the POD, or with another hit of the same POD closer than
+# isolation samples, are skipped.
+#
+# The sum and sum of squares of the windows are kept in accumulators
+# allocated once (channels x amplitude bins x samples). A batch is added
+# by sorting its windows by cell and reducing them with one add.reduceat,
+# so a whole run is built in a single pass over RunFile.batches.
+#
+# save() keeps only the filled cells as float32; TemplateLibrary reads them
+# back.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import numpy as np
+
+from lztsData._lztsData import *
+from lztsData.PulseFinder import findPulses
+
+
+class TemplateBuilder(object):
+    """Streaming per channel and amplitude bin pulse averages"""
+
+    def __init__(self, ampBins=(0, np.inf), pre=8, post=24, align='peak', isolation=None,
+                 numChannels=NUM_CH, **params):
+        self.edges     = np.asarray(ampBins, dtype=np.float64)
+        self.pre       = pre
+        self.post      = post
+        self.length    = pre + post
+        self.align     = align
+        self.isolation = isolation
+        self.params    = params    # findPulses parameters
+        shape = (numChannels, len(self.edges) - 1)
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.sum    = np.zeros(shape + (self.length,))
+        self.sumSq  = np.zeros(shape + (self.length,))
+        self._cols  = np.arange(-pre, post)
+
+    def reset(self):
+        self.counts[...] = 0
+        self.sum[...]    = 0
+        self.sumSq[...]  = 0
+
+    def addBatch(self, waveforms, channel, trigOffset, pods=None):
+        """Finds and accumulates the pulses of a (PODs x samples) batch, returns the hits used"""
+        waveforms = np.asarray(waveforms)
+        hits = findPulses(waveforms, channel, trigOffset, pods=np.arange(len(waveforms)), **self.params)
+        if len(hits) == 0:
+            return hits
+        row = hits['pod'].astype(np.int64)
+        pos = (hits['peakSample'] if self.align == 'peak' else hits['start']).astype(np.int64)
+        length = waveforms.shape[1]
+        ok = (pos - self.pre >= 0) & (pos + self.post <= length)
+        ok &= (hits['peak'] >= self.edges[0]) & (hits['peak'] < self.edges[-1])
+        if self.isolation is not None and len(hits) > 1:
+            # hits are ordered by POD and time
+            same = row[1:] == row[:-1]
+            close = same & (hits['start'][1:].astype(np.int64) - hits['start'][:-1] < self.isolation)
+            ok[1:] &= ~close
+            ok[:-1] &= ~close
+        hits = hits[ok]
+        if len(hits) == 0:
+            return hits
+        row, pos = row[ok], pos[ok]
+
+        # baseline subtracted positive windows
+        flat = waveforms.reshape(-1)
+        idx  = (row * length + pos)[:, None] + self._cols
+        win  = hits['baseline'][:, None].astype(np.float64) - flat.take(idx)
+
+        cell = hits['channel'].astype(np.int64) * self.counts.shape[1] + \
+               np.searchsorted(self.edges, hits['peak'], side='right') - 1
+        order = np.argsort(cell, kind='stable')
+        cell, win = cell[order], win[order]
+        starts = np.flatnonzero(np.diff(cell, prepend=-1))
+        cells  = cell[starts]
+        self.counts.reshape(-1)[cells] += np.diff(np.append(starts, len(cell)))
+        self.sum.reshape(-1, self.length)[cells]   += np.add.reduceat(win, starts, axis=0)
+        self.sumSq.reshape(-1, self.length)[cells] += np.add.reduceat(win * win, starts, axis=0)
+        if pods is not None:
+            hits['pod'] = np.asarray(pods)[hits['pod']]
+        return hits
+
+    def addRun(self, runFile, indices=None, maxPods=4096):
+        """Accumulates the PODs of a RunFile (all if indices is None)"""
+        pods = runFile.pods
+        for batch, waveforms in runFile.batches(indices, maxPods):
+            self.addBatch(waveforms, pods['channel'][batch], pods['trigOffset'][batch], batch)
+        return self
+
+    def mean(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sum / self.counts[:, :, None]
+
+    def rms(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.mean()
+            return np.sqrt(np.maximum(self.sumSq / self.counts[:, :, None] - mean * mean, 0))
+
+    def save(self, path):
+        """Writes the filled cells to an npz file"""
+        channel, ampBin = np.nonzero(self.counts)
+        np.savez(path, channel=channel.astype(np.uint8), ampBin=ampBin.astype(np.uint16),
+                 counts=self.counts[channel, ampBin], mean=self.mean()[channel, ampBin].astype(np.float32),
+                 rms=self.rms()[channel, ampBin].astype(np.float32), edges=self.edges,
+                 pre=self.pre, post=self.post, align=self.align)
+
+
+class TemplateLibrary(object):
+    """Templates written by TemplateBuilder.save"""
+
+    def __init__(self, path):
+        data = np.load(path)
+        self.edges   = data['edges']
+        self.pre     = int(data['pre'])
+        self.post    = int(data['post'])
+        self.align   = str(data['align'])
+        self.channel = data['channel']
+        self.ampBin  = data['ampBin']
+        self.counts  = data['counts']
+        self.means   = data['mean']
+        self.rmss    = data['rms']
+        self._cells  = dict(((int(c), int(b)), i) for i, (c, b) in enumerate(zip(self.channel, self.ampBin)))
+
+    def __len__(self):
+        return len(self.counts)
+
+    def cell(self, channel, amplitude):
+        """Row of the template of a channel for a pulse amplitude, None if there is none"""
+        ampBin = int(np.searchsorted(self.edges, amplitude, side='right')) - 1
+        return self._cells.get((int(channel), ampBin))
+
+    def template(self, channel, amplitude, normalize='peak'):
+        """Mean pulse scaled to a unit peak ('peak') or area ('area'), None if missing"""
+        i = self.cell(channel, amplitude)
+        if i is None:
+            return None
+        t = self.means[i].astype(np.float64)
+        scale = t.max() if normalize == 'peak' else t.sum() if normalize == 'area' else 1.0
+        return t / scale if scale else t
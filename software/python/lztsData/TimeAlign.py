@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : slow/fast ADC time alignment and resampling
+#-----------------------------------------------------------------------------
+# File       : TimeAlign.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Puts slow (250 MHz) and fast (1 GHz) ADC PODs on one time base. trigTime
+# counts 4 ns ticks. The fast ADC delivers 4 samples per tick and fastOfs
+# is the sample of the tick that triggered (FadcBufferChannel
+# sampleOffset), so sample i of a POD is at
+#    slow : trigTime*4 + (i - trigOffset)*4           ns
+#    fast : trigTime*4 + fastOfs + (i - trigOffset)   ns
+# minus an optional per channel delay (cable / pipeline calibration).
+#
+# Batches of waveforms are resampled onto a common grid either by linear
+# interpolation or by a polyphase windowed sinc: the fractional positions
+# are quantized to a number of phases and the filter is applied as one
+# multiply-add per tap over the whole batch. When the grid is coarser than
+# the samples the sinc cutoff is lowered to avoid aliasing.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import numpy as np
+
+from lztsData._lztsData import *
+
+# per channel delays in ns subtracted from the sample times
+channelDelayNs = np.zeros(NUM_CH)
+
+
+def podPeriod(pods):
+    """Sample period in ns of POD index records"""
+    return np.where(pods['channel'] < NUM_SADC_CH, SADC_PERIOD_NS, FADC_PERIOD_NS)
+
+
+def podStartNs(pods, delays=None):
+    """Absolute time in ns of the first sample of POD index records"""
+    if delays is None:
+        delays = channelDelayNs
+    channel = pods['channel'].astype(np.intp)
+    fast    = channel >= NUM_SADC_CH
+    period  = podPeriod(pods)
+    return pods['trigTime'].astype(np.float64) * TIME_CLK_NS + \
+           np.where(fast, pods['fastOfs'] * FADC_PERIOD_NS, 0.0) - \
+           pods['trigOffset'] * period - np.asarray(delays)[channel]
+
+
+def sampleTimes(pods, length, delays=None):
+    """(PODs x length) array of absolute sample times in ns"""
+    return podStartNs(pods, delays)[:, None] + np.arange(length) * podPeriod(pods)[:, None]
+
+
+def resampleLinear(waveforms, start, period, grid, fill=np.nan):
+    """
+    Linear interpolation of the rows of waveforms (first sample at start[i],
+    spacing period[i] ns) at the times grid (1D common grid or 2D per row).
+    Points outside a row are set to fill.
+    """
+    waveforms = np.asarray(waveforms, dtype=np.float32)
+    n, length = waveforms.shape
+    start  = np.broadcast_to(np.asarray(start, dtype=np.float64), (n,))
+    period = np.broadcast_to(np.asarray(period, dtype=np.float64), (n,))
+    x = (np.atleast_2d(grid) - start[:, None]) / period[:, None]
+    x = np.broadcast_to(x, (n, x.shape[1]))
+    i = np.floor(x).astype(np.intp)
+    f = (x - i).astype(np.float32)
+    inside = (x >= 0) & (x <= length - 1)
+    i0 = np.clip(i, 0, length-1)
+    i1 = np.clip(i+1, 0, length-1)
+    a = np.take_along_axis(waveforms, i0, axis=1)
+    b = np.take_along_axis(waveforms, i1, axis=1)
+    out = a + (b - a) * f
+    out[~inside] = fill
+    return out
+
+
+_kernelCache = {}
+
+def sincKernel(taps=16, phases=64, cutoff=1.0, beta=6.0):
+    """
+    Polyphase windowed sinc table (phases x taps). Row p interpolates at a
+    fraction p/phases between taps//2-1 and taps//2. Cached per parameters.
+    """
+    key = (taps, phases, float(cutoff), float(beta))
+    table = _kernelCache.get(key)
+    if table is None:
+        offs = np.arange(taps) - (taps//2 - 1)
+        frac = np.arange(phases) / float(phases)
+        t = offs[None, :] - frac[:, None]
+        table = cutoff * np.sinc(cutoff * t) * np.kaiser(taps + 2, beta)[1:-1][None, :]
+        table /= table.sum(axis=1, keepdims=True)
+        table = table.astype(np.float32)
+        _kernelCache[key] = table
+    return table
+
+
+def resamplePolyphase(waveforms, start, period, grid, taps=16, phases=64, fill=np.nan):
+    """
+    Windowed sinc interpolation, same arguments as resampleLinear. Edge
+    samples are repeated outside the rows for the filter support.
+    """
+    waveforms = np.asarray(waveforms, dtype=np.float32)
+    n, length = waveforms.shape
+    start  = np.broadcast_to(np.asarray(start, dtype=np.float64), (n,))
+    period = np.broadcast_to(np.asarray(period, dtype=np.float64), (n,))
+    grid2d = np.atleast_2d(grid)
+    x = (grid2d - start[:, None]) / period[:, None]
+    x = np.broadcast_to(x, (n, x.shape[1]))
+    i = np.floor(x).astype(np.intp)
+    phase = np.minimum(((x - i) * phases).astype(np.intp), phases-1)
+    inside = (x >= 0) & (x <= length - 1)
+
+    # lower the cutoff when the grid is coarser than the samples
+    gridStep = np.diff(grid2d, axis=1).mean() if grid2d.shape[1] > 1 else period.min()
+    cutoff = min(1.0, float(period.min()) / float(gridStep))
+    table = sincKernel(taps, phases, round(cutoff, 3))
+
+    # edge padded rows so every tap is one flat take without clipping
+    pad    = taps
+    padded = np.pad(waveforms, ((0, 0), (pad, pad)), mode='edge').ravel()
+    base   = np.clip(i, -pad//2, length-1+pad//2) + pad - (taps//2 - 1)
+    base  += (np.arange(n) * (length + 2*pad))[:, None]
+    coefs  = np.ascontiguousarray(table.T)
+    out = np.zeros(x.shape, dtype=np.float32)
+    for k in range(taps):
+        out += coefs[k].take(phase) * padded.take(base + k)
+    out[~inside] = fill
+    return out
+
+
+def commonGrid(pods, lengths, step=FADC_PERIOD_NS, delays=None):
+    """Grid (ns) with the given step covering all listed PODs"""
+    start = podStartNs(pods, delays)
+    stop  = start + (np.asarray(lengths) - 1) * podPeriod(pods)
+    first = np.floor(start.min() / step) * step
+    return first + np.arange(int(np.ceil((stop.max() - first) / step)) + 1) * step
+
+
+def alignPods(runFile, indices, step=FADC_PERIOD_NS, method='polyphase', delays=None, **params):
+    """
+    Resamples PODs of a RunFile (any mix of slow and fast channels) onto
+    one grid. Returns (grid in ns, PODs x grid array, NaN outside a POD).
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    pods = runFile.pods[indices]
+    grid = commonGrid(pods, pods['trigSize'], step, delays)
+    out  = np.full((len(indices), len(grid)), np.nan, dtype=np.float32)
+    resample = resamplePolyphase if method == 'polyphase' else resampleLinear
+    start  = podStartNs(pods, delays)
+    period = podPeriod(pods)
+    # equal length and period PODs are resampled as one batch
+    keys = pods['trigSize'].astype(np.int64) * 2 + (period == FADC_PERIOD_NS)
+    for key in np.unique(keys):
+        rows = np.flatnonzero(keys == key)
+        waveforms = runFile.waveforms(indices[rows])
+        out[rows] = resample(waveforms, start[rows], period[rows], grid, **params)
+    return grid, out
+
+
+def relativeDelay(a, b, step, maxLag=None):
+    """
+    Delay in ns of b relative to a (two waveforms on the same grid), from
+    the FFT cross correlation peak with parabolic interpolation
+    """
+    a = np.nan_to_num(np.asarray(a, dtype=np.float64) - np.nanmean(a))
+    b = np.nan_to_num(np.asarray(b, dtype=np.float64) - np.nanmean(b))
+    n = len(a) + len(b) - 1
+    nfft = 1 << (n - 1).bit_length()
+    xc = np.fft.irfft(np.conj(np.fft.rfft(a, nfft)) * np.fft.rfft(b, nfft), nfft)
+    lags = np.concatenate((np.arange(0, len(b)), np.arange(-len(a)+1, 0)))
+    xc = np.concatenate((xc[:len(b)], xc[nfft-len(a)+1:]))
+    if maxLag is not None:
+        keep = np.abs(lags) <= maxLag
+        lags, xc = lags[keep], xc[keep]
+    k = int(np.argmax(xc))
+    shift = 0.0
+    if 0 < k < len(xc)-1:
+        y0, y1, y2 = xc[k-1], xc[k], xc[k+1]
+        denom = y0 - 2*y1 + y2
+        if denom != 0:
+            shift = 0.5 * (y0 - y2) / denom
+    return (lags[k] + shift) * step
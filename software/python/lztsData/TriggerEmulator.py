@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : offline model of the internal (zero suppression) trigger
+#-----------------------------------------------------------------------------
+# File       : TriggerEmulator.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Replays continuous waveforms (long external trigger PODs) through a model
+# of the SadcBufferWriter / FadcBufferChannel trigger state machines and
+# reports the PODs a given set of Int* registers would produce.
+#
+# Model (from the RTL, comparator pipeline latency ignored):
+#   IDLE    trigger when adc >= IntPreThreshold (never if it is 0),
+#           trigOffset = min(IntPreDelay, samples since the record start)
+#   ARM     first later sample with adc <= IntPostThreshold (post) or
+#           adc >= IntVetoThreshold (veto, post has priority); a veto gives
+#           a zero length POD (kept only with IntSaveVeto); the trigger is
+#           dropped when the length would exceed the maximum
+#   POST    IntPostDelay more samples; fast ADC only: a pre threshold
+#           crossing in this window re-arms the trigger (re-trigger)
+#   WR_TRIG dead time, pre threshold samples in it count as lost triggers
+#
+# Instead of stepping through every sample, the sample positions crossing
+# each threshold are computed once per record and threshold value (cached
+# across settings) and the state machine jumps between them with
+# bisect, so one setting costs O(triggers), not O(samples).
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import bisect
+import itertools
+import numpy as np
+
+from lztsData._lztsData import *
+
+# Int* register names as in lztsFpga.SadcBufferWriter / FadcBufferChannel
+SETTINGS = ['IntPreThreshold', 'IntPostThreshold', 'IntVetoThreshold',
+            'IntPreDelay', 'IntPostDelay', 'IntSaveVeto']
+
+EMU_POD_DTYPE = np.dtype([
+    ('record',      '<u4'),   # index of the replayed record
+    ('start',       '<i8'),   # first sample of the POD in the record
+    ('trigger',     '<i8'),   # sample of the pre threshold crossing
+    ('trigSize',    '<u4'),
+    ('trigOffset',  '<u4'),
+    ('flags',       'u1'),    # FLAG_* bits
+])
+
+SUMMARY_DTYPE = np.dtype([(name, '<u4') for name in SETTINGS] + [
+    ('pods',        '<u8'),   # PODs written (including saved vetoes)
+    ('vetoes',      '<u8'),
+    ('drops',       '<u8'),
+    ('lost',        '<u8'),   # pre threshold samples during the dead time
+    ('samples',     '<u8'),
+    ('bytes',       '<u8'),
+    ('podRate',     '<f8'),   # PODs/s
+    ('dataRate',    '<f8'),   # MB/s
+])
+
+# ADC specific parameters: sample period, maximum POD length (and whether
+# the post delay counts against it while armed), samples per WR_TRIG dead
+# time, re-trigger in POST and even POD lengths
+ADC_MODELS = {
+    'slow' : dict(period=SADC_PERIOD_NS, maxLength=2**22-1, postInLimit=True,  deadSamples=4,  reTrigger=False, even=False),
+    'fast' : dict(period=FADC_PERIOD_NS, maxLength=2**10-4, postInLimit=False, deadSamples=16, reTrigger=True,  even=True),
+}
+
+
+def settingsGrid(**values):
+    """
+    List of settings dicts with every combination of the given register
+    values, e.g. settingsGrid(IntPreThreshold=range(100, 200, 10), IntPostDelay=[8, 16])
+    """
+    names = list(values.keys())
+    lists = [v if np.iterable(v) else [v] for v in values.values()]
+    return [dict(zip(names, combo)) for combo in itertools.product(*lists)]
+
+
+class TriggerEmulator(object):
+    """Replays a set of continuous records through the trigger model"""
+
+    def __init__(self, records, adc='slow', **model):
+        self.records = [np.asarray(r) for r in records]
+        self.model   = dict(ADC_MODELS[adc])
+        self.model.update(model)
+        self.totalSamples = sum(len(r) for r in self.records)
+        # (record, kind, threshold) -> sorted crossing positions
+        self._cache = {}
+
+    def _positions(self, rec, kind, thresh):
+        key = (rec, kind, thresh)
+        pos = self._cache.get(key)
+        if pos is None:
+            data = self.records[rec]
+            if kind == 'ge':
+                pos = np.flatnonzero(data >= thresh)
+            else:
+                pos = np.flatnonzero(data <= thresh)
+            # plain lists, bisect on them is much faster than a scalar searchsorted
+            pos = pos.tolist()
+            self._cache[key] = pos
+        return pos
+
+    def clearCache(self):
+        self._cache = {}
+
+    def run(self, settings):
+        """
+        Emulates one settings dict (missing registers default to 0, as after
+        reset). Returns (EMU_POD_DTYPE array, counters dict).
+        """
+        cfg = dict((name, int(settings.get(name, 0))) for name in SETTINGS)
+        pods = []
+        counters = dict(vetoes=0, drops=0, lost=0)
+        if cfg['IntPreThreshold'] != 0:
+            for rec in range(len(self.records)):
+                self._runRecord(rec, cfg, pods, counters)
+        return np.array(pods, dtype=EMU_POD_DTYPE), counters
+
+    def _runRecord(self, rec, cfg, pods, counters):
+        model     = self.model
+        maxLength = model['maxLength']
+        dead      = model['deadSamples']
+        preDelay  = cfg['IntPreDelay']
+        postDelay = cfg['IntPostDelay']
+        saveVeto  = cfg['IntSaveVeto']
+        size      = len(self.records[rec])
+        pre  = self._positions(rec, 'ge', cfg['IntPreThreshold'])
+        post = self._positions(rec, 'le', cfg['IntPostThreshold'])
+        veto = self._positions(rec, 'ge', cfg['IntVetoThreshold'])
+        end  = np.iinfo(np.int64).max
+        search = bisect.bisect_left
+
+        def nextOf(pos, i):
+            k = search(pos, i)
+            return pos[k] if k < len(pos) else end
+
+        def deadTime(i):
+            # WR_TRIG from sample i, returns the next IDLE sample
+            counters['lost'] += search(pre, i+dead) - search(pre, i)
+            return i + dead
+
+        i = 0
+        while True:
+            trig = nextOf(pre, i)
+            if trig >= size:
+                return
+            actPre = min(preDelay, trig, 0xFFFF)
+            start  = trig - actPre
+            reTrig = False
+            arm    = trig
+            while True:
+                p = nextOf(post, arm+1)
+                v = nextOf(veto, arm+1)
+                # length reaches the maximum before a post or veto sample
+                limit = start + maxLength - (postDelay if model['postInLimit'] else 0)
+                stop = min(p, v, limit)
+                if stop >= size:
+                    # record ends while the trigger is pending
+                    return
+                if stop == p:
+                    e = min(p + postDelay, start + maxLength)
+                    if model['reTrigger']:
+                        r = nextOf(pre, p+1)
+                        if r <= e and r < size and e < start + maxLength:
+                            reTrig = True
+                            arm = r
+                            continue
+                    flags = FLAG_INT
+                    length = e - start
+                    i = deadTime(e + 1)
+                elif stop == v and not reTrig:
+                    counters['vetoes'] += 1
+                    if saveVeto:
+                        pods.append((rec, trig, trig, 0, 0, FLAG_INT | FLAG_VETO))
+                        i = deadTime(v + 1)
+                    else:
+                        i = v + 1
+                    break
+                elif reTrig:
+                    # veto or maximum length after a re-trigger write the POD
+                    flags = FLAG_INT
+                    length = min(stop, start + maxLength) - start
+                    i = deadTime(stop + 1)
+                else:
+                    counters['drops'] += 1
+                    i = stop + 1
+                    break
+                if model['even'] and length & 1:
+                    length += 1 if length < maxLength else -1
+                pods.append((rec, start, trig, length, actPre, flags))
+                break
+
+    def summary(self, settings):
+        """One SUMMARY_DTYPE record for a settings dict"""
+        pods, counters = self.run(settings)
+        out = np.zeros(1, dtype=SUMMARY_DTYPE)[0]
+        for name in SETTINGS:
+            out[name] = int(settings.get(name, 0))
+        seconds = self.totalSamples * self.model['period'] * 1e-9
+        sizes = pods['trigSize'].astype(np.int64)
+        out['pods']    = len(pods)
+        out['vetoes']  = counters['vetoes']
+        out['drops']   = counters['drops']
+        out['lost']    = counters['lost']
+        out['samples'] = sizes.sum()
+        out['bytes']   = (HEADER_BYTES + ((sizes + (sizes & 1)) << 1)).sum()
+        if seconds > 0:
+            out['podRate']  = len(pods) / seconds
+            out['dataRate'] = out['bytes'] / seconds / 1e6
+        return out
+
+    def sweep(self, settingsList):
+        """SUMMARY_DTYPE array with one record per settings dict"""
+        return np.array([self.summary(s) for s in settingsList], dtype=SUMMARY_DTYPE)
+
+
+def extTrigRecords(runFile, channel):
+    """Waveforms of the external trigger PODs of one channel index"""
+    return [runFile.samples(i) for i in runFile.select(channels=[channel], flagsAll=FLAG_EXT)]
+
+
+def sweepRun(runFile, channel, settingsList, **model):
+    """Replays the external trigger PODs of a channel with every settings dict"""
+    adc = 'slow' if channel < NUM_SADC_CH else 'fast'
+    return TriggerEmulator(extTrigRecords(runFile, channel), adc, **model).sweep(settingsList)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : software zero suppression of recorded frames
+#-----------------------------------------------------------------------------
+# File       : ZeroSuppress.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Trims long PODs (external trigger mode records) to the regions around
+# threshold crossings before they are written. A sample is a crossing when
+# it differs from the POD baseline (median of the first baselineSamples)
+# by more than threshold ADU in either direction. Every crossing keeps pre
+# samples before and post samples after it, overlapping regions are
+# merged. The trimmed POD keeps its header (with ZS_BIT set) and stores a
+# small region table in front of the kept samples, see _lztsData.py.
+#
+# PODs shorter than minSize and PODs that would not get smaller are copied
+# unchanged, so a suppressed file holds a mix of both. The footer is copied
+# as is. RunFile expands suppressed PODs back to their original length
+# with the removed samples set to the baseline.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import struct
+import numpy as np
+
+from lztsData._lztsData import *
+
+
+def keepMask(waveforms, threshold, pre, post, baselineSamples=32):
+    """
+    (PODs x samples) boolean array of the samples to keep and the per row
+    baseline. threshold is a scalar or one value per row.
+    """
+    waveforms = np.asarray(waveforms)
+    n, length = waveforms.shape
+    baseline = np.median(waveforms[:, :max(1, min(baselineSamples, length))], axis=1)
+    dev = np.abs(waveforms.astype(np.int32) - np.rint(baseline).astype(np.int32)[:, None])
+    thr = np.asarray(threshold)
+    if thr.ndim:
+        thr = thr[:, None]
+    above = dev > thr
+    # a sample is kept when a crossing lies within [i-post, i+pre]
+    counts = np.zeros((n, length + pre + post + 1), dtype=np.int32)
+    np.cumsum(above, axis=1, out=counts[:, post+1:post+1+length])
+    counts[:, post+1+length:] = counts[:, post+length:post+1+length]
+    keep = counts[:, pre+post+1:] > counts[:, :length]
+    return keep, baseline
+
+
+def regions(keep):
+    """(starts, lengths) of the runs of True in a 1D mask"""
+    edges = np.diff(keep.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+class ZeroSuppressor(object):
+    """
+    Callable applied to every frame (bytes) before it is written, returns
+    the frame with its long PODs trimmed. threshold is a scalar or one
+    value per channel index (0 disables a channel).
+    """
+
+    def __init__(self, threshold=20, pre=16, post=32, baselineSamples=32, minSize=256):
+        self.threshold = threshold
+        self.pre       = pre
+        self.post      = post
+        self.baselineSamples = baselineSamples
+        self.minSize   = max(minSize, 1)
+        self.bytesIn   = 0
+        self.bytesOut  = 0
+        self.podsIn    = 0
+        self.podsSuppressed = 0
+
+    def ratio(self):
+        """Written over received bytes"""
+        return self.bytesOut / float(self.bytesIn) if self.bytesIn else 1.0
+
+    def __call__(self, frame):
+        frame = bytes(frame)
+        data = np.frombuffer(frame, dtype=np.uint8)
+        offsets, footer = scanFrame(data)
+        self.bytesIn += len(frame)
+        self.podsIn  += len(offsets)
+        if len(offsets) == 0:
+            self.bytesOut += len(frame)
+            return frame
+
+        offsets = np.asarray(offsets, dtype=np.int64)
+        headers = gatherHeaders(data, offsets)
+        sizes   = trigSize(headers).astype(np.int64)
+        thr = np.asarray(self.threshold)
+        thr = thr[channelIndex(headers)] if thr.ndim else np.full(len(offsets), thr)
+        # PODs already suppressed upstream are left alone
+        cand = (sizes >= self.minSize) & (thr > 0) & ~isZeroSuppressed(headers)
+
+        trimmed = {}
+        for size in np.unique(sizes[cand]):
+            rows = np.flatnonzero(cand & (sizes == size))
+            waveforms = gatherSamples(data, offsets[rows], int(size))
+            keep, baseline = keepMask(waveforms, thr[rows], self.pre, self.post, self.baselineSamples)
+            for k, row in enumerate(rows):
+                pod = self._trim(headers[row], waveforms[k], keep[k], baseline[k])
+                if pod is not None:
+                    trimmed[row] = pod
+
+        if not trimmed:
+            self.bytesOut += len(frame)
+            return frame
+
+        out = []
+        end = footer if footer is not None else len(frame)
+        ends = np.append(offsets[1:], end)
+        # bytes in front of the first POD and between PODs are kept verbatim
+        pos = 0
+        for row, (off, nxt) in enumerate(zip(offsets.tolist(), ends.tolist())):
+            if row in trimmed:
+                out.append(frame[pos:off])
+                out.append(trimmed[row])
+                pos = nxt
+        out.append(frame[pos:])
+        result = b''.join(out)
+        self.podsSuppressed += len(trimmed)
+        self.bytesOut += len(result)
+        return result
+
+    def _trim(self, header, samples, keep, baseline):
+        starts, lengths = regions(keep)
+        kept  = samples[keep]
+        words = (ZS_TABLE_BYTES + len(starts)*ZS_REGION_BYTES) // 2 + len(kept)
+        if words >= len(samples) or len(starts) > 0xFFFF:
+            return None
+        fill = int(np.clip(np.rint(baseline), 0, 0xFFFF))
+        header = header.copy()
+        header['typeFooter'] |= ZS_BIT
+        header['sizeFlags'] = (int(header['sizeFlags']) & ~SIZE_MASK) | words
+        table = np.empty(2*len(starts), dtype='<u4')
+        table[0::2] = starts
+        table[1::2] = lengths
+        parts = [header.tobytes(),
+                 struct.pack('<IHH', len(samples), len(starts), fill),
+                 table.tobytes(),
+                 kept.astype('<u2').tobytes()]
+        if words & 1:
+            parts.append(b'\x00\x00')
+        return b''.join(parts)
@@ -0,0 +1,22 @@
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to 
+# the license terms in the LICENSE.txt file found in the top-level directory 
+# of this distribution and at: 
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html. 
+# No part of the rogue software platform, including this file, may be 
+# copied, modified, propagated, or distributed except according to the terms 
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+from lztsData._lztsData import *
+from lztsData.RunFile import *
+from lztsData.BatchExporter import *
+from lztsData.PulseFinder import *
+from lztsData.TriggerEmulator import *
+from lztsData.EventBuilder import *
+from lztsData.TimeAlign import *
+from lztsData.FilterBank import *
+from lztsData.ZeroSuppress import *
+from lztsData.Livetime import *
+from lztsData.Crosstalk import *
+from lztsData.TemplateBuilder import *
+from lztsData.PedestalDb import *
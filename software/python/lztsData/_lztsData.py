@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : LZTS digitizer data format
+#-----------------------------------------------------------------------------
+# File       : _lztsData.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# NumPy descriptions of the POD (per channel trigger) header and of the
+# packetizer footer as they are sent by SadcBufferReader/FadcBuffer and
+# LztsPacketizer. All header and footer decoding should go through the
+# dtypes defined here so that the layout is described in one place.
+#
+# POD header (12 x 16 bit words):
+#   word 0     : PGP lane (bits 7:4) and VC (bits 3:0)
+#   word 1     : debug info
+#   word 2     : ADC channel number (bits 7:0)
+#   word 3     : 0x1000 for slow ADC, 0x0000 for fast ADC, bit 0 footer follows,
+#                bit 8 zero suppressed by software (see below)
+#   word 4/5   : trigSize (21:0), lost flag (22), fast ADC sample offset (24:23)
+#                ext (27), int (28), empty (29), veto (30), bad ADC (31) flags
+#   word 6/7   : trigOffset (pre trigger samples)
+#   word 8-11  : trigTime in 250 MHz clock ticks
+#
+# Footer (12 x 32 bit words) appended when the first POD has the footer bit:
+#   time max, time min, 128 bit DNA, flags (OR of all PODs), 3 reserved words
+#
+# Zero suppressed POD (ZeroSuppress.py, never produced by the firmware):
+# trigSize counts the 16 bit words following the header so the frame can be
+# walked as usual. They hold the original trigSize (32 bit), the number of
+# kept regions (16 bit), the fill value for the removed samples (16 bit),
+# one (start, length) pair of 32 bit words per region and the kept samples.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import struct
+import numpy as np
+
+# clock used for trigTime and footer times
+TIME_CLK_HZ     = 250000000.0
+TIME_CLK_NS     = 4.0
+# sample periods of the two digitizer paths
+SADC_PERIOD_NS  = 4.0
+FADC_PERIOD_NS  = 1.0
+
+NUM_SADC_CH     = 8
+NUM_FADC_CH     = 8
+NUM_CH          = NUM_SADC_CH + NUM_FADC_CH
+
+HEADER_BYTES    = 24
+FOOTER_BYTES    = 48
+
+# sizeFlags word fields
+SIZE_MASK       = 0x3FFFFF
+FAST_OFS_SHIFT  = 23
+FAST_OFS_MASK   = 0x3
+
+# compact flags byte (same bit order as the footer flags word)
+FLAG_LOST       = 0x01
+FLAG_EXT        = 0x02
+FLAG_INT        = 0x04
+FLAG_EMPTY      = 0x08
+FLAG_VETO       = 0x10
+FLAG_BAD_ADC    = 0x20
+FLAG_ZS         = 0x40
+
+# typeFooter bit of zero suppressed PODs and their region table
+ZS_BIT          = 0x0100
+ZS_TABLE_BYTES  = 8
+ZS_REGION_BYTES = 8
+
+# records gathered per chunk by gatherHeaders/gatherFooters (bounds the
+# byte index array to GATHER_CHUNK x record size x 8 bytes)
+GATHER_CHUNK    = 65536
+
+HEADER_DTYPE = np.dtype([
+    ('laneVc',      '<u2'),
+    ('debugInfo',   '<u2'),
+    ('channel',     '<u2'),
+    ('typeFooter',  '<u2'),
+    ('sizeFlags',   '<u4'),
+    ('trigOffset',  '<u4'),
+    ('trigTime',    '<u8'),
+])
+
+FOOTER_DTYPE = np.dtype([
+    ('timeMax',     '<u8'),
+    ('timeMin',     '<u8'),
+    ('dnaL',        '<u8'),
+    ('dnaH',        '<u8'),
+    ('flags',       '<u4'),
+    ('reserved',    '<u4', (3,)),
+])
+
+CHANNEL_LABELS = ['SADC Channel %d' %(i) for i in range(NUM_SADC_CH)] + \
+                 ['FADC Channel %d' %(i) for i in range(NUM_FADC_CH)]
+
+
+def headerVc(header):
+    """PGP virtual channel of the header(s)"""
+    return header['laneVc'] & 0xF
+
+def headerLane(header):
+    """PGP lane of the header(s)"""
+    return (header['laneVc'] >> 4) & 0xF
+
+def isSlowAdc(header):
+    """True for slow ADC PODs"""
+    return (header['typeFooter'] & 0xF000) != 0
+
+def hasFooter(header):
+    """True if the packetizer appended a footer to the frame"""
+    return (header['typeFooter'] & 0x1) != 0
+
+def isZeroSuppressed(header):
+    """True for PODs trimmed by the software zero suppression"""
+    return (header['typeFooter'] & ZS_BIT) != 0
+
+def channelIndex(header):
+    """Viewer channel index: 0-7 for slow ADC, 8-15 for fast ADC"""
+    return (header['channel'] & 0xFF) + np.where(isSlowAdc(header), 0, NUM_SADC_CH)
+
+def trigSize(header):
+    """Number of ADC samples in the POD"""
+    return header['sizeFlags'] & SIZE_MASK
+
+def fastOffset(header):
+    """Fast ADC sub-sample offset (0-3)"""
+    return (header['sizeFlags'] >> FAST_OFS_SHIFT) & FAST_OFS_MASK
+
+def headerFlags(header):
+    """Trigger flags packed as FLAG_* bits"""
+    sizeFlags = header['sizeFlags']
+    return ((sizeFlags >> 22) & FLAG_LOST) | ((sizeFlags >> 26) & 0x3E) | \
+           np.where(isZeroSuppressed(header), FLAG_ZS, 0)
+
+def podBytes(header):
+    """Size of the POD in bytes (header and samples padded to 32 bits)"""
+    size = trigSize(header)
+    return HEADER_BYTES + ((size + (size & 1)) << 1)
+
+def dna(footer):
+    """128 bit board DNA from the footer"""
+    return (int(footer['dnaH']) << 64) | int(footer['dnaL'])
+
+
+# sizeFlags word of a header at a byte offset
+_SIZE_FLAGS = struct.Struct('<I')
+# zero suppression table: original trigSize, regions, fill value
+_ZS_TABLE = struct.Struct('<IHH')
+
+def scanFrame(buf, start=0, end=None, offsets=None):
+    """
+    Walks the PODs of one frame (superpacket) held in buf[start:end].
+    Appends the byte offset of every POD header to offsets (a list or
+    array('Q')) and returns it together with the offset of the footer
+    (None if the frame has no footer).
+    """
+    if end is None:
+        end = len(buf)
+    if offsets is None:
+        offsets = []
+    footer = None
+    # the packetizer sets the footer bit in the first POD of the frame
+    if end - start >= HEADER_BYTES + FOOTER_BYTES and (buf[start+6] & 0x1):
+        footer = end - FOOTER_BYTES
+        end = footer
+    unpack = _SIZE_FLAGS.unpack_from
+    off = start
+    while off + HEADER_BYTES <= end:
+        size = unpack(buf, off+8)[0] & SIZE_MASK
+        nxt = off + HEADER_BYTES + ((size + (size & 1)) << 1)
+        if nxt > end:
+            # truncated POD
+            break
+        offsets.append(off)
+        off = nxt
+    return offsets, footer
+
+def _gather(data, offsets, dtype):
+    offsets = np.asarray(offsets, dtype=np.int64)
+    out  = np.empty(len(offsets), dtype=dtype)
+    cols = np.arange(dtype.itemsize)
+    for i in range(0, len(offsets), GATHER_CHUNK):
+        chunk = offsets[i:i+GATHER_CHUNK]
+        out[i:i+len(chunk)] = data[chunk[:, None] + cols].view(dtype).reshape(-1)
+    return out
+
+def gatherHeaders(data, offsets):
+    """Copies the headers at the byte offsets of a uint8 array into a HEADER_DTYPE array"""
+    return _gather(data, offsets, HEADER_DTYPE)
+
+def gatherFooters(data, offsets):
+    """Copies the footers at the byte offsets of a uint8 array into a FOOTER_DTYPE array"""
+    return _gather(data, offsets, FOOTER_DTYPE)
+
+def gatherSamples(data, offsets, length):
+    """
+    Copies the first length samples of the PODs at the byte offsets of a
+    uint8 array into a (len(offsets), length) uint16 array. PODs may start
+    at odd offsets (processStream files), each parity uses its own view.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64) + HEADER_BYTES
+    out  = np.empty((len(offsets), length), dtype=np.uint16)
+    cols = np.arange(length)
+    for parity in (0, 1):
+        sel = (offsets & 1) == parity
+        if not sel.any():
+            continue
+        words = data[parity:parity + ((len(data) - parity) & ~1)].view('<u2')
+        out[sel] = words[((offsets[sel] - parity) >> 1)[:, None] + cols]
+    return out
+
+def zsRegions(buf, offset):
+    """
+    Region table of the zero suppressed POD at a byte offset. Returns
+    (original trigSize, fill value, starts, lengths) with one entry per
+    kept region.
+    """
+    base = offset + HEADER_BYTES
+    size, count, fill = _ZS_TABLE.unpack_from(buf, base)
+    table = np.frombuffer(bytes(buf[base+ZS_TABLE_BYTES:base+ZS_TABLE_BYTES+count*ZS_REGION_BYTES]),
+                          dtype='<u4').reshape(-1, 2).astype(np.int64)
+    return size, fill, table[:, 0], table[:, 1]
+
+def podSamples(data, offset):
+    """
+    Waveform of the POD at a byte offset of a uint8 array: a view of the
+    samples, or for a zero suppressed POD its full length copy with the
+    removed samples set to the fill value
+    """
+    header = data[offset:offset+HEADER_BYTES].view(HEADER_DTYPE)[0]
+    if not isZeroSuppressed(header):
+        start = offset + HEADER_BYTES
+        return data[start:start+2*int(trigSize(header))].view('<u2')
+    size, fill, starts, lengths = zsRegions(data, offset)
+    out = np.full(size, fill, dtype=np.uint16)
+    pos = offset + HEADER_BYTES + ZS_TABLE_BYTES + len(starts)*ZS_REGION_BYTES
+    kept = data[pos:pos+2*int(lengths.sum())].view('<u2')
+    if len(starts):
+        # destination index of every kept sample
+        dest = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(len(kept))
+        out[dest] = kept
+    return out
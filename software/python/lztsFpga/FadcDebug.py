@@ -18,7 +18,16 @@
 # contained in the LICENSE.txt file.
 #-----------------------------------------------------------------------------
 import pyrogue as pr
+import numpy as np
 import collections
+import threading
+import time
+import os
+
+# 16 BRAMs of 1023 samples behind one header word
+FADC_DEBUG_BRAMS  = 16
+FADC_DEBUG_DEPTH  = 1023
+FADC_DEBUG_STRIDE = 0x10000
 
 class FadcDebug(pr.Device):
     def __init__( self,       
@@ -28,11 +37,59 @@ class FadcDebug(pr.Device):
             **kwargs):
         super().__init__(name=name, description=description, expand=expand, **kwargs)
         
-        for i in range(16):      
+        for i in range(FADC_DEBUG_BRAMS):      
             self.add(FadcDebugBram(  
                 name    = ('BRAM[%d]'%i),   
-                offset  = (i*0x10000), 
+                offset  = (i*FADC_DEBUG_STRIDE), 
             ))
+        
+        # last full depth capture (BRAMs x samples) and its header words
+        self.captureData    = None
+        self.captureHeaders = None
+        # functions called with every capture (e.g. the viewer)
+        self.captureListeners = []
+        # directory the captures are saved to (not saved if None)
+        self.captureDir = None
+        
+        @self.command(description="Read the full depth of all BRAMs",)
+        def Capture():
+            self.capture()
+    
+    def capture(self, threads=True):
+        """
+        Reads all BRAMs (one transaction each, in parallel) and returns the
+        samples as a (16, 1023) uint16 array
+        """
+        start = time.time()
+        data    = np.zeros((FADC_DEBUG_BRAMS, FADC_DEBUG_DEPTH), dtype=np.uint16)
+        headers = np.zeros(FADC_DEBUG_BRAMS, dtype=np.uint32)
+        errors  = []
+        def read(i):
+            try:
+                headers[i], data[i] = self.BRAM[i].readAll()
+            except Exception as e:
+                errors.append(e)
+        if threads:
+            workers = [threading.Thread(target=read, args=(i,)) for i in range(FADC_DEBUG_BRAMS)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            if errors:
+                raise errors[0]
+        else:
+            for i in range(FADC_DEBUG_BRAMS):
+                read(i)
+        self.captureData    = data
+        self.captureHeaders = headers
+        print('%s: captured %d x %d samples in %.3f s' %(self.path, data.shape[0], data.shape[1], time.time() - start))
+        
+        if self.captureDir is not None:
+            fileName = os.path.join(self.captureDir, time.strftime('fadcDebug_%Y%m%d_%H%M%S.npz'))
+            np.savez(fileName, data=data, headers=headers)
+        for listener in self.captureListeners:
+            listener(data)
+        return data
       
 class FadcDebugBram(pr.Device):
     def __init__( self,       
@@ -51,7 +108,12 @@ class FadcDebugBram(pr.Device):
             base      = pr.UInt,
             # base      = pr.Int,
             mode      = "RO",
-            number    = 8, #should be 1023 but large number will be GUI slow
+            number    = 8, #should be 1023 but large number will be GUI slow, see FadcDebug.capture
             stride    = 4,
             pollInterval = 1,
         )      
+    
+    def readAll(self):
+        """Header word and all FADC_DEBUG_DEPTH samples of the BRAM with one read"""
+        words = np.array(self._rawRead(0, FADC_DEBUG_DEPTH + 1), dtype=np.uint32)
+        return words[0], (words[1:] & 0xFFFF).astype(np.uint16)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : Dependency aware device initialization
+#-----------------------------------------------------------------------------
+# File       : InitScheduler.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Board configuration as a list of steps with explicit dependencies. A
+# step either writes the blocks of a set of devices or runs a command of
+# the board. The steps are grouped in levels (every step only depends on
+# steps of earlier levels) and the levels are run in order:
+#   - the block transactions of all device steps of the level are started
+#     back to back, for every board
+#   - the command steps of the level run in parallel (one thread per board
+#     and step)
+#   - the devices written are retired with one checkBlocks each
+#   - the longest settle time of the level is waited once
+# So the 8 buffer channels, the 4 ADC configs or the same device on many
+# boards have their transactions in flight together and only the real
+# ordering constraints (power before the ADCs, LMK before JESD) serialize.
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import threading
+import time
+
+class InitStep(object):
+    """
+    devices is a list of device names, (name, count) for device arrays;
+    command the name of a board command; after the names of the steps
+    this one depends on; settle the time to wait after the step.
+    """
+    def __init__(self, name, devices=(), command=None, after=(), settle=0.0):
+        self.name     = name
+        self.devices  = list(devices)
+        self.command  = command
+        self.after    = list(after)
+        self.settle   = settle
+
+    def resolve(self, board):
+        """Devices of the step on a board"""
+        nodes = []
+        for dev in self.devices:
+            if isinstance(dev, tuple):
+                name, count = dev
+                nodes.extend(getattr(board, name)[i] for i in range(count))
+            else:
+                nodes.append(getattr(board, dev))
+        return nodes
+
+
+class InitScheduler(object):
+    def __init__(self, steps):
+        self.steps  = list(steps)
+        self.levels = self._levels()
+        # time spent in every level of the last run
+        self.timing = []
+
+    def _levels(self):
+        byName = dict((step.name, step) for step in self.steps)
+        level  = {}
+        def depth(step, stack):
+            if step.name in level:
+                return level[step.name]
+            if step.name in stack:
+                raise ValueError('Init step dependency loop: %s' %(' -> '.join(stack + [step.name])))
+            d = 0
+            for dep in step.after:
+                if dep not in byName:
+                    raise ValueError('Init step %s depends on unknown step %s' %(step.name, dep))
+                d = max(d, depth(byName[dep], stack + [step.name]) + 1)
+            level[step.name] = d
+            return d
+        for step in self.steps:
+            depth(step, [])
+        levels = [[] for i in range(max(level.values()) + 1)] if level else []
+        for step in self.steps:
+            levels[level[step.name]].append(step)
+        return levels
+
+    def run(self, boards, force=False, recurse=True, variable=None, threads=True):
+        """Initializes the boards (Lzts devices), level by level"""
+        self.timing = []
+        for steps in self.levels:
+            start = time.time()
+            written = []
+            for board in boards:
+                if not board.enable.get():
+                    continue
+                for step in steps:
+                    for dev in step.resolve(board):
+                        dev.writeBlocks(force=force, recurse=recurse, variable=variable)
+                        written.append(dev)
+
+            commands = [getattr(board, step.command) for board in boards if board.enable.get()
+                        for step in steps if step.command is not None]
+            if threads and len(commands) > 1:
+                errors = []
+                def call(cmd):
+                    try:
+                        cmd()
+                    except Exception as e:
+                        errors.append(e)
+                workers = [threading.Thread(target=call, args=(cmd,)) for cmd in commands]
+                for w in workers:
+                    w.start()
+                for w in workers:
+                    w.join()
+                if errors:
+                    raise errors[0]
+            else:
+                for cmd in commands:
+                    cmd()
+
+            for dev in written:
+                dev.checkBlocks(recurse=True)
+            settle = max(step.settle for step in steps)
+            if settle > 0:
+                time.sleep(settle)
+            self.timing.append((', '.join(step.name for step in steps), time.time() - start))
+
+
+# Lzts configuration order, see Lzts.writeBlocks
+LZTS_INIT_STEPS = [
+    InitStep('alarms',    command='SetMonAlarms'),
+    InitStep('faults',    command='TempFaultClear', after=['alarms']),
+    # wait for power supplies to boot up
+    InitStep('base',      devices=['AxiVersion', 'SysMon', 'MicronN25Q', 'MemTester', 'PwrReg', 'Pgp2bAxi',
+                                   'TempMon', 'PwrMonAna', 'PwrMonDig'], after=['faults'], settle=0.1),
+    InitStep('slowAdc',   devices=[('SlowAdcReadout', 4), ('SlowAdcConfig', 4)], after=['base']),
+    InitStep('buffers',   devices=[('SadcBufferWriter', 8), ('FadcBufferChannel', 8), 'SadcBufferReader',
+                                   'SadcPatternTester'], after=['base']),
+    InitStep('clock',     devices=['JesdRx', 'LMK'], after=['base']),
+    # the JESD registers have to be loaded after the LMK init
+    InitStep('jesdInit',  command='JesdInit', after=['clock']),
+    InitStep('fastAdc',   devices=[('FastAdcConfig', 4)], after=['jesdInit']),
+    InitStep('jesdReset', command='JesdReset', after=['fastAdc']),
+    InitStep('sadcReset', command='SadcReset', after=['slowAdc']),
+    InitStep('sadcInit',  command='SadcInit', after=['sadcReset']),
+]
+
+LztsInit = InitScheduler(LZTS_INIT_STEPS)
+
+def initBoards(boards, force=False, recurse=True, variable=None):
+    """Configures several Lzts boards with their transactions interleaved"""
+    for board in boards:
+        board.writeLocalBlocks(force=force, variable=variable)
+    LztsInit.run(boards, force=force, recurse=recurse, variable=variable)
+    if variable is None:
+        for board in boards:
+            board.shadow.record(board)
+    return LztsInit.timing
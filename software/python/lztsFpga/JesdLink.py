@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : JESD link bring-up by status polling
+#-----------------------------------------------------------------------------
+# File       : JesdLink.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Replaces the fixed sleeps of the JESD reset sequence by polling the
+# JesdRx per lane status registers with exponential backoff (first poll
+# after POLL_FIRST, interval doubled up to POLL_MAX) until a deadline.
+#
+#   1. reset the GTs and wait for GTXReady on all enabled lanes (the reset
+#      is repeated up to gtRetries times)
+#   2. SysRef on, InvertSync pulse, clear errors
+#   3. wait for DataValid on all lanes; the lanes still down after
+#      laneTimeout are restarted alone by clearing and setting their bit
+#      of the Enable mask, until the deadline
+#
+# The result (lock time, lanes down, retries) is returned as a dict.
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import time
+
+POLL_FIRST = 0.002
+POLL_MAX   = 0.2
+
+# JesdRx per lane status bits a lane needs in each phase
+GT_READY_FIELDS = ['GTXReady']
+LANE_OK_FIELDS  = ['GTXReady', 'DataValid']
+
+def pollUntil(check, timeout, first=POLL_FIRST, maxInterval=POLL_MAX):
+    """
+    Calls check() until it returns (True, value) or timeout seconds have
+    passed, sleeping first, 2*first, ... (at most maxInterval) in between.
+    Returns (done, value, elapsed).
+    """
+    start = time.time()
+    interval = first
+    while True:
+        done, value = check()
+        elapsed = time.time() - start
+        if done or elapsed >= timeout:
+            return done, value, elapsed
+        time.sleep(min(interval, timeout - elapsed))
+        interval = min(2 * interval, maxInterval)
+
+def enabledLanes(jesd, numLanes):
+    mask = jesd.Enable.get()
+    return [i for i in range(numLanes) if (mask >> i) & 1]
+
+def lanesDown(jesd, lanes, fields):
+    """Lanes of the list missing one of the status bits (one block read per poll)"""
+    jesd.readBlocks(recurse=False)
+    jesd.checkBlocks(recurse=False)
+    return [lane for lane in lanes
+            if not all(getattr(jesd, field)[lane].get(read=False) for field in fields)]
+
+def restartLanes(jesd, lanes):
+    """Restarts only the listed lanes by toggling their Enable bits"""
+    mask = jesd.Enable.get()
+    down = 0
+    for lane in lanes:
+        down |= 1 << lane
+    jesd.Enable.set(mask & ~down)
+    jesd.Enable.set(mask)
+
+def jesdBringUp(jesd, lmk, numLanes=16, deadline=5.0, gtTimeout=1.0, gtRetries=3, laneTimeout=0.5):
+    """JESD reset sequence of one board, see the module description"""
+    start = time.time()
+    lanes = enabledLanes(jesd, numLanes)
+    result = dict(locked=False, seconds=0.0, gtResets=0, laneRestarts=0, down=lanes)
+
+    # 1. GT reset
+    for i in range(gtRetries):
+        jesd.CmdResetGTs()
+        result['gtResets'] += 1
+        done, down, elapsed = pollUntil(lambda: _check(jesd, lanes, GT_READY_FIELDS),
+                                        min(gtTimeout, deadline - (time.time() - start)))
+        if done or time.time() - start >= deadline:
+            break
+
+    # 2. SysRef and sync
+    lmk.PwrUpSysRef()
+    jesd.InvertSync.set(1)
+    jesd.InvertSync.set(0)
+    jesd.CmdClearErrors()
+
+    # 3. data valid, restart the lanes which do not come up
+    while True:
+        remaining = deadline - (time.time() - start)
+        done, down, elapsed = pollUntil(lambda: _check(jesd, lanes, LANE_OK_FIELDS),
+                                        max(min(laneTimeout, remaining), 0))
+        result['down'] = down
+        if done or time.time() - start >= deadline:
+            break
+        restartLanes(jesd, down)
+        result['laneRestarts'] += 1
+
+    if result['laneRestarts']:
+        jesd.CmdClearErrors()
+    result['locked'] = len(result['down']) == 0
+    result['seconds'] = time.time() - start
+    return result
+
+def _check(jesd, lanes, fields):
+    down = lanesDown(jesd, lanes, fields)
+    return len(down) == 0, down
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : Coalescing poll scheduler
+#-----------------------------------------------------------------------------
+# File       : PollScheduler.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Takes over the polling of the variables with a pollInterval from the
+# root poll queue, which reads every polled block with its own transaction:
+#   - the blocks of the polled variables are grouped by interval, blocks
+#     at adjacent addresses (gaps up to maxGap bytes, at most maxBytes per
+#     group) are read together with one _rawRead and copied into the block
+#     buffers, then the variables are updated
+#   - the groups of an interval are staggered over the interval so they
+#     do not all hit the link at the same time
+#   - groups with no variable listener (no GUI or client watching) are
+#     polled idleFactor times slower, until something listens again
+#   - the enables are checked every recollect seconds, the groups are
+#     rebuilt when a device was enabled or disabled (the variables of the
+#     disabled devices go back to the root poll queue)
+#   - the block buffers are written under the block lock, blocks with a
+#     pending write (stale) are skipped
+#   - with a shadow cache (ShadowCache) the polled values are passed to
+#     its readBack(), as a block read would do
+#
+# report() gives the reads, bytes and the polling bandwidth since start().
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import pyrogue as pr
+import numpy as np
+import collections
+import threading
+import heapq
+import time
+
+class PollGroup(object):
+    """Blocks of one interval read with one transaction"""
+    def __init__(self, interval, offset, size, blocks):
+        self.interval = interval
+        self.offset   = offset      # from the scheduler device
+        self.size     = size        # bytes
+        self.blocks   = blocks      # [(block, offset, variables)]
+        self.phase    = 0.0
+        self.reads    = 0
+        self.bytes    = 0
+        self.seconds  = 0.0
+        self.errors   = 0
+
+    @property
+    def variables(self):
+        return [v for block, offset, variables in self.blocks for v in variables]
+
+    def watched(self):
+        return any(getattr(v, '_listeners', None) for v in self.variables)
+
+    def name(self):
+        names = [v.path for v in self.variables]
+        return names[0] if len(names) == 1 else '%s .. %s (%d)' %(names[0], names[-1], len(names))
+
+
+class PollScheduler(object):
+    def __init__(self, device, maxGap=0, maxBytes=4096, idleFactor=10.0, recollect=1.0, shadow=None):
+        self.device     = device
+        self.shadow     = shadow
+        self.maxGap     = maxGap
+        self.maxBytes   = maxBytes
+        self.idleFactor = idleFactor
+        self.recollect  = recollect
+        # None: by the variable listeners, True/False: force all groups
+        self.watching   = None
+        self.groups     = []
+        self._intervals = {}        # variable -> pollInterval taken from the root queue
+        self._thread    = None
+        self._stop      = threading.Event()
+        self._lock      = threading.Lock()
+        self._started   = None
+        self._enabled   = None      # ids of the enabled devices at the last collect()
+
+    def _devices(self, device):
+        if not device.enable.get():
+            return
+        yield device
+        for child in device.devices.values():
+            for dev in self._devices(child):
+                yield dev
+
+    def _enabledIds(self):
+        return frozenset(id(dev) for dev in self._devices(self.device))
+
+    def collect(self):
+        """Groups the polled variables of the enabled tree"""
+        byInterval = collections.defaultdict(dict)
+        devices = list(self._devices(self.device))
+        for dev in devices:
+            for var in dev.variables.values():
+                if not isinstance(var, pr.RemoteVariable):
+                    continue
+                interval = self._intervals.get(var, var.pollInterval)
+                if not interval:
+                    continue
+                start = dev.address - self.device.address + var.offset
+                end = start + (max(o + s for o, s in zip(var.bitOffset, var.bitSize)) + 7) // 8
+                ent = byInterval[interval].setdefault(var._block, [start & ~3, (end + 3) & ~3, []])
+                ent[0] = min(ent[0], start & ~3)
+                ent[1] = max(ent[1], (end + 3) & ~3)
+                ent[2].append(var)
+
+        groups = []
+        for interval, blocks in sorted(byInterval.items()):
+            current = []
+            for block, (start, end, variables) in sorted(blocks.items(), key=lambda x: x[1][0]):
+                if current and start <= current[-1][1] + self.maxGap and end - current[0][0] <= self.maxBytes:
+                    current.append((start, end, block, variables))
+                    continue
+                if current:
+                    groups.append(self._group(interval, current))
+                current = [(start, end, block, variables)]
+            if current:
+                groups.append(self._group(interval, current))
+            # stagger the groups of the interval
+            same = [g for g in groups if g.interval == interval]
+            for i, g in enumerate(same):
+                g.phase = interval * i / float(len(same))
+        with self._lock:
+            self.groups = groups
+            self._enabled = frozenset(id(dev) for dev in devices)
+        return groups
+
+    def _group(self, interval, blocks):
+        start = blocks[0][0]
+        end = max(b[1] for b in blocks)
+        return PollGroup(interval, start, end - start, [(block, s, v) for s, e, block, v in blocks])
+
+    ########################
+    # Polling
+    ########################
+    def poll(self, group):
+        """Reads one group and updates its variables"""
+        t0 = time.time()
+        try:
+            words = self.device._rawRead(group.offset, group.size // 4)
+        except Exception:
+            group.errors += 1
+            return
+        if not isinstance(words, list):
+            words = [words]
+        buf = np.array(words, dtype='<u4').view(np.uint8).tobytes()
+        for block, offset, variables in group.blocks:
+            data = buf[offset - group.offset:]
+            with block._lock:
+                # a set() not yet written out, the next poll gets it
+                if block.stale:
+                    continue
+                n = min(len(block._bData), len(data))
+                block._bData[:n] = data[:n]
+            if self.shadow is not None:
+                self.shadow.readBack(block)
+            for var in variables:
+                var._updated()
+        with self._lock:
+            group.reads   += 1
+            group.bytes   += group.size
+            group.seconds += time.time() - t0
+
+    def period(self, group):
+        watched = self.watching if self.watching is not None else group.watched()
+        return group.interval if watched else group.interval * self.idleFactor
+
+    def start(self):
+        """Takes the polled variables from the root poll queue and starts polling"""
+        if self._thread is not None:
+            return
+        self.collect()
+        self._take()
+        self._stop.clear()
+        self._started = time.time()
+        for group in self.groups:
+            group.reads = group.bytes = group.errors = 0
+            group.seconds = 0.0
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops polling and gives the variables back to the root poll queue"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        for var, interval in self._intervals.items():
+            var.pollInterval = interval
+        self._intervals = {}
+
+    def _take(self):
+        """Takes the variables of the groups from the root poll queue, gives back the others"""
+        polled = set(v for g in self.groups for v in g.variables)
+        for var in list(self._intervals):
+            if var not in polled:
+                var.pollInterval = self._intervals.pop(var)
+        for var in polled:
+            if var not in self._intervals:
+                self._intervals[var] = var.pollInterval
+                var.pollInterval = 0
+
+    def _queue(self):
+        now = time.time()
+        queue = [(now + g.phase, i) for i, g in enumerate(self.groups)]
+        heapq.heapify(queue)
+        return queue
+
+    def _run(self):
+        queue = self._queue()
+        checked = time.time()
+        while not self._stop.is_set():
+            if time.time() - checked >= self.recollect:
+                checked = time.time()
+                if self._enabledIds() != self._enabled:
+                    self.collect()
+                    self._take()
+                    queue = self._queue()
+            if not queue:
+                self._stop.wait(self.recollect)
+                continue
+            due, i = queue[0]
+            wait = min(due, checked + self.recollect) - time.time()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+            heapq.heapreplace(queue, (max(due + self.period(self.groups[i]), time.time()), i))
+            self.poll(self.groups[i])
+
+    ########################
+    # Report
+    ########################
+    def stats(self):
+        elapsed = time.time() - self._started if self._started else 0.0
+        with self._lock:
+            reads  = sum(g.reads for g in self.groups)
+            nbytes = sum(g.bytes for g in self.groups)
+        return dict(groups=len(self.groups), variables=sum(len(g.variables) for g in self.groups),
+                    reads=reads, bytes=nbytes, seconds=elapsed,
+                    readsPerSecond=reads / elapsed if elapsed else 0.0,
+                    bytesPerSecond=nbytes / elapsed if elapsed else 0.0)
+
+    def report(self):
+        s = self.stats()
+        lines = ['Polling: %(variables)d variables in %(groups)d groups, %(readsPerSecond).1f reads/s, '
+                 '%(bytesPerSecond).0f B/s' %(s)]
+        lines.append('%8s %6s %8s %8s %9s %6s  %s' %('interval', 'bytes', 'period', 'reads', 'mean us', 'errors', 'group'))
+        with self._lock:
+            for g in self.groups:
+                mean = 1e6 * g.seconds / g.reads if g.reads else 0.0
+                lines.append('%8.2f %6d %8.2f %8d %9.1f %6d  %s' %(g.interval, g.size, self.period(g), g.reads,
+                                                                 mean, g.errors, g.name()))
+        return '\n'.join(lines)
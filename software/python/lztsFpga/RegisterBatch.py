@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : Batched register writes
+#-----------------------------------------------------------------------------
+# File       : RegisterBatch.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Context that queues register writes instead of issuing one transaction
+# (and one checkBlocks of the whole tree) per set(). The values go into the
+# block shadows with set(write=False); writes to variables of the same block
+# are coalesced into one transaction. flush() starts the transactions of
+# all queued blocks back to back, in the order the blocks were first
+# written, and then retires only those blocks.
+#
+# A second write to a variable already queued flushes the queue first, so
+# pulses (set 1 then 0) still reach the hardware in order. Local variables
+# (e.g. enable) are applied immediately.
+#
+#    with RegisterBatch() as batch:
+#        batch.set(dev.Reg0, 1)
+#        batch.set(dev.Reg1, 2)
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import pyrogue as pr
+import rogue.interfaces.memory as rim
+import collections
+
+class RegisterBatch(object):
+    def __init__(self):
+        # block -> one of its queued variables (used to retire the block)
+        self._blocks = collections.OrderedDict()
+        self._queued = set()
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.flush()
+        else:
+            self.discard()
+
+    def set(self, variable, value):
+        """Queues a write of value to variable"""
+        if not isinstance(variable, pr.RemoteVariable):
+            variable.set(value)
+            return
+        if variable in self._queued:
+            self.flush()
+        variable.set(value, write=False)
+        self._queued.add(variable)
+        if variable._block not in self._blocks:
+            self._blocks[variable._block] = variable
+
+    def setMany(self, variables, values):
+        for variable, value in zip(variables, values):
+            self.set(variable, value)
+
+    def flush(self):
+        """Issues the queued block writes back to back and waits for all of them"""
+        if not self._blocks:
+            return
+        for block in self._blocks.keys():
+            block.startTransaction(rim.Write, check=False)
+        for variable in self._blocks.values():
+            variable._parent.checkBlocks(recurse=False, variable=variable)
+        self.transactions += len(self._blocks)
+        self._blocks.clear()
+        self._queued.clear()
+
+    def discard(self):
+        """Forgets the queued writes (the block shadows keep the values)"""
+        self._blocks.clear()
+        self._queued.clear()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : Slow ADC delay calibration store
+#-----------------------------------------------------------------------------
+# File       : SadcDelayStore.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Index of the SADC_Delays_DeviceDna<dna>.csv files written by
+# lztsTrainSlowAdc.py. Every line of a file is one training: 64 delays
+# (8 ADC channels x 8 lanes), preceded by the date of the training in the
+# files written since the date column was added ('%Y-%m-%dT%H:%M:%S').
+# Lines without a date are ordered by their position in the file and
+# count as older than any dated line.
+#
+# A line is split at every date field, so a training appended to the
+# unterminated line of an interrupted one is still found; tables without
+# 64 integer delays are dropped. appendSadcDelays() writes a training as
+# one complete line.
+#
+# The tables of a board are parsed once and parsed again only when the
+# file changed.
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import os
+import time
+
+SADC_NUM_DELAYS  = 64
+SADC_DELAY_FILE  = 'SADC_Delays_DeviceDna%s.csv'
+SADC_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+def sadcDelayFile(dna, directory='.'):
+    """Calibration file name of a board DNA (int or hex string)"""
+    if isinstance(dna, str):
+        dna = int(dna, 16)
+    return os.path.join(directory, SADC_DELAY_FILE %(hex(dna)))
+
+def _parseDate(field):
+    """Time of a date field, None if the field is not a date"""
+    try:
+        return time.mktime(time.strptime(field, SADC_DATE_FORMAT))
+    except ValueError:
+        return None
+
+def parseSadcDelays(lines):
+    """[(timestamp or None, delays)] of the complete tables of a calibration file"""
+    tables = []
+    for line in lines:
+        fields = [f.strip() for f in line.split(',') if f.strip()]
+        # one table per date field, the fields before the first date undated
+        current = (None, [])
+        parts = [current]
+        for field in fields:
+            timestamp = _parseDate(field)
+            if timestamp is None:
+                current[1].append(field)
+            else:
+                current = (timestamp, [])
+                parts.append(current)
+        for timestamp, values in parts:
+            if len(values) != SADC_NUM_DELAYS:
+                # interrupted training
+                continue
+            try:
+                tables.append((timestamp, [int(v) for v in values]))
+            except ValueError:
+                continue
+    return tables
+
+def appendSadcDelays(dna, delays, directory='.', timestamp=None):
+    """Appends one training (date and delays) as a complete line to the calibration file of a board"""
+    if len(delays) != SADC_NUM_DELAYS:
+        raise ValueError('%d SADC delays, expected %d' %(len(delays), SADC_NUM_DELAYS))
+    fileName = sadcDelayFile(dna, directory)
+    line = ','.join([time.strftime(SADC_DATE_FORMAT, time.localtime(timestamp))] + ['%d' %(d) for d in delays]) + ',\n'
+    with open(fileName, 'ab+') as f:
+        # terminate the line of an interrupted training
+        end = f.seek(0, os.SEEK_END)
+        if end > 0:
+            f.seek(end - 1)
+            if f.read(1) != b'\n':
+                line = '\n' + line
+        f.write(line.encode())
+    return fileName
+
+
+class SadcDelayStore(object):
+    def __init__(self, directory='.'):
+        self.directory = directory
+        # file name -> (mtime, tables)
+        self._cache = {}
+
+    def boards(self):
+        """DNAs (int) of the boards with a calibration file"""
+        prefix, suffix = SADC_DELAY_FILE.split('%s')
+        dnas = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith(prefix) and name.endswith(suffix):
+                dnas.append(int(name[len(prefix):-len(suffix)], 16))
+        return dnas
+
+    def tables(self, dna):
+        """[(timestamp or None, delays)] of a board in training order, [] without file"""
+        fileName = sadcDelayFile(dna, self.directory)
+        try:
+            mtime = os.stat(fileName).st_mtime
+        except OSError:
+            return []
+        cached = self._cache.get(fileName)
+        if cached is None or cached[0] != mtime:
+            with open(fileName) as f:
+                cached = self._cache[fileName] = (mtime, parseSadcDelays(f))
+        return cached[1]
+
+    def delays(self, dna, before=None):
+        """
+        Latest trained delays of a board (trained at or before the time
+        before if given), None if there is no table
+        """
+        last = None
+        # undated lines first in file order, then the dated ones by date
+        tables = sorted(self.tables(dna), key=lambda t: (t[0] is not None, t[0] or 0.0))
+        for timestamp, delays in tables:
+            if before is not None and timestamp is not None and timestamp > before:
+                continue
+            last = delays
+        return last
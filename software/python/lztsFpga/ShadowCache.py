@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : Shadow register cache
+#-----------------------------------------------------------------------------
+# File       : ShadowCache.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Remembers, per block, the variable values last written to or read back
+# from the hardware. writeBlocks() of the cache starts a transaction only
+# for the blocks whose shadow values changed since (misses) and skips the
+# others (hits), so reloading a configuration with a few changes only
+# costs those few transactions.
+#
+# Every block of a recorded tree has its startTransaction wrapped, so any
+# later write (GUI set(), RegisterBatch, the commands, jesdBringUp ...)
+# updates the cache entry with the values it sends; a reload restoring
+# such a register is therefore written and not counted as a hit.
+# _checkTransaction is wrapped as well: a retired read (poll, GUI read,
+# readBlocks) resets the entry to what the hardware returned, so a power
+# cycle or a self clearing bit seen by a read is written again on reload.
+# PollScheduler fills the blocks without transactions and calls readBack().
+#
+# verify() reads every block back and compares the RW variables with the
+# cache; the cache is then reset to what the hardware returned.
+#
+# Only block writes are skipped: incremental writes do not run the board
+# bring-up commands, so changing LMK or FastAdcConfig blocks this way does
+# not re-run JesdInit/JesdReset.
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import pyrogue as pr
+import rogue.interfaces.memory as rim
+import collections
+
+class ShadowCache(object):
+    def __init__(self):
+        # block -> tuple of the values of its variables
+        self.cache   = {}
+        # device -> OrderedDict block -> variables, built once per device
+        self._layout = {}
+        # block -> variables of the watched blocks
+        self._watched = {}
+        self.resetStats()
+
+    def resetStats(self):
+        self.hits       = 0
+        self.misses     = 0
+        self.verified   = 0
+        self.mismatches = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return dict(hits=self.hits, misses=self.misses, hitRate=self.hits / float(total) if total else 0.0,
+                    blocks=len(self.cache), verified=self.verified, mismatches=self.mismatches)
+
+    def clear(self):
+        self.cache = {}
+
+    def primed(self):
+        return len(self.cache) > 0
+
+    def _devices(self, device):
+        """Enabled devices of the tree below (and including) device"""
+        if not device.enable.get():
+            return
+        yield device
+        for child in device.devices.values():
+            for dev in self._devices(child):
+                yield dev
+
+    def _blocks(self, device):
+        layout = self._layout.get(device)
+        if layout is None:
+            layout = collections.OrderedDict()
+            for var in device.variables.values():
+                if isinstance(var, pr.RemoteVariable) and var._block.bulkEn:
+                    layout.setdefault(var._block, []).append(var)
+            for block, variables in layout.items():
+                self._watch(block, variables)
+            self._layout[device] = layout
+        return layout
+
+    def _watch(self, block, variables):
+        """Keeps the cache entry of the block equal to the values of every write and read"""
+        start = block.startTransaction
+        check = block._checkTransaction
+        reading = []
+        def startTransaction(type, *args, **kwargs):
+            if type in (rim.Write, rim.Post):
+                self.cache[block] = self._snapshot(variables)
+            elif type == rim.Read:
+                reading[:] = [True]
+            return start(type, *args, **kwargs)
+        def checkTransaction(*args, **kwargs):
+            ret = check(*args, **kwargs)
+            if reading:
+                del reading[:]
+                self.readBack(block)
+            return ret
+        block.startTransaction = startTransaction
+        block._checkTransaction = checkTransaction
+        self._watched[block] = variables
+
+    def readBack(self, block):
+        """Takes the values read from the hardware as the cache entry of a watched block"""
+        variables = self._watched.get(block)
+        if variables is None or block not in self.cache:
+            return
+        cached = self.cache[block]
+        snap = list(self._snapshot(variables))
+        for i, var in enumerate(v for v in variables if v.mode in ('RW', 'WO')):
+            if var.mode != 'RW':
+                # write only registers do not read back, keep the last write
+                snap[i] = cached[i]
+        self.cache[block] = tuple(snap)
+
+    def _snapshot(self, variables, modes=('RW', 'WO')):
+        return tuple(v.get(read=False) for v in variables if v.mode in modes)
+
+    def record(self, device):
+        """Takes the current shadow values of the tree as the hardware state"""
+        for dev in self._devices(device):
+            for block, variables in self._blocks(dev).items():
+                self.cache[block] = self._snapshot(variables)
+
+    def writeBlocks(self, device, force=False):
+        """Writes the blocks of the tree whose values differ from the cache, returns the number written"""
+        written = []
+        total = 0
+        for dev in self._devices(device):
+            count = 0
+            for block, variables in self._blocks(dev).items():
+                snap = self._snapshot(variables)
+                if not force and self.cache.get(block) == snap:
+                    self.hits += 1
+                    continue
+                self.misses += 1
+                # the wrapped startTransaction updates the cache
+                block.startTransaction(rim.Write, check=False)
+                count += 1
+            if count:
+                written.append(dev)
+                total += count
+        # retire only the devices that got transactions
+        for dev in written:
+            dev.checkBlocks(recurse=False)
+        return total
+
+    def verify(self, device):
+        """
+        Reads the tree back and returns the (path, cached, read) of the RW
+        variables that differ from the cache
+        """
+        devices = list(self._devices(device))
+        # the reads refresh the cache, compare with the entries from before
+        before = dict(self.cache)
+        for dev in devices:
+            dev.readBlocks(recurse=False)
+        for dev in devices:
+            dev.checkBlocks(recurse=False)
+        diffs = []
+        for dev in devices:
+            for block, variables in self._blocks(dev).items():
+                self.verified += 1
+                cached = before.get(block)
+                writable = [v for v in variables if v.mode in ('RW', 'WO')]
+                snap = list(self._snapshot(variables))
+                if cached is not None:
+                    mismatch = False
+                    for i, var in enumerate(writable):
+                        if var.mode != 'RW':
+                            # write only registers do not read back, keep the last write
+                            snap[i] = cached[i]
+                        elif cached[i] != snap[i]:
+                            diffs.append((var.path, cached[i], snap[i]))
+                            mismatch = True
+                    self.mismatches += mismatch
+                self.cache[block] = tuple(snap)
+        return diffs
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : Bulk register snapshot
+#-----------------------------------------------------------------------------
+# File       : Snapshot.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Full readback of a device tree with few large reads instead of one
+# transaction per variable:
+#   - the byte ranges of the readable variables of every enabled device
+#     are merged into contiguous 32 bit aligned ranges (gaps up to maxGap
+#     bytes are read through, never across devices)
+#   - every range is read with _rawRead in chunks of at most maxBytes
+#   - the variables are decoded from the buffers with numpy (one gather
+#     for all single field variables up to 57 bits, a loop for the rest)
+#
+# The raw values are kept per variable path. Snapshots are saved as .npz
+# (compact) or .yaml (readable) and compared with diffSnapshots().
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import pyrogue as pr
+import numpy as np
+import collections
+import time
+import yaml
+
+class RegisterSnapshot(object):
+    """values: OrderedDict variable path -> raw register value (int)"""
+    def __init__(self, values=None, timestamp=None, info=None):
+        self.values    = collections.OrderedDict() if values is None else values
+        self.timestamp = time.time() if timestamp is None else timestamp
+        # reads, bytes and seconds of the capture
+        self.info      = {} if info is None else info
+
+    def save(self, path):
+        if path.endswith('.yaml'):
+            with open(path, 'w') as f:
+                yaml.dump(dict(timestamp=self.timestamp, info=self.info,
+                               values=dict((k, '0x%x' %(v)) for k, v in self.values.items())),
+                          f, default_flow_style=False)
+        else:
+            # values wider than 64 bits go in as hex strings
+            wide = dict((k, v) for k, v in self.values.items() if v >= 1 << 64)
+            np.savez_compressed(path,
+                paths     = np.array(list(self.values.keys())),
+                values    = np.array([0 if v >= 1 << 64 else v for v in self.values.values()], dtype=np.uint64),
+                widePaths = np.array(list(wide.keys()), dtype=str),
+                wideHex   = np.array(['%x' %(v) for v in wide.values()], dtype=str),
+                timestamp = self.timestamp,
+                info      = np.array(yaml.dump(self.info)))
+
+    @staticmethod
+    def load(path):
+        if path.endswith('.yaml'):
+            with open(path) as f:
+                d = yaml.safe_load(f)
+            values = collections.OrderedDict((k, int(v, 16)) for k, v in sorted(d['values'].items()))
+            return RegisterSnapshot(values, d['timestamp'], d['info'])
+        d = np.load(path)
+        values = collections.OrderedDict(zip(d['paths'].tolist(), (int(v) for v in d['values'])))
+        for k, v in zip(d['widePaths'].tolist(), d['wideHex'].tolist()):
+            values[k] = int(v, 16)
+        return RegisterSnapshot(values, float(d['timestamp']), yaml.safe_load(str(d['info'])))
+
+
+def diffSnapshots(a, b):
+    """(path, value in a, value in b) of the variables that differ, None where missing"""
+    diffs = []
+    for path in list(a.values.keys()) + [p for p in b.values.keys() if p not in a.values]:
+        va = a.values.get(path)
+        vb = b.values.get(path)
+        if va != vb:
+            diffs.append((path, va, vb))
+    return diffs
+
+
+def _devices(device):
+    if not device.enable.get():
+        return
+    yield device
+    for child in device.devices.values():
+        for dev in _devices(child):
+            yield dev
+
+def snapshotPlan(board, maxGap=0):
+    """
+    (ranges, variables): ranges are (offset from board, bytes) to read,
+    variables (variable, offset from board) of the readable variables
+    """
+    ranges = []
+    variables = []
+    for dev in _devices(board):
+        spans = []
+        for var in dev.variables.values():
+            if not isinstance(var, pr.RemoteVariable) or var.mode == 'WO':
+                continue
+            start = dev.address - board.address + var.offset
+            end = start + (max(o + s for o, s in zip(var.bitOffset, var.bitSize)) + 7) // 8
+            spans.append((start & ~3, (end + 3) & ~3))
+            variables.append((var, start))
+        spans.sort()
+        for start, end in spans:
+            if ranges and ranges[-1][2] is dev and start <= ranges[-1][1] + maxGap:
+                ranges[-1][1] = max(ranges[-1][1], end)
+            else:
+                ranges.append([start, end, dev])
+    return sorted((start, end - start) for start, end, dev in ranges), variables
+
+def _decode(buf, base, variables):
+    """Raw values of (variable, offset) pairs from a byte buffer starting at base"""
+    values = [None] * len(variables)
+    fast = [i for i, (var, ofs) in enumerate(variables)
+            if len(var.bitSize) == 1 and var.bitOffset[0] % 8 + var.bitSize[0] <= 57]
+    if fast:
+        pos   = np.array([variables[i][1] - base + variables[i][0].bitOffset[0] // 8 for i in fast])
+        shift = np.array([variables[i][0].bitOffset[0] % 8 for i in fast], dtype=np.uint64)
+        size  = np.array([variables[i][0].bitSize[0] for i in fast], dtype=np.uint64)
+        padded = np.concatenate([buf, np.zeros(8, dtype=np.uint8)])
+        raw = padded[pos[:, None] + np.arange(8)].astype(np.uint64)
+        words = np.bitwise_or.reduce(raw << (np.arange(8, dtype=np.uint64) * np.uint64(8)), axis=1)
+        fields = (words >> shift) & ((np.uint64(1) << size) - np.uint64(1))
+        for i, v in zip(fast, fields.tolist()):
+            values[i] = v
+    data = None
+    for i, (var, ofs) in enumerate(variables):
+        if values[i] is not None:
+            continue
+        if data is None:
+            data = int.from_bytes(buf.tobytes(), 'little')
+        # fields are concatenated LSB first, as pyrogue packs them
+        value = 0
+        pos = 0
+        for o, s in zip(var.bitOffset, var.bitSize):
+            value |= ((data >> ((ofs - base) * 8 + o)) & ((1 << s) - 1)) << pos
+            pos += s
+        values[i] = value
+    return values
+
+def takeSnapshot(board, maxGap=0, maxBytes=4096):
+    """Reads the enabled tree below board with bulk reads and returns a RegisterSnapshot"""
+    start = time.time()
+    ranges, variables = snapshotPlan(board, maxGap)
+    reads = 0
+    buffers = []
+    for offset, size in ranges:
+        words = []
+        for chunk in range(0, size, maxBytes):
+            n = min(maxBytes, size - chunk) // 4
+            data = board._rawRead(offset + chunk, n)
+            words.extend(data if isinstance(data, list) else [data])
+            reads += 1
+        buffers.append((offset, np.array(words, dtype='<u4').view(np.uint8)))
+
+    # variables of every range, decoded range by range
+    order = sorted(range(len(variables)), key=lambda i: variables[i][1])
+    values = [None] * len(variables)
+    r = 0
+    group = []
+    def flush(group, r):
+        offset, buf = buffers[r]
+        for i, v in zip(group, _decode(buf, offset, [variables[i] for i in group])):
+            values[i] = v
+    for i in order:
+        ofs = variables[i][1]
+        while not (buffers[r][0] <= ofs < buffers[r][0] + len(buffers[r][1])):
+            if group:
+                flush(group, r)
+                group = []
+            r += 1
+        group.append(i)
+    if group:
+        flush(group, r)
+
+    snap = RegisterSnapshot(collections.OrderedDict((var.path, v) for (var, ofs), v in zip(variables, values)))
+    snap.info = dict(board=board.path, reads=reads, bytes=sum(size for ofs, size in ranges),
+                     variables=len(variables), seconds=time.time() - start)
+    return snap
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : SRP transaction profiler
+#-----------------------------------------------------------------------------
+# File       : SrpProfiler.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Counts and times the register transactions of a device tree. attach()
+# wraps startTransaction/_checkTransaction of every block and _rawRead/
+# _rawWrite of every device; a block transaction is timed from its start
+# to its retirement by checkBlocks (so it includes the time it waited in
+# the queue behind the others started with it).
+#
+# Every transaction is attributed to its call path: the names of the
+# calling functions that are commands of the tree or in labels (e.g.
+# writeBlocks;SadcInit), innermost last, plus the open section() contexts.
+# report() lists the costs per path, device and variable with log2 latency
+# histograms; folded() returns the paths in the collapsed stack format of
+# flame graph tools ("a;b;c <microseconds>").
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import pyrogue as pr
+import rogue.interfaces.memory as rim
+import numpy as np
+import collections
+import contextlib
+import threading
+import time
+import sys
+
+# latency histogram bins: [0, 1us), [1us, 2us), ... [2^(n-2) us, inf)
+SRP_HIST_BINS = 24
+
+# functions used as call path labels in addition to the commands
+SRP_LABELS = ['writeBlocks', 'readBlocks', 'flush', 'jesdBringUp', 'takeSnapshot']
+
+_KINDS = {rim.Read: 'read', rim.Write: 'write', rim.Post: 'post', rim.Verify: 'verify'}
+
+class _Stats(object):
+    __slots__ = ('count', 'seconds', 'maxSeconds', 'hist')
+    def __init__(self):
+        self.count      = 0
+        self.seconds    = 0.0
+        self.maxSeconds = 0.0
+        self.hist       = np.zeros(SRP_HIST_BINS, dtype=np.int64)
+
+    def add(self, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.maxSeconds = max(self.maxSeconds, seconds)
+        us = int(seconds * 1e6)
+        self.hist[min(us.bit_length(), SRP_HIST_BINS - 1)] += 1
+
+
+class SrpProfiler(object):
+    def __init__(self, labels=SRP_LABELS):
+        self.labels    = set(labels)
+        self._lock     = threading.Lock()
+        self._local    = threading.local()
+        self._pending  = {}     # block -> (start, type, path)
+        self._patched  = []     # (object, attribute) wrapped by attach
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (path, device, type) -> stats, variable -> stats, type -> stats
+            self.byPath     = collections.defaultdict(_Stats)
+            self.byVariable = collections.defaultdict(_Stats)
+            self.byType     = collections.defaultdict(_Stats)
+
+    ########################
+    # Attribution
+    ########################
+    @contextlib.contextmanager
+    def section(self, name):
+        """Attributes the transactions of the block to name"""
+        stack = self._local.__dict__.setdefault('sections', [])
+        stack.append(name)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def _path(self):
+        names = []
+        frame = sys._getframe(2)
+        while frame is not None:
+            if frame.f_code.co_name in self.labels:
+                names.append(frame.f_code.co_name)
+            frame = frame.f_back
+        names.reverse()
+        return tuple(getattr(self._local, 'sections', [])) + tuple(names)
+
+    ########################
+    # Instrumentation
+    ########################
+    def attach(self, device):
+        """Instruments the blocks and devices of the tree below device"""
+        patched = set(id(obj) for obj, name, previous in self._patched)
+        for dev in self._devices(device):
+            if id(dev) in patched:
+                continue
+            self.labels.update(getattr(dev, 'commands', {}).keys())
+            for name in ('_rawRead', '_rawWrite'):
+                self._wrapRaw(dev, name)
+            for block in dev._blocks:
+                self._wrapBlock(block, dev)
+
+    def detach(self):
+        # put back what was there, other wrappers (e.g. ShadowCache) stay
+        for obj, name, previous in reversed(self._patched):
+            if previous is None:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, previous)
+        self._patched = []
+
+    def _patch(self, obj, name, func):
+        self._patched.append((obj, name, obj.__dict__.get(name)))
+        setattr(obj, name, func)
+
+    def _devices(self, device):
+        yield device
+        for child in device.devices.values():
+            for dev in self._devices(child):
+                yield dev
+
+    def _wrapBlock(self, block, dev):
+        start = block.startTransaction
+        check = block._checkTransaction
+        names = [v.path for v in dev.variables.values()
+                 if isinstance(v, pr.RemoteVariable) and v._block is block]
+        def startTransaction(type, *args, **kwargs):
+            path = self._path()
+            with self._lock:
+                self._pending[block] = (time.time(), type, path)
+            return start(type, *args, **kwargs)
+        def checkTransaction(*args, **kwargs):
+            ret = check(*args, **kwargs)
+            with self._lock:
+                pending = self._pending.pop(block, None)
+            if pending is not None:
+                t0, type, path = pending
+                self._add(time.time() - t0, path, dev.path, type, names)
+            return ret
+        self._patch(block, 'startTransaction', startTransaction)
+        self._patch(block, '_checkTransaction', checkTransaction)
+
+    def _wrapRaw(self, dev, name):
+        func = getattr(dev, name)
+        type = rim.Read if name == '_rawRead' else rim.Write
+        def raw(*args, **kwargs):
+            path = self._path()
+            t0 = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._add(time.time() - t0, path, dev.path, type, ['%s.%s' %(dev.path, name)])
+        self._patch(dev, name, raw)
+
+    def _add(self, seconds, path, device, type, variables):
+        kind = _KINDS.get(type, str(type))
+        with self._lock:
+            self.byPath[(path, device, kind)].add(seconds)
+            self.byType[kind].add(seconds)
+            for var in variables:
+                self.byVariable[var].add(seconds)
+
+    ########################
+    # Reports
+    ########################
+    def folded(self):
+        """Collapsed stacks "label;...;device <microseconds>" for flame graph tools"""
+        lines = []
+        with self._lock:
+            for (path, device, kind), s in sorted(self.byPath.items()):
+                stack = ';'.join(path + ('%s(%s)' %(device, kind),))
+                lines.append('%s %d' %(stack, int(s.seconds * 1e6)))
+        return lines
+
+    def histogram(self, kind=None):
+        """(bin lower edges in us, counts) of all transactions or of 'read'/'write' ones"""
+        with self._lock:
+            hist = sum((s.hist for k, s in self.byType.items() if kind in (None, k)),
+                       np.zeros(SRP_HIST_BINS, dtype=np.int64))
+        edges = np.concatenate([[0], 2 ** np.arange(SRP_HIST_BINS - 1)])
+        return edges, hist
+
+    def report(self, top=20):
+        def row(name, s):
+            return '%8d %10.3f %9.1f %9.1f  %s' %(s.count, 1e3 * s.seconds, 1e6 * s.seconds / s.count,
+                                                  1e6 * s.maxSeconds, name)
+        header = '%8s %10s %9s %9s' %('count', 'total ms', 'mean us', 'max us')
+        with self._lock:
+            lines = ['SRP transactions', header]
+            lines += [row(k, s) for k, s in sorted(self.byType.items())]
+
+            # per call path, with the devices below
+            paths = collections.defaultdict(_Stats)
+            for (path, device, kind), s in self.byPath.items():
+                p = paths[path]
+                p.count += s.count
+                p.seconds += s.seconds
+                p.maxSeconds = max(p.maxSeconds, s.maxSeconds)
+            lines += ['', 'By call path', header]
+            for path, s in sorted(paths.items(), key=lambda x: -x[1].seconds)[:top]:
+                lines.append(row(';'.join(path) or '-', s))
+                devices = [(k[1] + ' ' + k[2], v) for k, v in self.byPath.items() if k[0] == path]
+                for name, d in sorted(devices, key=lambda x: -x[1].seconds)[:5]:
+                    lines.append(row('    ' + name, d))
+
+            lines += ['', 'By variable', header]
+            for name, s in sorted(self.byVariable.items(), key=lambda x: -x[1].seconds)[:top]:
+                lines.append(row(name, s))
+
+        edges, hist = self.histogram()
+        lines += ['', 'Latency histogram']
+        for edge, count in zip(edges, hist):
+            if count:
+                lines.append('%9d us %8d' %(edge, count))
+        return '\n'.join(lines)
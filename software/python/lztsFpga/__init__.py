@@ -1,21 +1,120 @@
 #-----------------------------------------------------------------------------
-# This file is part of the rogue software platform. It is subject to 
-# the license terms in the LICENSE.txt file found in the top-level directory 
-# of this distribution and at: 
-#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html. 
-# No part of the rogue software platform, including this file, may be 
-# copied, modified, propagated, or distributed except according to the terms 
+# This file is part of the rogue software platform. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the rogue software platform, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
 # contained in the LICENSE.txt file.
 #-----------------------------------------------------------------------------
-from lztsFpga._lztsFpga import *
-from lztsFpga.LztsPowerRegisters import *
-from lztsFpga.MicroblazeLog import *
-from lztsFpga.LztsMonitoring import *
-from lztsFpga.LztsSynchronizer import *
-from lztsFpga.LztsPacketizer import *
-from lztsFpga.SadcBufferReader import *
-from lztsFpga.SadcBufferWriter import *
-from lztsFpga.SadcPatternTester import *
-from lztsFpga.FadcBufferChannel import *
-from lztsFpga.FadcDebug import *
-from lztsFpga.TempDebug import *
+# The modules are imported on first use of one of their names (PEP 562),
+# so "import lztsFpga as fpga" costs nothing until fpga.Lzts is touched.
+# importTimes holds the seconds spent importing every module.
+#
+# Module __getattr__ needs Python 3.7; on older versions (the rogue v2.2
+# environment runs 3.6) every module is imported at import time, as before.
+# "from lztsFpga import *" only exports the names already loaded, call
+# loadAll() first to export every class, the surf ones included.
+import collections
+import importlib
+import sys
+import time
+
+_MODULES = [
+    'lztsFpga._lztsFpga',
+    'lztsFpga.LztsPowerRegisters',
+    'lztsFpga.MicroblazeLog',
+    'lztsFpga.LztsMonitoring',
+    'lztsFpga.LztsSynchronizer',
+    'lztsFpga.LztsPacketizer',
+    'lztsFpga.SadcBufferReader',
+    'lztsFpga.SadcBufferWriter',
+    'lztsFpga.SadcPatternTester',
+    'lztsFpga.FadcBufferChannel',
+    'lztsFpga.FadcDebug',
+    'lztsFpga.TempDebug',
+    'lztsFpga.RegisterBatch',
+    'lztsFpga.InitScheduler',
+    'lztsFpga.JesdLink',
+    'lztsFpga.ShadowCache',
+    'lztsFpga.Snapshot',
+    'lztsFpga.SadcDelayStore',
+    'lztsFpga.SrpProfiler',
+    'lztsFpga.PollScheduler',
+]
+
+# names used by the scripts, found without searching the modules
+_NAMES = {
+    'Lzts':             'lztsFpga._lztsFpga',
+    'RegisterBatch':    'lztsFpga.RegisterBatch',
+    'initBoards':       'lztsFpga.InitScheduler',
+    'ShadowCache':      'lztsFpga.ShadowCache',
+    'jesdBringUp':      'lztsFpga.JesdLink',
+    'takeSnapshot':     'lztsFpga.Snapshot',
+    'RegisterSnapshot': 'lztsFpga.Snapshot',
+    'diffSnapshots':    'lztsFpga.Snapshot',
+    'SadcDelayStore':   'lztsFpga.SadcDelayStore',
+    'sadcDelayFile':    'lztsFpga.SadcDelayStore',
+    'appendSadcDelays': 'lztsFpga.SadcDelayStore',
+    'SADC_DATE_FORMAT': 'lztsFpga.SadcDelayStore',
+    'SrpProfiler':      'lztsFpga.SrpProfiler',
+    'PollScheduler':    'lztsFpga.PollScheduler',
+}
+
+importTimes = collections.OrderedDict()
+
+def _load(module):
+    start = time.time()
+    mod = importlib.import_module(module)
+    if module not in importTimes:
+        importTimes[module] = time.time() - start
+    # importing lztsFpga.X binds the module to X in the package, put back the
+    # class X as the star imports did
+    for name in _MODULES:
+        sub = sys.modules.get(name)
+        short = name.split('.')[-1]
+        if sub is not None and globals().get(short) is sub and hasattr(sub, short):
+            globals()[short] = getattr(sub, short)
+    return mod
+
+def _public(mod):
+    names = getattr(mod, '__all__', None)
+    if names is None:
+        names = [n for n in vars(mod) if not n.startswith('_')]
+    return names
+
+def __getattr__(name):
+    if name.startswith('__'):
+        raise AttributeError(name)
+    modules = [_NAMES[name]] if name in _NAMES else _MODULES
+    for module in modules:
+        mod = _load(module)
+        if hasattr(mod, name):
+            value = getattr(mod, name)
+            globals()[name] = value
+            return value
+    raise AttributeError("module 'lztsFpga' has no attribute '%s'" %(name))
+
+def __dir__():
+    names = set(globals())
+    for module in _MODULES:
+        names.update(_public(_load(module)))
+    return sorted(names)
+
+def loadAll():
+    """Imports every module and the surf device classes, as the former eager star imports did"""
+    fpga = _load('lztsFpga._lztsFpga')
+    for className in fpga.SURF_CLASSES:
+        fpga.deviceClass(className)
+    for module in _MODULES:
+        mod = _load(module)
+        for name in _public(mod):
+            globals().setdefault(name, getattr(mod, name))
+
+def importReport():
+    """Import time of the modules loaded so far, slowest first"""
+    lines = ['%8.1f ms  %s' %(1e3 * t, m) for m, t in sorted(importTimes.items(), key=lambda x: -x[1])]
+    return '\n'.join(['lztsFpga imports:'] + lines)
+
+if sys.version_info < (3, 7):
+    loadAll()
@@ -20,6 +20,7 @@
 import pyrogue as pr
 import rogue.interfaces.memory as rim
 import collections
+import importlib
 import time
 
 from lztsFpga.LztsPowerRegisters        import *
@@ -32,19 +33,76 @@ from lztsFpga.SadcPatternTester         import *
 from lztsFpga.FadcBufferChannel         import *
 from lztsFpga.FadcDebug                 import *
 from lztsFpga.TempDebug                 import *
+from lztsFpga.RegisterBatch             import *
+from lztsFpga.InitScheduler             import *
+from lztsFpga.JesdLink                  import *
+from lztsFpga.ShadowCache               import *
+from lztsFpga.Snapshot                  import *
+from lztsFpga.SadcDelayStore            import *
 
-from surf.axi._AxiMemTester             import *
-from surf.axi._AxiVersion               import *
-from surf.devices.micron._AxiMicronN25Q import *
-from surf.devices.ti._Ads42Lbx9         import *
-from surf.devices.ti._ads54J60          import *
-from surf.devices.ti._Lmk04828          import *
-from surf.devices.linear._Ltc2945       import *
-from surf.devices.nxp._Sa56004x         import *
-from surf.protocols.jesd204b            import *
-from surf.protocols.pgp._pgp2baxi       import *
-from surf.protocols.ssi._SsiPrbsTx      import *
-from surf.xilinx._AxiSysMonUltraScale   import *
+# surf device classes, imported when the first device of the class is built
+SURF_CLASSES = {
+    'AxiMemTester':        'surf.axi._AxiMemTester',
+    'AxiVersion':          'surf.axi._AxiVersion',
+    'AxiMicronN25Q':       'surf.devices.micron._AxiMicronN25Q',
+    'Ads42Lbx9Readout':    'surf.devices.ti._Ads42Lbx9',
+    'Ads42Lbx9Config':     'surf.devices.ti._Ads42Lbx9',
+    'Ads54J60':            'surf.devices.ti._ads54J60',
+    'Lmk04828':            'surf.devices.ti._Lmk04828',
+    'Ltc2945':             'surf.devices.linear._Ltc2945',
+    'Sa56004x':            'surf.devices.nxp._Sa56004x',
+    'JesdRx':              'surf.protocols.jesd204b',
+    'Pgp2bAxi':            'surf.protocols.pgp._pgp2baxi',
+    'SsiPrbsTx':           'surf.protocols.ssi._SsiPrbsTx',
+    'AxiSysMonUltraScale': 'surf.xilinx._AxiSysMonUltraScale',
+}
+
+# seconds spent importing every surf module
+surfImportTimes = collections.OrderedDict()
+
+def deviceClass(className):
+    """Device class by name, the surf module is imported on first use"""
+    cls = globals().get(className)
+    if cls is None:
+        module = SURF_CLASSES[className]
+        start = time.time()
+        cls = getattr(importlib.import_module(module), className)
+        surfImportTimes.setdefault(module, time.time() - start)
+        globals()[className] = cls
+    return cls
+
+# Lzts devices: (name, class, offset, arguments[, count, stride]); arrays
+# are built as name[0] ... name[count-1]
+LZTS_DEVICES = [
+    ('AxiVersion',        'AxiVersion',          0x00000000, dict(expand=False, hidden=False)),
+    ('SysMon',            'AxiSysMonUltraScale', 0x00100000, dict(expand=False, hidden=False)),
+    ('MicronN25Q',        'AxiMicronN25Q',       0x00200000, dict(expand=False, hidden=True, addrMode=True)),
+    ('MemTester',         'AxiMemTester',        0x00300000, dict(expand=False, hidden=True)),
+    ('LztsSync',          'LztsSynchronizer',    0x00500000, dict(expand=False, hidden=False)),
+    ('Temp0',             'LztsTemperature',     0x00600000, dict(expand=False, hidden=False)),
+    ('Temp1',             'LztsTemperature',     0x00600400, dict(expand=False, hidden=False)),
+    ('Temp2',             'LztsTemperature',     0x00600800, dict(expand=False, hidden=False)),
+    ('Temp3',             'LztsTemperature',     0x00600C00, dict(expand=False, hidden=False)),
+    ('TempMon',           'Sa56004x',            0x00800000, dict(expand=False, hidden=False)),
+    ('TempLocMem',        'TempDebug',           0x00900000, dict(expand=False, hidden=True)),
+    ('TempRemMem',        'TempDebug',           0x00900100, dict(expand=False, hidden=True)),
+    ('PwrMonDig',         'Ltc2945',             0x00800400, dict(expand=False, hidden=False)),
+    ('PwrMonAna',         'Ltc2945',             0x00800800, dict(expand=False, hidden=False)),
+    ('PwrReg',            'LztsPowerRegisters',  0x01000000, dict(expand=False, hidden=False)),
+    ('Packet',            'LztsPacketizer',      0x07000000, dict(expand=False, hidden=False, enabled=False)),
+    ('Pgp2bAxi',          'Pgp2bAxi',            0x02000000, dict(expand=False, hidden=False, enabled=False)),
+    ('SsiPrbsTx',         'SsiPrbsTx',           0x00700000, dict(expand=False, hidden=False, enabled=False)),
+    ('SlowAdcReadout',    'Ads42Lbx9Readout',    0x03000000, dict(expand=False, hidden=False, enabled=False), 4, 0x100000),
+    ('SlowAdcConfig',     'Ads42Lbx9Config',     0x03400000, dict(expand=False, hidden=False, enabled=False), 4, 0x200),
+    ('SadcBufferWriter',  'SadcBufferWriter',    0x04000000, dict(expand=False, hidden=False, enabled=False), 8, 0x100000),
+    ('SadcBufferReader',  'SadcBufferReader',    0x04800000, dict(expand=False, hidden=False, enabled=False)),
+    ('SadcPatternTester', 'SadcPatternTester',   0x04900000, dict(expand=False, hidden=True,  enabled=False)),
+    ('JesdRx',            'JesdRx',              0x05000000, dict(expand=False, hidden=False, enabled=True, numRxLanes=16)),
+    ('LMK',               'Lmk04828',            0x05100000, dict(expand=False, hidden=False)),
+    ('FadcDebug',         'FadcDebug',           0x05700000, dict(expand=False, hidden=False, enabled=False)),
+    ('FastAdcConfig',     'Ads54J60',            0x05200000, dict(expand=False, hidden=False), 4, 0x100000),
+    ('FadcBufferChannel', 'FadcBufferChannel',   0x06000000, dict(expand=False, hidden=False, enabled=False), 8, 0x100000),
+]
 
 ################################################################################################
 ##
@@ -52,197 +110,145 @@ from surf.xilinx._AxiSysMonUltraScale   import *
 ##
 ################################################################################################
 class Lzts(pr.Device):
-    def __init__(self, **kwargs):
+    """
+    devices is a list of LZTS_DEVICES names to build only those subtrees
+    (e.g. ['PwrReg', 'TempLocMem'] for a diagnostic script); None builds
+    the full board. A partial board skips the bring-up sequence in
+    writeBlocks. sadcDelayDir is the directory of the slow ADC delay
+    tables (SadcDelayStore).
+    """
+    def __init__(self, devices=None, sadcDelayDir='.', **kwargs):
         if 'description' not in kwargs:
             kwargs['description'] = "Lzts FPGA"
         super(self.__class__, self).__init__(**kwargs)
+        
+        names = [entry[0] for entry in LZTS_DEVICES]
+        self.subset = None if devices is None else list(devices)
+        for name in (self.subset or []):
+            if name not in names:
+                raise ValueError('Unknown Lzts device %s' %(name))
       
         #########
         # Devices
         #########
-        self.add(AxiVersion(         name='AxiVersion', offset=0x00000000, expand=False, hidden=False,))
-        self.add(AxiSysMonUltraScale(name='SysMon',     offset=0x00100000, expand=False, hidden=False,))
-        self.add(AxiMicronN25Q(      name='MicronN25Q', offset=0x00200000, expand=False, hidden=True, addrMode=True, ))
-        self.add(AxiMemTester(       name='MemTester',  offset=0x00300000, expand=False, hidden=True,))
-        self.add(LztsSynchronizer(   name='LztsSync',   offset=0x00500000, expand=False, hidden=False,))
-        self.add(LztsTemperature(    name='Temp0',      offset=0x00600000, expand=False, hidden=False,))
-        self.add(LztsTemperature(    name='Temp1',      offset=0x00600400, expand=False, hidden=False,))
-        self.add(LztsTemperature(    name='Temp2',      offset=0x00600800, expand=False, hidden=False,))
-        self.add(LztsTemperature(    name='Temp3',      offset=0x00600C00, expand=False, hidden=False,))
-        self.add(Sa56004x(           name='TempMon',    offset=0x00800000, expand=False, hidden=False,))
-        self.add(TempDebug(          name='TempLocMem', offset=0x00900000, expand=False, hidden=True,))
-        self.add(TempDebug(          name='TempRemMem', offset=0x00900100, expand=False, hidden=True,))
-        self.add(Ltc2945(            name='PwrMonDig',  offset=0x00800400, expand=False, hidden=False,))
-        self.add(Ltc2945(            name='PwrMonAna',  offset=0x00800800, expand=False, hidden=False,))
-        self.add(LztsPowerRegisters( name='PwrReg',     offset=0x01000000, expand=False, hidden=False,))
-        self.add(LztsPacketizer(     name='Packet',     offset=0x07000000, expand=False, hidden=False,enabled=False,))
-        self.add(Pgp2bAxi(           name='Pgp2bAxi',   offset=0x02000000, expand=False, hidden=False,enabled=False,))
-        self.add(SsiPrbsTx(          name='SsiPrbsTx',  offset=0x00700000, expand=False, hidden=False,enabled=False,))
-        for i in range(4):
-            self.add(Ads42Lbx9Readout(
-                name    = ('SlowAdcReadout[%d]'%i),
-                offset  = (0x03000000 + i*0x100000), 
-                expand  = False, 
-                enabled = False,
-                hidden  = False,
-            ))
-        for i in range(4):
-            self.add(Ads42Lbx9Config(
-                name    = ('SlowAdcConfig[%d]'%i),
-                offset  = (0x03400000 + i*0x200), 
-                expand  = False, 
-                enabled = False,
-                hidden  = False,
-            ))  
-        for i in range(8):
-            self.add(SadcBufferWriter(
-                name    = ('SadcBufferWriter[%d]'%i),
-                offset  = (0x04000000 + i*0x100000), 
-                expand  = False, 
-                enabled = False,
-                hidden  = False,
-            ))              
-        self.add(SadcBufferReader(  name='SadcBufferReader',    offset=0x04800000, enabled=False, expand=False,  hidden=False,))      
-        self.add(SadcPatternTester( name='SadcPatternTester',   offset=0x04900000, enabled=False, expand=False,  hidden=True,))      
-        self.add(JesdRx(            name='JesdRx',              offset=0x05000000, enabled=True,  expand=False,  numRxLanes=16, hidden=False,))      
-        self.add(Lmk04828(          name='LMK',                 offset=0x05100000, expand=False,                 hidden=False,))  
-        self.add(FadcDebug(         name='FadcDebug',           offset=0x05700000, enabled=False, expand=False,  hidden=False,))  
+        self.buildTimes = collections.OrderedDict()
+        for entry in LZTS_DEVICES:
+            name, className, offset, args = entry[:4]
+            if self.subset is not None and name not in self.subset:
+                continue
+            start = time.time()
+            cls = deviceClass(className)
+            if len(entry) == 4:
+                self.add(cls(name=name, offset=offset, **args))
+            else:
+                count, stride = entry[4:]
+                for i in range(count):
+                    self.add(cls(name=('%s[%d]'%(name, i)), offset=(offset + i*stride), **args))
+            self.buildTimes[name] = time.time() - start
         
-        for i in range(4):
-            self.add(Ads54J60(
-                name      = ('FastAdcConfig[%d]'%i),
-                offset    = (0x05200000 + i*0x100000), 
-                expand    = False, 
-                hidden    = False,
-            ))
-                        
-        for i in range(8):
-            self.add(FadcBufferChannel(
-                name    = ('FadcBufferChannel[%d]'%i),
-                offset  = (0x06000000 + i*0x100000), 
-                expand  = False, 
-                enabled = False,
-                hidden  = False,
-            ))    
-        
-        self.sadcDelays = [85,88,73,79,79,79,76,91,88,80,86,84,89,81,81,89,80,83,78,76,79,78,84,91,85,84,83,81,83,85,83,83,80,88,79,81,83,79,75,82,73,81,75,69,78,79,78,71,80,86,80,77,79,80,81,88,79,77,75,75,79,85,86,84]
+        # defaults for boards without a trained delay table
+        self.sadcDefaultDelays = [85,88,73,79,79,79,76,91,88,80,86,84,89,81,81,89,80,83,78,76,79,78,84,91,85,84,83,81,83,85,83,83,80,88,79,81,83,79,75,82,73,81,75,69,78,79,78,71,80,86,80,77,79,80,81,88,79,77,75,75,79,85,86,84]
+        self.sadcDelayStore    = SadcDelayStore(sadcDelayDir)
+        # delays loaded by the last SadcInit
+        self.sadcDelays        = self.sadcDefaultDelays
         self.delayRegs = self.find(name="DelayAdc*")        
         
         @self.command(description="Clear temperature fault",)
         def TempFaultClear():
-            self.TempMon.ConfigurationRegisterWrite.set(0x80)
-            self._root.checkBlocks(recurse=True)
-            self.TempMon.ConfigurationRegisterWrite.set(0x0)
-            self._root.checkBlocks(recurse=True)
-            self.PwrReg.LatchTempFault.set(False)
-            self._root.checkBlocks(recurse=True)
-            self.PwrReg.LatchTempFault.set(True)
-            self._root.checkBlocks(recurse=True)
+            # repeated writes to the same register flush the batch, the pulses stay in order
+            with RegisterBatch() as batch:
+                batch.set(self.TempMon.ConfigurationRegisterWrite, 0x80)
+                batch.set(self.TempMon.ConfigurationRegisterWrite, 0x0)
+                batch.set(self.PwrReg.LatchTempFault, False)
+                batch.set(self.PwrReg.LatchTempFault, True)
          
         @self.command(description="Set monitoring alarms",)
         def SetMonAlarms():
-            # enable thermal fault latching
-            # analog power will be kept off when 70C alert threshold is crossed
-            # this has to be cleared in power regs and monitor (TempFaultClear command)
-            # this is before critical shutdown at 85C
-            self.PwrReg.LatchTempFault.set(True) 
-            self._root.checkBlocks(recurse=True)
-            
-            # set power monitors to alarm when the 6V DCDC is shut off (ADIN below 0.5V)
-            # look at Fault register to see the alarm
-            self.PwrMonAna.Alert.set(0x1)
-            self._root.checkBlocks(recurse=True)
-            self.PwrMonAna.MinAdinThresholdMsb.set(0x3E)
-            self._root.checkBlocks(recurse=True)
-            self.PwrMonAna.MinAdinThresholdLsb.set(0x80)
-            self._root.checkBlocks(recurse=True)
-            self.PwrMonDig.Alert.set(0x1)
-            self._root.checkBlocks(recurse=True)
-            self.PwrMonDig.MinAdinThresholdMsb.set(0x3E)
-            self._root.checkBlocks(recurse=True)
-            self.PwrMonDig.MinAdinThresholdLsb.set(0x80)
-            self._root.checkBlocks(recurse=True)
-            
-            #ignore low setpoint alarms by setting to -128*C
-            self.TempMon.RemoteHighSetpointLowByteWrite.set(0x80)
-            #set temp monitor in comparator mode (clears itself when temp drops)
-            self.TempMon.AlertMode.set(1)
-            #set alert threshold to 90C
-            self.TempMon.RemoteHighSetpointHighByteWrite.set(90)
-            self._root.checkBlocks(recurse=True)
-            #set critical threshold to 100C
-            self.TempMon.RemoteTCritSetpoint.set(100)
-            self._root.checkBlocks(recurse=True)
+            with RegisterBatch() as batch:
+                # enable thermal fault latching
+                # analog power will be kept off when 70C alert threshold is crossed
+                # this has to be cleared in power regs and monitor (TempFaultClear command)
+                # this is before critical shutdown at 85C
+                batch.set(self.PwrReg.LatchTempFault, True) 
+                
+                # set power monitors to alarm when the 6V DCDC is shut off (ADIN below 0.5V)
+                # look at Fault register to see the alarm
+                batch.set(self.PwrMonAna.Alert, 0x1)
+                batch.set(self.PwrMonAna.MinAdinThresholdMsb, 0x3E)
+                batch.set(self.PwrMonAna.MinAdinThresholdLsb, 0x80)
+                batch.set(self.PwrMonDig.Alert, 0x1)
+                batch.set(self.PwrMonDig.MinAdinThresholdMsb, 0x3E)
+                batch.set(self.PwrMonDig.MinAdinThresholdLsb, 0x80)
+                
+                #ignore low setpoint alarms by setting to -128*C
+                batch.set(self.TempMon.RemoteHighSetpointLowByteWrite, 0x80)
+                #set temp monitor in comparator mode (clears itself when temp drops)
+                batch.set(self.TempMon.AlertMode, 1)
+                #set alert threshold to 90C
+                batch.set(self.TempMon.RemoteHighSetpointHighByteWrite, 90)
+                #set critical threshold to 100C
+                batch.set(self.TempMon.RemoteTCritSetpoint, 100)
         
         @self.command(description="Initialization for slow ADC idelayes",)
         def SadcInit():
-            for i in range(4):
-                self.SlowAdcReadout[i].enable.set(True)
-                self._root.checkBlocks(recurse=True)
-                self.SlowAdcReadout[i].DMode.set(3)
-                self._root.checkBlocks(recurse=True)
-                # Invert 0 is correct setting. Analog polarity is swapped on PCB.
-                # Do not invert here! The PMT pulse is negative.
-                self.SlowAdcReadout[i].Invert.set(0)
-                self._root.checkBlocks(recurse=True)
-                self.SlowAdcReadout[i].Convert.set(3)
-                self._root.checkBlocks(recurse=True)
-            for i in range(64):
-                self.delayRegs[i].set(self.sadcDelays[i])
-            self._root.checkBlocks(recurse=True)
-            if (self.PwrReg.EnDcDcAp3V7.get()==True and self.PwrReg.EnDcDcAp2V3.get()==True and self.PwrReg.EnLdoSlow.get()==True):
+            # last trained delays of this board, the defaults if it was never trained
+            delays = self.sadcDelayStore.delays(self.AxiVersion.DeviceDna.get())
+            if delays is None:
+                print('%s: no SADC delay table, using the defaults' %(self.path))
+                delays = self.sadcDefaultDelays
+            self.sadcDelays = delays
+            with RegisterBatch() as batch:
                 for i in range(4):
-                    self.SlowAdcConfig[i].enable.set(True)
-                    self._root.checkBlocks(recurse=True)
-                    self.SlowAdcConfig[i].AdcReg_0x0015.set(1)  #Set DDR Mode
-                    self._root.checkBlocks(recurse=True)
-                    self.SlowAdcConfig[i].AdcReg_0x000B.set(0x1C)  #Set channel A digital gain -2dB (2.5Vpp input)
-                    self._root.checkBlocks(recurse=True)
-                    self.SlowAdcConfig[i].AdcReg_0x000C.set(0x1C)  #Set channel B digital gain -2dB (2.5Vpp input)
-                    self._root.checkBlocks(recurse=True)
+                    batch.set(self.SlowAdcReadout[i].enable, True)
+                    batch.set(self.SlowAdcReadout[i].DMode, 3)
+                    # Invert 0 is correct setting. Analog polarity is swapped on PCB.
+                    # Do not invert here! The PMT pulse is negative.
+                    batch.set(self.SlowAdcReadout[i].Invert, 0)
+                    batch.set(self.SlowAdcReadout[i].Convert, 3)
+                batch.setMany(self.delayRegs, self.sadcDelays)
+            if (self.PwrReg.EnDcDcAp3V7.get()==True and self.PwrReg.EnDcDcAp2V3.get()==True and self.PwrReg.EnLdoSlow.get()==True):
+                with RegisterBatch() as batch:
+                    for i in range(4):
+                        batch.set(self.SlowAdcConfig[i].enable, True)
+                        batch.set(self.SlowAdcConfig[i].AdcReg_0x0015, 1)  #Set DDR Mode
+                        batch.set(self.SlowAdcConfig[i].AdcReg_0x000B, 0x1C)  #Set channel A digital gain -2dB (2.5Vpp input)
+                        batch.set(self.SlowAdcConfig[i].AdcReg_0x000C, 0x1C)  #Set channel B digital gain -2dB (2.5Vpp input)
         
         @self.command(description="Reset slow ADCs",)
         def SadcReset():
-            self.PwrReg.SADCRst.set(0xF)
-            self._root.checkBlocks(recurse=True)
-            self.PwrReg.SADCRst.set(0x0)
-            self._root.checkBlocks(recurse=True)
+            with RegisterBatch() as batch:
+                batch.set(self.PwrReg.SADCRst, 0xF)
+                batch.set(self.PwrReg.SADCRst, 0x0)
         
         @self.command(description="Enable slow ADC buffers (for debug)",)
         def SadcBuffersOn():
-            for i in range(8):
-                self.SadcBufferWriter[i].enable.set(True)
-                self._root.checkBlocks(recurse=True)
-                self.SadcBufferWriter[i].ExtTrigSize.set(0x1000)
-                self._root.checkBlocks(recurse=True)
-                self.SadcBufferWriter[i].Enable.set(True)
-                self._root.checkBlocks(recurse=True)
+            with RegisterBatch() as batch:
+                for i in range(8):
+                    batch.set(self.SadcBufferWriter[i].enable, True)
+                    batch.set(self.SadcBufferWriter[i].ExtTrigSize, 0x1000)
+                    batch.set(self.SadcBufferWriter[i].Enable, True)
         
         @self.command(description="Disable slow ADC buffers (for debug)",)
         def SadcBuffersOff():
-            for i in range(8):
-                self.SadcBufferWriter[i].enable.set(True)
-                self._root.checkBlocks(recurse=True)
-                self.SadcBufferWriter[i].Enable.set(False)
-                self._root.checkBlocks(recurse=True)
+            with RegisterBatch() as batch:
+                for i in range(8):
+                    batch.set(self.SadcBufferWriter[i].enable, True)
+                    batch.set(self.SadcBufferWriter[i].Enable, False)
         
         @self.command(description="Enable fast ADC buffers (for debug)",)
         def FadcBuffersOn():
-            for i in range(8):
-                self.FadcBufferChannel[i].enable.set(True)
-                self._root.checkBlocks(recurse=True)
-                self.FadcBufferChannel[i].ExtTrigSize.set(0x3FF)
-                self._root.checkBlocks(recurse=True)
-                self.FadcBufferChannel[i].Enable.set(True)
-                self._root.checkBlocks(recurse=True)
+            with RegisterBatch() as batch:
+                for i in range(8):
+                    batch.set(self.FadcBufferChannel[i].enable, True)
+                    batch.set(self.FadcBufferChannel[i].ExtTrigSize, 0x3FF)
+                    batch.set(self.FadcBufferChannel[i].Enable, True)
         
         @self.command(description="Disable fast ADC buffers (for debug)",)
         def FadcBuffersOff():
-            for i in range(8):
-                self.FadcBufferChannel[i].enable.set(True)
-                self._root.checkBlocks(recurse=True)
-                self.FadcBufferChannel[i].Enable.set(False)
-                self._root.checkBlocks(recurse=True)
+            with RegisterBatch() as batch:
+                for i in range(8):
+                    batch.set(self.FadcBufferChannel[i].enable, True)
+                    batch.set(self.FadcBufferChannel[i].Enable, False)
         
         @self.command(description="Initialization for JESD modules",)
         def JesdInit():            
@@ -254,6 +260,34 @@ class Lzts(pr.Device):
                 self.FastAdcConfig[i].Init()
                 self.checkBlocks(recurse=True)   
 
+        # register values last written or read back, used by incremental writes
+        self.shadow      = ShadowCache()
+        self.add(pr.LocalVariable(
+            name        = 'Incremental',
+            description = 'Configuration writes only the registers changed since the last full configuration',
+            mode        = 'RW',
+            value       = False,
+        ))
+
+        @self.command(description="Compare the shadow cache with a full readback",)
+        def VerifyShadow():
+            diffs = self.shadow.verify(self)
+            for path, cached, read in diffs:
+                print('%s: cached %s read %s' %(path, cached, read))
+            print('Shadow cache: %s' %(self.shadow.stats()))
+
+        # last register snapshot (see takeSnapshot)
+        self.snapshot = None
+
+        @self.command(description="Read all registers with bulk reads into self.snapshot",)
+        def Snapshot():
+            self.snapshot = takeSnapshot(self)
+            print('Snapshot: %(reads)d reads, %(variables)d registers in %(seconds).3f s' %(self.snapshot.info))
+
+        # JESD bring-up deadline and result of the last JesdReset
+        self.jesdDeadline = 5.0
+        self.jesdLock     = None
+
         @self.command(description  = "JESD Reset") 
         def JesdReset():
             self.LMK.Init()
@@ -262,35 +296,20 @@ class Lzts(pr.Device):
             
             for i in range(4):
                 self.FastAdcConfig[i].DigRst()
-                self.checkBlocks(recurse=True)             
-                
-            for i in range(3):
-                self.JesdRx.CmdResetGTs()
-                time.sleep(1.0)            
-                self.checkBlocks(recurse=True)             
-                    
-            self.checkBlocks(recurse=True)
-            time.sleep(0.1)
+            self.checkBlocks(recurse=True)             
             
-            self.LMK.PwrUpSysRef()
-            self.checkBlocks(recurse=True)
-            time.sleep(0.1)
-            
-            self.JesdRx.InvertSync.set(1)
-            self.checkBlocks(recurse=True)   
-            time.sleep(0.1)
-            
-            self.JesdRx.InvertSync.set(0)
-            self.JesdRx.CmdClearErrors()
+            # GT reset, SysRef and sync polled on the lane status instead of fixed sleeps
+            self.jesdLock = jesdBringUp(self.JesdRx, self.LMK, numLanes=16, deadline=self.jesdDeadline)
             self.checkBlocks(recurse=True)   
+            if self.jesdLock['locked']:
+                print('%s: JESD locked in %.3f s' %(self.path, self.jesdLock['seconds']))
+            else:
+                print('%s: JESD lanes %s not locked after %.3f s' %(self.path, self.jesdLock['down'], self.jesdLock['seconds']))
             
-    def writeBlocks(self, force=False, recurse=True, variable=None, checkEach=False):
+    def writeLocalBlocks(self, force=False, variable=None, checkEach=False):
         """
-        Write all of the blocks held by this Device to memory
+        Write the blocks held by this Device itself (not the sub devices)
         """
-        if not self.enable.get(): return
-
-        # Process local blocks.
         if variable is not None:
             variable._block.startTransaction(rim.Write, check=checkEach)
         else:
@@ -299,53 +318,40 @@ class Lzts(pr.Device):
                     if block.bulkEn:
                         block.startTransaction(rim.Write, check=checkEach)
 
+    def writeBlocks(self, force=False, recurse=True, variable=None, checkEach=False):
+        """
+        Write all of the blocks held by this Device to memory
+        """
+        if not self.enable.get(): return
+
+        # Incremental mode (after one full configuration, also for force=True
+        # YAML reloads): write only the blocks whose values changed. The
+        # bring-up commands (JesdInit, JesdReset, SadcInit ...) are not run.
+        if self.Incremental.get() and variable is None and self.shadow.primed():
+            self.shadow.writeBlocks(self)
+            return
+
+        # Partial boards have no bring-up sequence, plain device writes
+        if self.subset is not None:
+            pr.Device.writeBlocks(self, force=force, recurse=recurse, variable=variable, checkEach=checkEach)
+            return
+
+        # Process local blocks.
+        self.writeLocalBlocks(force=force, variable=variable, checkEach=checkEach)
+
         # Retire any in-flight transactions before starting next sequence
         self._root.checkBlocks(recurse=True)
         
-        # set alarm thresholds
-        self.SetMonAlarms()
-        # clear fault in case it occured before
-        self.TempFaultClear()
-        
-        
-        # Load all the register expect for JESD which have to be loaded after LMK init()
-        self.AxiVersion.writeBlocks( force=force, recurse=recurse, variable=variable)
-        self.SysMon.writeBlocks(     force=force, recurse=recurse, variable=variable)
-        self.MicronN25Q.writeBlocks( force=force, recurse=recurse, variable=variable)
-        self.MemTester.writeBlocks(  force=force, recurse=recurse, variable=variable)
-        self.PwrReg.writeBlocks(     force=force, recurse=recurse, variable=variable)
-        self.Pgp2bAxi.writeBlocks(   force=force, recurse=recurse, variable=variable)
-        self.TempMon.writeBlocks(    force=force, recurse=recurse, variable=variable)
-        self.PwrMonAna.writeBlocks(  force=force, recurse=recurse, variable=variable)
-        self.PwrMonDig.writeBlocks(  force=force, recurse=recurse, variable=variable)
-        self._root.checkBlocks(recurse=True)           
-        time.sleep(0.1); # wait for power supplies to boot up
-        
-        for i in range(4):
-            self.SlowAdcReadout[i].writeBlocks(force=force, recurse=recurse, variable=variable)
-            self.SlowAdcConfig[i].writeBlocks( force=force, recurse=recurse, variable=variable)
-            
-        for i in range(8):
-            self.SadcBufferWriter[i].writeBlocks(force=force, recurse=recurse, variable=variable)
-            self.FadcBufferChannel[i].writeBlocks(force=force, recurse=recurse, variable=variable)            
-            
-        self.SadcBufferReader.writeBlocks(  force=force, recurse=recurse, variable=variable)
-        self.SadcPatternTester.writeBlocks( force=force, recurse=recurse, variable=variable)
-        self.JesdRx.writeBlocks(            force=force, recurse=recurse, variable=variable)
-        self.LMK.writeBlocks(               force=force, recurse=recurse, variable=variable)
-        self._root.checkBlocks(recurse=True)           
-        
-        self.JesdInit()
-        
-        for i in range(4):
-            self.FastAdcConfig[i].writeBlocks(force=force, recurse=recurse, variable=variable)        
-            self._root.checkBlocks(recurse=True)    
-            
-        self.JesdReset()
-        
-        # initialize slow ADC
-        self.SadcReset()
-        self.SadcInit()
-        
-        
-        
\ No newline at end of file
+        # Configure the devices in dependency order (LZTS_INIT_STEPS), the
+        # independent devices of a step are written together
+        LztsInit.run([self], force=force, recurse=recurse, variable=variable)
+        if variable is None:
+            self.shadow.record(self)
+
+    def buildReport(self):
+        """surf import and device construction times, slowest first"""
+        lines = ['surf imports:']
+        lines += ['%8.1f ms  %s' %(1e3 * t, m) for m, t in sorted(surfImportTimes.items(), key=lambda x: -x[1])]
+        lines += ['%s devices:' %(self.name)]
+        lines += ['%8.1f ms  %s' %(1e3 * t, n) for n, t in sorted(self.buildTimes.items(), key=lambda x: -x[1])]
+        return '\n'.join(lines)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : offline run browser panel for the LZTS viewer
+#-----------------------------------------------------------------------------
+# File       : FileBrowser.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Navigation controls for a lztsData.RunBrowser. The selected event is
+# drawn with the same plots as the live stream. Neighbouring events are
+# prefetched by the browser cache while the current one is displayed.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+from PyQt4 import QtGui, QtCore
+import numpy as np
+
+import lztsData as ld
+
+# flag filter choices (label, flagsAny)
+FLAG_FILTERS = [
+    ('All PODs',  0),
+    ('Lost',      ld.FLAG_LOST),
+    ('External',  ld.FLAG_EXT),
+    ('Internal',  ld.FLAG_INT),
+    ('Empty',     ld.FLAG_EMPTY),
+    ('Veto',      ld.FLAG_VETO),
+    ('Bad ADC',   ld.FLAG_BAD_ADC),
+    ('Suppressed', ld.FLAG_ZS),
+]
+
+
+class FileBrowserPanel(QtGui.QFrame):
+    """Event navigation for the offline viewer mode"""
+
+    def __init__(self, window):
+        super(FileBrowserPanel, self).__init__(window)
+        self.viewer  = window
+        self.browser = None
+        self.setFrameStyle(QtGui.QFrame.Panel)
+
+        self.firstButton = QtGui.QPushButton('|<')
+        self.prevButton  = QtGui.QPushButton('<')
+        self.nextButton  = QtGui.QPushButton('>')
+        self.lastButton  = QtGui.QPushButton('>|')
+        self.eventBox    = QtGui.QSpinBox()
+        self.eventBox.setKeyboardTracking(False)
+        self.timeEdit    = QtGui.QLineEdit()
+        self.timeEdit.setPlaceholderText('time [s]')
+        self.flagBox     = QtGui.QComboBox()
+        for label, flags in FLAG_FILTERS:
+            self.flagBox.addItem(label)
+        self.channelFilter = QtGui.QCheckBox('Enabled channels only')
+        self.info = QtGui.QLabel('')
+
+        self.firstButton.clicked.connect(lambda: self.displayEvent(0))
+        self.prevButton.clicked.connect(lambda: self.step(-1))
+        self.nextButton.clicked.connect(lambda: self.step(1))
+        self.lastButton.clicked.connect(lambda: self.displayEvent(len(self.browser)-1))
+        self.eventBox.valueChanged.connect(self.displayEvent)
+        self.timeEdit.returnPressed.connect(self.gotoTime)
+        self.flagBox.currentIndexChanged.connect(self.updateFilter)
+        self.channelFilter.toggled.connect(self.updateFilter)
+
+        for key, step in ((QtCore.Qt.Key_Left, -1), (QtCore.Qt.Key_Right, 1),
+                          (QtCore.Qt.Key_PageUp, -100), (QtCore.Qt.Key_PageDown, 100)):
+            shortcut = QtGui.QShortcut(QtGui.QKeySequence(key), window)
+            shortcut.activated.connect(lambda step=step: self.step(step))
+
+        hbox = QtGui.QHBoxLayout()
+        for widget in (self.firstButton, self.prevButton, self.eventBox, self.nextButton,
+                       self.lastButton, self.timeEdit, self.flagBox, self.channelFilter, self.info):
+            hbox.addWidget(widget)
+        self.setLayout(hbox)
+
+    def setBrowser(self, browser):
+        self.browser = browser
+        self.updateFilter()
+
+    def updateFilter(self, *args):
+        if self.browser is None:
+            return
+        channels = None
+        if self.channelFilter.isChecked():
+            channels = [i for i in range(ld.NUM_CH) if self.viewer.enabled[i]]
+        flags = FLAG_FILTERS[self.flagBox.currentIndex()][1]
+        self.browser.setFilter(channels=channels, flagsAny=flags)
+        self.eventBox.blockSignals(True)
+        self.eventBox.setRange(0, max(len(self.browser)-1, 0))
+        self.eventBox.blockSignals(False)
+        self.displayEvent(self.browser.position)
+
+    def step(self, step):
+        if self.browser is not None:
+            self.displayEvent(self.browser.position + step)
+
+    def gotoTime(self):
+        if self.browser is None:
+            return
+        try:
+            seconds = float(self.timeEdit.text())
+        except ValueError:
+            return
+        self.displayEvent(self.browser.gotoTime(seconds))
+
+    def displayEvent(self, n):
+        if self.browser is None:
+            return
+        n = self.browser.goto(n)
+        self.eventBox.blockSignals(True)
+        self.eventBox.setValue(n)
+        self.eventBox.blockSignals(False)
+
+        event = self.browser.event(n)
+        chData = [np.zeros(0, dtype=np.uint16)]*ld.NUM_CH
+        for ch, (pod, wf) in event.items():
+            chData[ch] = wf
+        if len(self.browser):
+            seconds = self.browser.times[n] / ld.TIME_CLK_HZ
+            flags = np.bitwise_or.reduce(self.browser.runFile.pods['flags'][self.browser.podsOf(n)])
+            self.info.setText('Event %d / %d, t = %.9f s, %d PODs, flags 0x%02X' %(
+                n, len(self.browser), seconds, len(event), flags))
+        else:
+            self.info.setText('No events')
+        self.viewer.displayChannels(chData)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : persistence (phosphor) display for the LZTS viewer
+#-----------------------------------------------------------------------------
+# File       : PersistenceDisplay.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Oscilloscope style persistence view. Waveforms are copied by the stream
+# thread into a preallocated ring and accumulated by a background thread
+# into one 2D (sample index x ADU) histogram per channel with a single
+# bincount per batch. The histograms decay exponentially so the image
+# follows the current signal shape.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import threading
+import time
+import math
+import numpy as np
+
+import lztsData as ld
+
+
+class PersistenceAccumulator(threading.Thread):
+    """Accumulates per channel 2D waveform histograms on a background thread"""
+
+    def __init__(self, numSamples=512, adcBins=128, ringSize=8192, decayTime=2.0, interval=0.05):
+        super(PersistenceAccumulator, self).__init__()
+        self.daemon     = True
+        self.numSamples = numSamples
+        self.adcBins    = adcBins
+        self.decayTime  = decayTime
+        self.interval   = interval
+        self.active     = False
+        # single producer (stream thread) / single consumer (this thread) ring
+        self.ringSize   = ringSize
+        self.ring       = np.zeros((ringSize, numSamples), dtype=np.uint16)
+        self.ringCh     = np.zeros(ringSize, dtype=np.intp)
+        self.ringLen    = np.zeros(ringSize, dtype=np.intp)
+        self.wrCount    = 0
+        self.rdCount    = 0
+        self.dropped    = 0
+        self.accepted   = 0
+        # ADU range of each channel, a zero scale means not set yet (auto range)
+        self.adcMin     = np.zeros(ld.NUM_CH, dtype=np.float32)
+        self.adcScale   = np.zeros(ld.NUM_CH, dtype=np.float32)
+        self.hist       = np.zeros((ld.NUM_CH, numSamples, adcBins), dtype=np.float32)
+        self.lock       = threading.Lock()
+        self.columns    = np.arange(numSamples)
+        self.running    = True
+        self.lastDecay  = time.monotonic()
+
+    def push(self, chIndex, samples):
+        """Called from the stream thread, copies one waveform into the ring"""
+        if not self.active:
+            return
+        wr = self.wrCount
+        if wr - self.rdCount >= self.ringSize:
+            self.dropped += 1
+            return
+        row = wr % self.ringSize
+        n = min(len(samples), self.numSamples)
+        self.ring[row, :n] = samples[:n]
+        self.ringCh[row]   = chIndex
+        self.ringLen[row]  = n
+        # publish the row only after it is complete
+        self.wrCount = wr + 1
+
+    def setRange(self, chIndex, adcMin, adcMax):
+        """Fixes the ADU range of a channel and clears its histogram"""
+        with self.lock:
+            self.adcMin[chIndex]   = adcMin
+            self.adcScale[chIndex] = self.adcBins / float(max(adcMax - adcMin, 1))
+            self.hist[chIndex]     = 0
+
+    def autoRange(self, chIndex=None):
+        """Lets the next waveforms define the ADU range of a channel (all if None)"""
+        with self.lock:
+            sel = slice(None) if chIndex is None else chIndex
+            self.adcScale[sel] = 0
+            self.hist[sel]     = 0
+
+    def clear(self):
+        with self.lock:
+            self.hist[:] = 0
+
+    def image(self, chIndex):
+        """Returns a copy of the channel histogram and its ADU extent"""
+        with self.lock:
+            img = self.hist[chIndex].copy()
+            lo  = float(self.adcMin[chIndex])
+            scale = float(self.adcScale[chIndex])
+        hi = lo + (self.adcBins / scale if scale > 0 else 1.0)
+        return img, lo, hi
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        while self.running:
+            time.sleep(self.interval)
+            wr = self.wrCount
+            rd = self.rdCount
+            if wr > rd:
+                # process the ring content in at most two contiguous slices
+                start = rd % self.ringSize
+                stop  = start + (wr - rd)
+                if stop <= self.ringSize:
+                    self._accumulate(start, stop)
+                else:
+                    self._accumulate(start, self.ringSize)
+                    self._accumulate(0, stop - self.ringSize)
+                self.accepted += wr - rd
+                self.rdCount = wr
+            self._decay()
+
+    def _decay(self):
+        now = time.monotonic()
+        dt  = now - self.lastDecay
+        self.lastDecay = now
+        if self.decayTime:
+            with self.lock:
+                self.hist *= math.exp(-dt / self.decayTime)
+
+    def _accumulate(self, start, stop):
+        data = self.ring[start:stop]
+        ch   = self.ringCh[start:stop]
+        valid = self.columns[None, :] < self.ringLen[start:stop, None]
+
+        # set the range of new channels from their first waveforms and take
+        # the ranges of the batch, setRange/autoRange change them under the lock
+        with self.lock:
+            for c in np.unique(ch[self.adcScale[ch] == 0]):
+                rows = data[ch == c]
+                vals = rows[valid[ch == c]]
+                if len(vals) == 0:
+                    continue
+                lo, hi = float(vals.min()), float(vals.max())
+                margin = max(0.1 * (hi - lo), 8.0)
+                self.adcMin[c]   = lo - margin
+                self.adcScale[c] = self.adcBins / (hi - lo + 2 * margin)
+            adcMin   = self.adcMin.copy()
+            adcScale = self.adcScale.copy()
+
+        # map the channels present in the batch to compact histogram ids
+        chans, chId = np.unique(ch, return_inverse=True)
+        bins = ((data - adcMin[ch][:, None]) * adcScale[ch][:, None]).astype(np.intp)
+        np.clip(bins, 0, self.adcBins - 1, out=bins)
+        idx = (chId[:, None] * self.numSamples + self.columns[None, :]) * self.adcBins + bins
+        counts = np.bincount(idx[valid], minlength=len(chans) * self.numSamples * self.adcBins)
+        counts = counts.reshape(len(chans), self.numSamples, self.adcBins)
+        with self.lock:
+            # drop the channels whose range changed meanwhile (histogram cleared)
+            same = (self.adcMin[chans] == adcMin[chans]) & (self.adcScale[chans] == adcScale[chans])
+            self.hist[chans[same]] += counts[same]
+
+def drawPersistence(canvas, enabled, accumulator, labels, title):
+    """Draws the enabled channel histograms as images on a MplCanvas"""
+    channels = [i for i in range(ld.NUM_CH) if enabled[i]]
+    canvas.fig.clf()
+    if len(channels) == 0:
+        canvas.axes = canvas.fig.add_subplot(111)
+        canvas.axes.set_title(title)
+        canvas.draw()
+        return
+    cols = int(math.ceil(math.sqrt(len(channels))))
+    rows = int(math.ceil(len(channels) / float(cols)))
+    for n, i in enumerate(channels):
+        axes = canvas.fig.add_subplot(rows, cols, n+1)
+        img, lo, hi = accumulator.image(i)
+        axes.imshow(np.log1p(img.T), origin='lower', aspect='auto', cmap='inferno',
+                    extent=(0, accumulator.numSamples, lo, hi), interpolation='nearest')
+        axes.set_title(labels[i], fontsize=8)
+        axes.tick_params(labelsize=6)
+    canvas.axes = canvas.fig.axes[0]
+    canvas.fig.suptitle(title)
+    canvas.draw()
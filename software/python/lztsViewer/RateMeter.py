@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------
+# Title      : live trigger rate and bandwidth meter for the LZTS viewer
+#-----------------------------------------------------------------------------
+# File       : RateMeter.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Exponentially decayed trigger, byte and flag counters per ADC channel and
+# per PGP lane. Instead of decaying every counter on every frame, new
+# entries are weighted with exp(+t/tau) relative to a reference time, so an
+# update costs one exp() and a few additions. The reference is moved
+# forward (and the sums rescaled) before the weights can overflow.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to
+# the license terms in the LICENSE.txt file found in the top-level directory
+# of this distribution and at:
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html.
+# No part of the LZTS rogue, including this file, may be
+# copied, modified, propagated, or distributed except according to the terms
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+
+import threading
+import time
+import math
+from PyQt4 import QtGui, QtCore
+
+import lztsData as ld
+
+# counter slots of one row
+TRIGGERS = 0
+BYTES    = 1
+SAMPLES  = 2
+LOST     = 3
+VETO     = 4
+BAD_ADC  = 5
+NUM_COUNTERS = 6
+
+# sizeFlags bits counted by the meter
+_LOST_BIT    = 1 << 22
+_VETO_BIT    = 1 << 30
+_BAD_ADC_BIT = 1 << 31
+
+# rebase when the weights reach exp(REBASE)
+REBASE = 50.0
+
+COLUMNS = ['Trig/s', 'MB/s', 'Mean size', 'Lost %', 'Veto %', 'Bad ADC %']
+
+
+class RateMeter(object):
+    """Exponentially decayed per channel and per lane trigger statistics"""
+
+    def __init__(self, tau=2.0):
+        self.tau      = tau
+        self.lock     = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.t0       = time.monotonic()
+            self.channels = [[0.0]*NUM_COUNTERS for i in range(ld.NUM_CH)]
+            self.lanes    = {}
+            self.pods     = 0
+            # PODs with a channel index outside 0-15 (only counted in their lane)
+            self.badChannel = 0
+
+    def update(self, chIndex, lane, size, sizeFlags, now=None):
+        """Counts one POD, called from the stream thread for every POD of a frame"""
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            x = (now - self.t0) / self.tau
+            if x > REBASE:
+                self._rebase(now, x)
+                x = 0.0
+            w = math.exp(x)
+            row = self.lanes.get(lane)
+            if row is None:
+                row = self.lanes[lane] = [0.0]*NUM_COUNTERS
+            if 0 <= chIndex < ld.NUM_CH:
+                rows = (self.channels[chIndex], row)
+            else:
+                self.badChannel += 1
+                rows = (row,)
+            for acc in rows:
+                acc[TRIGGERS] += w
+                acc[BYTES]    += w * size
+                acc[SAMPLES]  += w * (sizeFlags & ld.SIZE_MASK)
+                if sizeFlags & _LOST_BIT:
+                    acc[LOST] += w
+                if sizeFlags & _VETO_BIT:
+                    acc[VETO] += w
+                if sizeFlags & _BAD_ADC_BIT:
+                    acc[BAD_ADC] += w
+            self.pods += 1
+
+    def _rebase(self, now, x):
+        scale = math.exp(-x)
+        for acc in self.channels + list(self.lanes.values()):
+            for i in range(NUM_COUNTERS):
+                acc[i] *= scale
+        self.t0 = now
+
+    def snapshot(self, now=None):
+        """
+        Returns (channel rows, {lane: row}), every row holding triggers/s,
+        MB/s, mean trigger size in samples and the lost, veto and bad ADC
+        fractions.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            norm = math.exp(-(now - self.t0) / self.tau) / self.tau
+            channels = [self._row(acc, norm) for acc in self.channels]
+            lanes = dict((lane, self._row(acc, norm)) for lane, acc in self.lanes.items())
+        return channels, lanes
+
+    @staticmethod
+    def _row(acc, norm):
+        trig = acc[TRIGGERS]
+        if trig <= 0:
+            return (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return (trig * norm, acc[BYTES] * norm / 1e6, acc[SAMPLES] / trig,
+                acc[LOST] / trig, acc[VETO] / trig, acc[BAD_ADC] / trig)
+
+
+class RatePanel(QtGui.QTableWidget):
+    """Table of the RateMeter statistics refreshed by a timer"""
+
+    def __init__(self, meter, parent=None, interval=500):
+        super(RatePanel, self).__init__(0, len(COLUMNS), parent)
+        self.meter = meter
+        self.setHorizontalHeaderLabels(COLUMNS)
+        self.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.lanes = []
+        self._setRows()
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval)
+
+    def _setRows(self):
+        labels = ['SADC %d' %(i) for i in range(ld.NUM_SADC_CH)] + \
+                 ['FADC %d' %(i) for i in range(ld.NUM_FADC_CH)] + \
+                 ['Lane %d' %(lane) for lane in self.lanes]
+        self.setRowCount(len(labels))
+        self.setVerticalHeaderLabels(labels)
+        for r in range(len(labels)):
+            for c in range(len(COLUMNS)):
+                if self.item(r, c) is None:
+                    item = QtGui.QTableWidgetItem('')
+                    item.setTextAlignment(QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+                    self.setItem(r, c, item)
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        channels, lanes = self.meter.snapshot()
+        if sorted(lanes) != self.lanes:
+            self.lanes = sorted(lanes)
+            self._setRows()
+        rows = channels + [lanes[lane] for lane in self.lanes]
+        for r, row in enumerate(rows):
+            rate, mbps, mean, lost, veto, bad = row
+            text = ('%.1f' %(rate), '%.3f' %(mbps), '%.0f' %(mean),
+                    '%.2f' %(100*lost), '%.2f' %(100*veto), '%.2f' %(100*bad))
+            for c in range(len(COLUMNS)):
+                self.item(r, c).setText(text[c])
+        self.setToolTip('%d PODs, %d with an invalid channel' %(self.meter.pods, self.meter.badChannel))
@@ -8,5 +8,8 @@
 # contained in the LICENSE.txt file.
 #-----------------------------------------------------------------------------
 from lztsViewer._lztsViewer import *
+from lztsViewer.PersistenceDisplay import *
+from lztsViewer.FileBrowser import *
 
 
+from lztsViewer.RateMeter import *
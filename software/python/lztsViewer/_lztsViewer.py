@@ -37,10 +37,19 @@ from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from itertools import count, takewhile
 
+import lztsData as ld
+from lztsViewer.PersistenceDisplay import PersistenceAccumulator, drawPersistence
+from lztsViewer.FileBrowser import FileBrowserPanel
+from lztsViewer.RateMeter import RateMeter, RatePanel
+from lztsData.RunFile import RunFile, RunBrowser
+
 import pdb
 
 
-PRINT_VERBOSE = 1
+# per frame and per display messages (rate limited), off for normal running
+PRINT_VERBOSE = 0
+# seconds a FadcDebug capture stays on screen before the events are shown again
+FADC_CAPTURE_HOLD = 10.0
 
 ################################################################################
 ################################################################################
@@ -54,6 +63,8 @@ class Window(QtGui.QMainWindow, QObject):
     
     ## Define a new signal called 'trigger' that has no arguments.
     dataTrigger = pyqtSignal()
+    # full depth FadcDebug captures, emitted from the capture thread
+    fadcCapture = pyqtSignal(object)
     #processDataFrameTrigger = pyqtSignal()
 
 
@@ -77,7 +88,19 @@ class Window(QtGui.QMainWindow, QObject):
         mainMenu = self.menuBar()
         # adds items and subitems
         fileMenu = mainMenu.addMenu('&File')
+        openAction = QtGui.QAction("&Open run...", self)
+        openAction.setShortcut("Ctrl+O")
+        openAction.setStatusTip('Browse a recorded run')
+        openAction.triggered.connect(lambda: self.openRun())
+        fileMenu.addAction(openAction)
         fileMenu.addAction(extractAction)
+        self.fileBrowser = None
+        viewMenu = mainMenu.addMenu('&View')
+        ratesAction = QtGui.QAction("&Rates", self)
+        ratesAction.setShortcut("Ctrl+R")
+        ratesAction.setStatusTip('Show trigger rates and bandwidth per channel and lane')
+        ratesAction.triggered.connect(self.showRates)
+        viewMenu.addAction(ratesAction)
 
         # Create widget
         self.prepairWindow()
@@ -85,11 +108,28 @@ class Window(QtGui.QMainWindow, QObject):
         # rogue interconection  #
         # Create the objects            
         self.eventReaderData = EventReader(self)
-        self.enabled = [False,False,False,False,False,False,False,False,False,False,False,False,False,False,False,False]
+        self.persistence = PersistenceAccumulator()
+        self.eventReaderData.setPersistence(self.persistence)
+        self.rates = RateMeter()
+        self.eventReaderData.rates = self.rates
+        self.ratesDock = QtGui.QDockWidget('Rates', self)
+        self.ratesDock.setWidget(RatePanel(self.rates, self.ratesDock))
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.ratesDock)
+        self.ratesDock.hide()
+        self.persistence.start()
+        self.persistenceTimer = QtCore.QTimer(self)
+        self.persistenceTimer.timeout.connect(self.displayPersistence)
+        self.enabled = [False]*16
+        self.updateEnabledMask()
+        # optional lztsData.FilterBank per ADC type ('slow', 'fast') applied before display
+        self.displayFilters = {}
+        # events are not displayed until then (FadcDebug capture on screen)
+        self.captureHoldUntil = 0.0
         
         # Connect the trigger signal to a slot.
         # the different threads send messages to synchronize their tasks
         self.dataTrigger.connect(self.displayDataFromReader)
+        self.fadcCapture.connect(self.displayFadcCapture)
         #self.processDataFrameTrigger.connect(self.eventReaderData._processFrame)
         
         # display the window on the screen after all items have been added 
@@ -132,7 +172,21 @@ class Window(QtGui.QMainWindow, QObject):
         self.enableNone = QtGui.QRadioButton('Off')
         self.enableFFT  = QtGui.QRadioButton('FFT')
         self.enableHist = QtGui.QRadioButton('Histogram')
+        self.enablePersist = QtGui.QRadioButton('Persistence')
+        self.persistReset  = QtGui.QPushButton('Reset persistence')
         self.enableNone.setChecked(1);
+        self.enablePersist.toggled.connect(self.persistenceToggled)
+        self.persistReset.clicked.connect(self.persistenceReset)
+        
+        # the channel enable state is cached as a bitmask on the GUI thread
+        # so the stream thread never has to query the Qt widgets
+        self.channelBoxes = [self.SadcCh0, self.SadcCh1, self.SadcCh2, self.SadcCh3,
+                             self.SadcCh4, self.SadcCh5, self.SadcCh6, self.SadcCh7,
+                             self.FadcCh0, self.FadcCh1, self.FadcCh2, self.FadcCh3,
+                             self.FadcCh4, self.FadcCh5, self.FadcCh6, self.FadcCh7]
+        self.enabledMask = 0
+        for box in self.channelBoxes:
+            box.toggled.connect(self.updateEnabledMask)
         
         controlFrame = QtGui.QFrame()
         controlFrame.setFrameStyle(QtGui.QFrame.Panel);
@@ -166,6 +220,8 @@ class Window(QtGui.QMainWindow, QObject):
         grid.addWidget(self.enableNone, 3, 1)
         grid.addWidget(self.enableFFT,  3, 2)
         grid.addWidget(self.enableHist, 3, 3)
+        grid.addWidget(self.enablePersist, 3, 4)
+        grid.addWidget(self.persistReset, 3, 5)
 
         # line plot 1
         self.lineDisplay1 = MplCanvas(MyTitle = "ADC Samples Display")
@@ -177,6 +233,7 @@ class Window(QtGui.QMainWindow, QObject):
         hSubbox3 = QHBoxLayout()
         hSubbox3.addWidget(self.lineDisplay2)
         
+        self.mainLayout = vbox
         vbox.addLayout(grid)
         vbox.addLayout(hSubbox2)
         vbox.addLayout(hSubbox3)
@@ -197,11 +254,69 @@ class Window(QtGui.QMainWindow, QObject):
             pass
 
 
+    def openRun(self, path=None, fileType='rogue'):
+        """Opens a recorded run in the offline browser panel"""
+        if path is None:
+            path = QtGui.QFileDialog.getOpenFileName(self, 'Open run', '', 'Data files (*.dat);;All files (*)')
+            if not path:
+                return
+            path = str(path)
+        self.statusBar().showMessage('Indexing %s ...' %(path))
+        QtGui.QApplication.processEvents()
+        browser = RunBrowser(RunFile(path, fileType=fileType))
+        if self.fileBrowser is None:
+            self.fileBrowser = FileBrowserPanel(self)
+            self.mainLayout.insertWidget(1, self.fileBrowser)
+        self.fileBrowser.setBrowser(browser)
+        self.statusBar().showMessage('%s: %d PODs, %d events' %(path, len(browser.runFile), len(browser)))
+
+    def showRates(self):
+        self.ratesDock.show()
+        self.ratesDock.raise_()
+
+    def persistenceToggled(self, checked):
+        self.persistence.active = checked
+        if checked:
+            self.persistence.autoRange()
+            self.persistenceTimer.start(200)
+        else:
+            self.persistenceTimer.stop()
+
+    def persistenceReset(self):
+        self.persistence.autoRange()
+
+    def displayPersistence(self):
+        self.lineDisplay2.update_persistence(self.enabled, self.persistence, ld.CHANNEL_LABELS)
+
+    def setDisplayFilter(self, adcType, bank):
+        """
+        Filters the displayed waveforms of the 'slow' or 'fast' ADCs with a
+        lztsData.FilterBank (None removes the filter)
+        """
+        if adcType not in ('slow', 'fast'):
+            raise ValueError('Invalid ADC type %s' %(adcType))
+        if bank is None:
+            self.displayFilters.pop(adcType, None)
+        else:
+            self.displayFilters[adcType] = bank
+
+    def updateEnabledMask(self, checked=None):
+        mask = 0
+        for i, box in enumerate(self.channelBoxes):
+            if box.isChecked():
+                mask |= 1 << i
+        self.enabled = [bool(mask & (1 << i)) for i in range(16)]
+        self.enabledMask = mask
+
     def displayDataFromReader(self):
+        # keep the FadcDebug capture on screen
+        if time.time() < self.captureHoldUntil:
+            self.eventReaderData.busy = False
+            return
         # converts bytes to array of dwords
-        chData = [bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray()]
+        chData = [None]*16
         for i in range(0, 16):
-            chData[i] = np.frombuffer(self.eventReaderData.channelDataArray[i], dtype='uint16')
+            chData[i] = self.eventReaderData.channelData(i)
             # currently header is 12 x 16 bit words (will be more)
             # read header information
             trigSamples = 0
@@ -219,16 +334,28 @@ class Window(QtGui.QMainWindow, QObject):
             
             
             
-            #if (PRINT_VERBOSE): 
-            
-            if (len(chData[i]) > 0):
-                print('Channel %d, min ADU %d, max ADU %d, Vpp %f' %(i, min(chData[i]), max(chData[i]), (max(chData[i])-min(chData[i]))/2**16*2.0 ))
+            if (PRINT_VERBOSE and len(chData[i]) > 0):
+                self.eventReaderData.log('Channel %d, min ADU %d, max ADU %d, Vpp %f', i, min(chData[i]), max(chData[i]), (max(chData[i])-min(chData[i]))/2**16*2.0)
         
+        self.displayChannels(chData)
+        self.eventReaderData.busy = False
         
-        self.enabled = [self.SadcCh0.isChecked(), self.SadcCh1.isChecked(), self.SadcCh2.isChecked(), self.SadcCh3.isChecked(), 
-                        self.SadcCh4.isChecked(), self.SadcCh5.isChecked(), self.SadcCh6.isChecked(), self.SadcCh7.isChecked(),
-                        self.FadcCh0.isChecked(), self.FadcCh1.isChecked(), self.FadcCh2.isChecked(), self.FadcCh3.isChecked(), 
-                        self.FadcCh4.isChecked(), self.FadcCh5.isChecked(), self.FadcCh6.isChecked(), self.FadcCh7.isChecked()]
+        if (PRINT_VERBOSE): self.eventReaderData.log('Display done')
+
+    def displayFadcCapture(self, data):
+        """Plots a FadcDebug capture, one BRAM per trace, held on screen for FADC_CAPTURE_HOLD seconds"""
+        self.statusBar().showMessage('FadcDebug capture: %d BRAMs x %d samples' %(data.shape[0], data.shape[1]),
+                                     int(FADC_CAPTURE_HOLD * 1000))
+        chData = [data[i] if i < len(data) else np.array([]) for i in range(16)]
+        labels = ['BRAM %d' %(i) for i in range(16)]
+        # BRAM samples are at the fast ADC rate, unfiltered
+        periods = [ld.FADC_PERIOD_NS * 1e-9] * 16
+        self.displayChannels(chData, labels, periods, filtered=False)
+        self.captureHoldUntil = time.time() + FADC_CAPTURE_HOLD
+
+    # plots one waveform (or an empty array) per channel, periods are the
+    # sample spacings in seconds (default by ADC type)
+    def displayChannels(self, chData, labels=None, periods=None, filtered=True):
         colors = ['xkcd:blue',    
                   'xkcd:brown',   
                   'xkcd:black',   
@@ -246,34 +373,59 @@ class Window(QtGui.QMainWindow, QObject):
                   'xkcd:red',     
                   'xkcd:plum']
         
-        labels = ["SADC Channel 0",
-                  "SADC Channel 1",
-                  "SADC Channel 2",
-                  "SADC Channel 3",
-                  "SADC Channel 4",
-                  "SADC Channel 5",
-                  "SADC Channel 6",
-                  "SADC Channel 7",
-                  "FADC Channel 0",
-                  "FADC Channel 1",
-                  "FADC Channel 2",
-                  "FADC Channel 3",
-                  "FADC Channel 4",
-                  "FADC Channel 5",
-                  "FADC Channel 6",
-                  "FADC Channel 7"]
+        if labels is None:
+            labels = ld.CHANNEL_LABELS
         
+        # the filters apply to the waveform and FFT plots, the ADU histogram
+        # stays on the raw samples
+        rawData = chData
+        if filtered and self.displayFilters:
+            chData = list(chData)
+            for i in range(0, 16):
+                bank = self.displayFilters.get('slow' if i < 8 else 'fast')
+                if bank is not None and len(chData[i]) > 0:
+                    chData[i] = bank.apply(chData[i])[0]
         
         self.lineDisplay1.update_plot( self.enabled, chData, colors, labels)
-        if self.enableHist.isChecked():
-            self.lineDisplay2.update_fft( self.enabled, chData, colors, labels, 1)
+        if self.enablePersist.isChecked():
+            # the persistence image is refreshed by its own timer
+            pass
+        elif self.enableHist.isChecked():
+            self.lineDisplay2.update_fft( self.enabled, rawData, colors, labels, 1, periods)
         elif self.enableFFT.isChecked():
-            self.lineDisplay2.update_fft( self.enabled, chData, colors, labels, 2)
+            self.lineDisplay2.update_fft( self.enabled, chData, colors, labels, 2, periods)
         else:
-            self.lineDisplay2.update_fft( self.enabled, chData, colors, labels, 0)
-        self.eventReaderData.busy = False
-        
-        if (PRINT_VERBOSE): print('Display done')
+            self.lineDisplay2.update_fft( self.enabled, chData, colors, labels, 0, periods)
+
+################################################################################
+################################################################################
+#   Rate limited log sink
+#   
+################################################################################
+class RateLimitedLog(object):
+    """Prints at most maxLines messages per period, counts the suppressed ones"""
+
+    def __init__(self, maxLines=10, period=1.0):
+        self.maxLines   = maxLines
+        self.period     = period
+        self.windowStart = 0.0
+        self.lines      = 0
+        self.suppressed = 0
+
+    def __call__(self, fmt, *args):
+        now = time.monotonic()
+        if now - self.windowStart >= self.period:
+            if self.suppressed > 0:
+                print('(%d log messages suppressed)' %(self.suppressed))
+            self.windowStart = now
+            self.lines       = 0
+            self.suppressed  = 0
+        if self.lines < self.maxLines:
+            self.lines += 1
+            # format only the messages that are printed
+            print(fmt %args if args else fmt)
+        else:
+            self.suppressed += 1
 
 ################################################################################
 ################################################################################
@@ -283,14 +435,31 @@ class Window(QtGui.QMainWindow, QObject):
 class EventReader(rogue.interfaces.stream.Slave):
     """retrieves data from a file using rogue utilities services"""
 
+    # initial size of the per channel buffers (grown when a larger frame arrives)
+    CHANNEL_BUFFER_BYTES = 0x10000
+
     def __init__(self, parent) :
         rogue.interfaces.stream.Slave.__init__(self)
         super(EventReader, self).__init__()
         self.enable = True
-        self.chReceived = [False]*16
-        self.enabledCh = [False]*16
+        self.receivedMask = 0
         self.lastFrame = rogue.interfaces.stream.Frame
-        self.channelDataArray = [bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray(),bytearray()]
+        # reusable per channel frame buffers and the number of valid bytes in each
+        self.channelDataArray = [bytearray(self.CHANNEL_BUFFER_BYTES) for i in range(16)]
+        self.channelDataSize  = [0]*16
+        # the POD header is read into a fixed buffer decoded through a structured dtype view
+        self.headerBuf = bytearray(ld.HEADER_BYTES)
+        self.header    = np.frombuffer(self.headerBuf, dtype=ld.HEADER_DTYPE, count=1)
+        self.footerBuf = bytearray(ld.FOOTER_BYTES)
+        self.footer    = np.frombuffer(self.footerBuf, dtype=ld.FOOTER_DTYPE, count=1)
+        # header buffer used to walk the PODs for the rate meter
+        self.rateHeaderBuf = bytearray(ld.HEADER_BYTES)
+        self.rateHeader    = np.frombuffer(self.rateHeaderBuf, dtype=ld.HEADER_DTYPE, count=1)
+        self.log = RateLimitedLog()
+        # optional persistence accumulator fed with every enabled waveform
+        self.persistence = None
+        # optional RateMeter counting every data frame
+        self.rates = None
         self.parent = parent
         self.lastTime = 0
         #############################
@@ -299,8 +468,38 @@ class EventReader(rogue.interfaces.stream.Slave):
         self.VIEW_DATA_CHANNEL_ID    = 0x1
         self.busy = False
         self.busyTimeout = 0
-        
-
+        # display at most every 0.5s, release busy after 5s (in 4ns ticks)
+        self.displayTicks = int(math.ceil(0.5/0.000000004))
+        self.busyTicks    = int(math.ceil(5/0.000000004))
+
+    def setPersistence(self, accumulator):
+        """Attaches a PersistenceAccumulator to the reader"""
+        self.persistenceBuf   = bytearray(accumulator.numSamples*2)
+        self.persistenceWords = np.frombuffer(self.persistenceBuf, dtype='uint16')
+        self.persistence      = accumulator
+
+    def channelData(self, chIndex):
+        """Returns the last frame of the channel as 16 bit words (no copy)"""
+        return np.frombuffer(self.channelDataArray[chIndex], dtype='uint16', count=self.channelDataSize[chIndex]//2)
+
+    def countPods(self, frame, size):
+        """Feeds every POD of a frame (superpacket) to the rate meter, reading only the headers"""
+        end = size
+        if (int(self.header[0]['typeFooter']) & 0x1) and size >= ld.HEADER_BYTES + ld.FOOTER_BYTES:
+            end = size - ld.FOOTER_BYTES
+        header = self.rateHeader[0]
+        off = 0
+        while off + ld.HEADER_BYTES <= end:
+            frame.read(self.rateHeaderBuf, off)
+            sizeFlags = int(header['sizeFlags'])
+            podSize = int(ld.podBytes(header))
+            if off + podSize > end:
+                # truncated POD
+                break
+            # the footer bytes are counted with the first POD
+            self.rates.update(int(ld.channelIndex(header)), int(ld.headerLane(header)),
+                              podSize + (size - end if off == 0 else 0), sizeFlags)
+            off += podSize
 
     # Checks all frames in the file to look for the one that needs to be displayed
     # self.frameIndex defines which frame should be returned.
@@ -309,77 +508,83 @@ class EventReader(rogue.interfaces.stream.Slave):
     # access the screen.
     def _acceptFrame(self,frame):
         
+        size = frame.getPayload()
+        if size < ld.HEADER_BYTES:
+            return
         
-        self.enabledCh = [self.parent.SadcCh0.isChecked(), self.parent.SadcCh1.isChecked(), self.parent.SadcCh2.isChecked(), self.parent.SadcCh3.isChecked(), 
-                          self.parent.SadcCh4.isChecked(), self.parent.SadcCh5.isChecked(), self.parent.SadcCh6.isChecked(), self.parent.SadcCh7.isChecked(),
-                          self.parent.FadcCh0.isChecked(), self.parent.FadcCh1.isChecked(), self.parent.FadcCh2.isChecked(), self.parent.FadcCh3.isChecked(), 
-                          self.parent.FadcCh4.isChecked(), self.parent.FadcCh5.isChecked(), self.parent.FadcCh6.isChecked(), self.parent.FadcCh7.isChecked()]
+        self.lastFrame = frame
+        # read only the header, the samples are read when the frame is kept
+        frame.read(self.headerBuf,0)
+        header = self.header[0]
+        if (header['laneVc'] & 0xF) != self.VIEW_DATA_CHANNEL_ID:
+            return
         
+        sizeFlags = int(header['sizeFlags'])
+        trigTime  = int(header['trigTime'])
         
-        self.lastFrame = frame
-        # reads entire frame
-        p = bytearray(self.lastFrame.getPayload())
-        self.lastFrame.read(p,0)
-        VcNum =  p[0] & 0xF
-        if (VcNum == self.VIEW_DATA_CHANNEL_ID):
-            
-            # print basic info
-            debugInfo = 0
-            trigSamples = 0
-            trigOffset = 0
-            trigTime = 0
-            if (PRINT_VERBOSE): print('Received packet size is %d' %(len(p)))
-            if len(p) >= 24:
-                header = np.frombuffer(p, dtype='uint16', count=12)
-                debugInfo = header[1]
-                trigSamples = ((header[5] << 16) | header[4])&0x3fffff
-                trigOffset = (header[7] << 16) | header[6]
-                trigTime = (header[11] << 48) | (header[10] << 32) | (header[9] << 16) | header[8]
-                if (PRINT_VERBOSE): print('Trigger size is %d samples' %(trigSamples))
-                if (PRINT_VERBOSE): print('Trigger offset is %d samples' %(trigOffset))
-                if (PRINT_VERBOSE): print('Trigger time is %f' %(trigTime/250000000.0))
-                if (PRINT_VERBOSE): print('Trigger debug info %x' %(debugInfo))
-                # check if footer exists and print its content
-                if (header[3] & 0x1) == 1:
-                    footer = np.frombuffer(p, dtype='uint16', count=24, offset=len(p)-24*2)
-                    if (PRINT_VERBOSE): print('Footer time max %f' %(( ((footer[3] << 48) | (footer[2] << 32) | (footer[1] << 16) | footer[0])/250000000.0  )))
-                    if (PRINT_VERBOSE): print('Footer time min %f' %(( ((footer[7] << 48) | (footer[6] << 32) | (footer[5] << 16) | footer[4])/250000000.0  )))
-                    if (PRINT_VERBOSE): print('Footer DNA_L 0x%X' %(( (footer[11] << 48) | (footer[10] << 32) | (footer[9] << 16) | footer[8] )))
-                    if (PRINT_VERBOSE): print('Footer DNA_H 0x%X' %(( (footer[15] << 48) | (footer[14] << 32) | (footer[13] << 16) | footer[12] )))
-                    if (PRINT_VERBOSE): print('Footer lost flag %d' %(footer[16] & 0x1))
-                    if (PRINT_VERBOSE): print('Footer ext flag %d' %((footer[16]>>1) & 0x1))
-                    if (PRINT_VERBOSE): print('Footer int flag %d' %((footer[16]>>2) & 0x1))
-                    if (PRINT_VERBOSE): print('Footer empty flag %d' %((footer[16]>>3) & 0x1))
-                    if (PRINT_VERBOSE): print('Footer veto flag %d' %((footer[16]>>4) & 0x1))
-                    if (PRINT_VERBOSE): print('Footer bad ADC flag %d' %((footer[16]>>5) & 0x1))
+        if (PRINT_VERBOSE):
+            log = self.log
+            log('Received packet size is %d', size)
+            log('Trigger size is %d samples', sizeFlags & ld.SIZE_MASK)
+            log('Trigger offset is %d samples', header['trigOffset'])
+            log('Trigger time is %f', trigTime/ld.TIME_CLK_HZ)
+            log('Trigger debug info %x', header['debugInfo'])
+            # check if footer exists and print its content
+            if (header['typeFooter'] & 0x1) == 1 and size >= ld.HEADER_BYTES + ld.FOOTER_BYTES:
+                frame.read(self.footerBuf, size-ld.FOOTER_BYTES)
+                footer = self.footer[0]
+                flags  = int(footer['flags'])
+                log('Footer time max %f', footer['timeMax']/ld.TIME_CLK_HZ)
+                log('Footer time min %f', footer['timeMin']/ld.TIME_CLK_HZ)
+                log('Footer DNA_L 0x%X', footer['dnaL'])
+                log('Footer DNA_H 0x%X', footer['dnaH'])
+                log('Footer lost flag %d', flags & 0x1)
+                log('Footer ext flag %d', (flags>>1) & 0x1)
+                log('Footer int flag %d', (flags>>2) & 0x1)
+                log('Footer empty flag %d', (flags>>3) & 0x1)
+                log('Footer veto flag %d', (flags>>4) & 0x1)
+                log('Footer bad ADC flag %d', (flags>>5) & 0x1)
+        
+        # sort ADC channels
+        chIndex = int(header['channel']) & 0xFF
+        if (int(header['typeFooter']) & 0x1000) == 0:
+            chIndex += 8
+        chBit = 1 << chIndex
+        enabledMask = self.parent.enabledMask
+        
+        if self.rates is not None:
+            self.countPods(frame, size)
+        
+        # every waveform of an enabled channel feeds the persistence display
+        persistence = self.persistence
+        if persistence is not None and persistence.active and (enabledMask & chBit):
+            samples = min(sizeFlags & ld.SIZE_MASK, (size-ld.HEADER_BYTES)//2, persistence.numSamples)
+            frame.read(memoryview(self.persistenceBuf)[:samples*2], ld.HEADER_BYTES)
+            persistence.push(chIndex, self.persistenceWords[:samples])
+        
+        # copy data only when display is not busy
+        if self.busy == False:
+            if (PRINT_VERBOSE): self.log('%s ADC channnel: %d', 'Slow' if chIndex < 8 else 'Fast', chIndex & 0x7)
             
+            if enabledMask & chBit:
+                buf = self.channelDataArray[chIndex]
+                if len(buf) < size:
+                    buf = bytearray(size)
+                    self.channelDataArray[chIndex] = buf
+                frame.read(memoryview(buf)[:size],0)
+                self.channelDataSize[chIndex] = size
+                self.receivedMask |= chBit
             
-            # sort ADC channels
-            # copy data only when display is not busy
-            if self.busy == False:
-                chIndex = 0
-                if ((p[7] & 0x10)>>4 == 1):
-                    if (PRINT_VERBOSE): print('Slow ADC channnel: ', (p[4] & 0xFF))
-                    chIndex = (p[4] & 0xFF)
-                    self.channelDataArray[chIndex][:] = p
-                # sort fast ADC channels
-                elif ((p[7] & 0x10)>>4 == 0):
-                    if (PRINT_VERBOSE): print('Fast ADC channnel: ', (p[4] & 0xFF))
-                    chIndex = 8+(p[4] & 0xFF)
-                    self.channelDataArray[chIndex][:] = p
-                    
-                self.chReceived[chIndex] = True
-                testAllData = np.array_equal(np.logical_or(np.logical_not(self.enabledCh), np.logical_and(self.chReceived, self.enabledCh)), [True]*16)
-                # Emit the signal but no more often than every 0.5s
-                # do not emit unless data for all enabled channels arrived
-                if (self.lastTime == 0 or (trigTime-self.lastTime>int(math.ceil(0.5/0.000000004)))) and testAllData == True:
-                    self.parent.dataTrigger.emit()
-                    self.chReceived = [False,False,False,False,False,False,False,False,False,False,False,False,False,False,False,False]
-                    self.busy = True
-                    self.lastTime = trigTime
-            #busy timeout (5 seconds)
-            elif (trigTime-self.lastTime) > int(math.ceil(5/0.000000004)):
-                self.busy = False
+            # Emit the signal but no more often than every 0.5s
+            # do not emit unless data for all enabled channels arrived
+            if (self.lastTime == 0 or (trigTime-self.lastTime>self.displayTicks)) and (self.receivedMask & enabledMask) == enabledMask:
+                self.parent.dataTrigger.emit()
+                self.receivedMask = 0
+                self.busy = True
+                self.lastTime = trigTime
+        #busy timeout (5 seconds)
+        elif (trigTime-self.lastTime) > self.busyTicks:
+            self.busy = False
 
 ################################################################################
 ################################################################################
@@ -404,6 +609,7 @@ class MplCanvas(FigureCanvas):
         self.MyTitle = MyTitle
         self.axes.set_title(self.MyTitle)
         self.fig.cbar = None
+        self.persistenceShown = False
 
         
 
@@ -412,8 +618,16 @@ class MplCanvas(FigureCanvas):
         #self.axes.plot([0, 1, 2, 3], [1, 2, 0, 4], 'b')
         self.axes.plot([], [], 'b')
     
+    def single_axes(self):
+        # the persistence display replaces the axes by a grid of images
+        if self.persistenceShown:
+            self.fig.clf()
+            self.axes = self.fig.add_subplot(111)
+            self.persistenceShown = False
+
     def update_plot(self, enabled, chData, colors, labels):
 
+        self.single_axes()
         self.axes.cla()
         for i in range(0, 16):
             N = len(chData[i])
@@ -423,7 +637,8 @@ class MplCanvas(FigureCanvas):
         self.axes.set_title(self.MyTitle)
         self.draw()
 
-    def update_fft(self, enabled, chData, colors, labels, plotSel):
+    def update_fft(self, enabled, chData, colors, labels, plotSel, periods=None):
+        self.single_axes()
         self.axes.cla()
         for i in range(0, 16):
             # Number of samplepoints
@@ -434,12 +649,16 @@ class MplCanvas(FigureCanvas):
                     rms = np.sqrt(np.mean((chData[i]-np.mean(chData[i]))**2))
                     #label = labels[i] + ' (RMS ' + str(rms) + ')' 
                     label = "%s (RMS %.2f)" %(labels[i] ,rms) 
-                    self.axes.hist(chData[i], bins=range(min(chData[i]), max(chData[i]) + binwidth, binwidth), normed=1, facecolor=colors[i], label=label, histtype='bar')
+                    # integer ADU bins, also for float (filtered) data
+                    bins = np.arange(np.floor(np.min(chData[i])), np.floor(np.max(chData[i])) + 2*binwidth, binwidth)
+                    self.axes.hist(chData[i], bins=bins, normed=1, facecolor=colors[i], label=label, histtype='bar')
                     #self.axes.hist(chData[i], bins=list(self.my_frange(start=min(chData[i]), stop=max(chData[i]), step=0.5)), normed=1, facecolor=colors[i], label=labels[i], histtype='stepfilled')
                     self.axes.legend() 
                 elif plotSel == 2:
                     # sample spacing
-                    if (i<8):
+                    if periods is not None:
+                        T = periods[i]
+                    elif (i<8):
                         T = 1.0 / 250000000.0
                     else:
                         T = 1.0 / 1000000000.0
@@ -456,6 +675,10 @@ class MplCanvas(FigureCanvas):
         self.axes.set_title(self.MyTitle)
         self.draw()
        
+    def update_persistence(self, enabled, accumulator, labels):
+        drawPersistence(self, enabled, accumulator, labels, self.MyTitle)
+        self.persistenceShown = True
+
     def my_frange(self, start, stop, step):
         return takewhile(lambda x: x< stop, count(start, step))        
     
\ No newline at end of file
@@ -1,11 +1,10 @@
 
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from lztsData import RunFile, exportPods
 
-#f=open('lane1_glitches.dat', mode='rb')  
-f=open('fastGlitches1.dat', mode='rb')  
+#dataFile = 'lane1_glitches.dat'
+dataFile = 'fastGlitches1.dat'
+f=open(dataFile, mode='rb')  
 
 data = f.read()
 f.close()
@@ -23,6 +22,7 @@ len(data)
 
 dataOffset = 8
 podNo = 0
+exportList = []
 
 while 1:
    header = np.frombuffer(data, dtype='uint16', count=12, offset=dataOffset)
@@ -69,20 +69,8 @@ while 1:
          print('Debug info %s' %(format(debugInfo, 'b')))
       print('ADC max %d' %(max(adcData)))
       print('ADC min %d' %(min(adcData)))
-      #save data in csv file
-      fileName = 'POD' + str(podNo) +'_ch' + str(adcCh) + adcType + '_T' + str(trigTime)
-      
-      
-      plt.plot(adcData, '.')
-      plt.savefig(fileName + '.png')
-      plt.clf()
-      plt.close()
-      
-      f = open(fileName + '.csv', 'w')
-      for i in range(len(adcData)):
-         f.write('%d\n' %(adcData[i]))
-      f.write('\n')
-      f.close()
+      # plots and waveforms are exported in one batch below
+      exportList.append(podNo)
       
    
    #check for bad ADC flag
@@ -101,4 +89,7 @@ while 1:
    if dataOffset > len(data):
       print("No more data for POD number %d" %(podNo+1))
       break
-   
+
+# save png plots and one npz bundle with the glitch waveforms
+# (one POD per StreamWriter record, index all record channels)
+exportPods(RunFile(dataFile, fileType='rogue', dataChannel=None), exportList, bundle='glitches.npz')
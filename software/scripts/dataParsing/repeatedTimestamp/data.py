@@ -1,10 +1,9 @@
 
 import numpy as np
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from lztsData import RunFile, exportPods
 
-f=open('Lane0_sigleFrameDataBinary5.dat', mode='rb')  
+dataFile = 'Lane0_sigleFrameDataBinary5.dat'
+f=open(dataFile, mode='rb')  
 
 
 data = f.read()
@@ -37,6 +36,7 @@ for i in range(0, 12):
 verifyPods = [703, 707] 
 
 dataOffset = 0
+exportList = []
 
 for podNo in range(0, max(verifyPods)+1):
    header = np.frombuffer(data, dtype='uint16', count=12, offset=dataOffset)
@@ -77,21 +77,8 @@ for podNo in range(0, max(verifyPods)+1):
       print('Header time %d' %(trigTime))
       if adcType == 'fast':
          print('Debug info %s' %(format(debugInfo, 'b')))
-      #save data in csv file
-      fileName = 'POD' + str(podNo) +'_ch' + str(adcCh) + adcType + '_T' + str(trigTime)
-      #f = open(fileName, 'w')
-      adcData = np.frombuffer(data, dtype='uint16', count=trigSize, offset=dataOffset+24)
-      
-      plt.plot(adcData, '.')
-      plt.savefig(fileName + '.png')
-      plt.clf()
-      plt.close()
-      
-      f = open(fileName + '.csv', 'w')
-      for i in range(len(adcData)):
-         f.write('%d,' %(adcData[i]))
-      f.write('\n')
-      f.close()
+      # plots and waveforms are exported in one batch below
+      exportList.append(podNo)
       
    
    #check for bad ADC flag
@@ -108,6 +95,9 @@ for podNo in range(0, max(verifyPods)+1):
    if dataOffset > len(data):
       print("No more data for POD number %d" %(podNo+1))
       break
+
+# save png plots and one npz bundle with the selected waveforms
+exportPods(RunFile(dataFile, fileType='pods'), exportList, bundle='verifyPods.npz')
    
 ################################################################
 # Find repeated timestamps in all channels
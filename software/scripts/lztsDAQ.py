@@ -73,6 +73,14 @@ parser.add_argument(
     help     = "define the PCIe card type (either pgp-gen3 or datadev-pgp2b)",
 )  
 
+parser.add_argument(
+    "--coalesce_polling", 
+    type     = bool,
+    required = False,
+    default  = False,
+    help     = "true to poll adjacent registers with one read (PollScheduler)",
+)  
+
 # Get the arguments
 args = parser.parse_args()
 
@@ -215,6 +223,11 @@ class LztsBoard(pyrogue.Root):
 # Create board
 LztsBoard = LztsBoard(cmd, dataWriter, srp, pgpVc2, args)
 
+# Polled registers grouped into block reads, slowed down while nobody listens
+if (args.coalesce_polling):
+    pollScheduler = fpga.PollScheduler(LztsBoard.Lzts, shadow=LztsBoard.Lzts.shadow)
+    pollScheduler.start()
+
 # Create GUI
 if (args.start_gui):
     appTop = PyQt4.QtGui.QApplication(sys.argv)
@@ -226,6 +239,8 @@ if (args.start_gui):
 if (args.start_viewer):
     gui = vi.Window()
     pyrogue.streamTap(pgpVc1, gui.eventReaderData)
+    # FadcDebug.Capture results go to the viewer plots
+    LztsBoard.Lzts.FadcDebug.captureListeners.append(gui.fadcCapture.emit)
     
 ## Create mesh node (this is for remote control only, no data is shared with this)
 #mNode = pyrogue.mesh.MeshNode('rogueEpix100a',iface='eth0',root=None)
@@ -236,6 +251,10 @@ if (args.start_viewer):
 if (args.start_gui):
     appTop.exec_()
 
+if (args.coalesce_polling):
+    pollScheduler.stop()
+    print(pollScheduler.report())
+
 # Close window and stop polling
 def stop():
     mNode.stop()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+#-----------------------------------------------------------------------------
+# Title      : LZTS offline pulse finder
+#-----------------------------------------------------------------------------
+# File       : lztsFindPulses.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Writes the hit table (lztsData.HIT_DTYPE) of a recorded run to a .npy file.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to 
+# the license terms in the LICENSE.txt file found in the top-level directory 
+# of this distribution and at: 
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html. 
+# No part of the LZTS rogue, including this file, may be 
+# copied, modified, propagated, or distributed except according to the terms 
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import time
+import argparse
+import numpy as np
+import lztsData as ld
+
+# Set the argument parser
+parser = argparse.ArgumentParser()
+
+parser.add_argument(
+    "file", 
+    type     = str,
+    help     = "run file",
+)
+
+parser.add_argument(
+    "--type", 
+    type     = str,
+    required = False,
+    default  = 'rogue',
+    help     = "file type (rogue, lzrd or pods)",
+)  
+
+parser.add_argument(
+    "--threshold", 
+    type     = float,
+    required = False,
+    default  = 20.0,
+    help     = "pulse threshold in ADU below the baseline",
+)  
+
+parser.add_argument(
+    "--baseline", 
+    type     = int,
+    required = False,
+    default  = 32,
+    help     = "maximum number of pre trigger samples used for the baseline",
+)  
+
+parser.add_argument(
+    "--min_width", 
+    type     = int,
+    required = False,
+    default  = 1,
+    help     = "minimum number of samples below threshold",
+)  
+
+parser.add_argument(
+    "--out", 
+    type     = str,
+    required = False,
+    default  = None,
+    help     = "output file (default <file>.hits.npy)",
+)  
+
+# Get the arguments
+args = parser.parse_args()
+
+runFile = ld.RunFile(args.file, fileType=args.type)
+start = time.time()
+hits = ld.findPulsesRun(runFile, threshold=args.threshold, baselineSamples=args.baseline, minWidth=args.min_width)
+elapsed = time.time() - start
+np.save(args.out or args.file + '.hits.npy', hits)
+print('%d PODs, %d hits in %.2f s (%.0f PODs/s)' %(len(runFile), len(hits), elapsed, len(runFile)/max(elapsed, 1e-9)))
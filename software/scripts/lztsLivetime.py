@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+#-----------------------------------------------------------------------------
+# Title      : LZTS run livetime
+#-----------------------------------------------------------------------------
+# File       : lztsLivetime.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Prints the livetime summary of a recorded run per board and channel and
+# writes the time binned series (lztsData.timeSeries) to a .npz file.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to 
+# the license terms in the LICENSE.txt file found in the top-level directory 
+# of this distribution and at: 
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html. 
+# No part of the LZTS rogue, including this file, may be 
+# copied, modified, propagated, or distributed except according to the terms 
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import argparse
+import numpy as np
+import lztsData as ld
+
+# Set the argument parser
+parser = argparse.ArgumentParser()
+
+parser.add_argument(
+    "file", 
+    type     = str,
+    help     = "run file",
+)
+
+parser.add_argument(
+    "--type", 
+    type     = str,
+    required = False,
+    default  = 'rogue',
+    help     = "file type (rogue, lzrd or pods)",
+)  
+
+parser.add_argument(
+    "--bin", 
+    type     = float,
+    required = False,
+    default  = 1.0,
+    help     = "time bin of the series in seconds",
+)  
+
+parser.add_argument(
+    "--out", 
+    type     = str,
+    required = False,
+    default  = None,
+    help     = "output file (default <file>.live.npz)",
+)  
+
+parser.add_argument(
+    "--plot", 
+    type     = bool,
+    required = False,
+    default  = False,
+    help     = "true to plot the series",
+)  
+
+# Get the arguments
+args = parser.parse_args()
+
+runFile = ld.RunFile(args.file, fileType=args.type)
+boards, channels = ld.livetime(runFile)
+series = ld.timeSeries(runFile, args.bin)
+names, gaps, lostGaps, gapBins = ld.gapHistogram(runFile)
+np.savez(args.out or args.file + '.live.npz', boards=boards, channels=channels,
+         gaps=gaps, lostGaps=lostGaps, gapBins=gapBins, **series)
+
+print('%-32s %8s %10s %10s %8s %8s' %('Board', 'Frames', 'Span (s)', 'Dead (s)', 'Live', 'Lost'))
+for b in boards:
+    print('%-32s %8d %10.3f %10.6f %8.4f %8d' %(b['dna'], b['frames'], b['span'], b['dead'], b['liveFraction'], b['lostFrames']))
+print('')
+print('%5s %-16s %10s %8s %10s %10s %10s' %('Board', 'Channel', 'PODs', 'Live', 'Rate (Hz)', 'Lost (Hz)', 'Veto (Hz)'))
+for c in channels:
+    print('%5d %-16s %10d %8.4f %10.1f %10.2f %10.2f' %(c['board'], ld.CHANNEL_LABELS[c['channel']], c['pods'],
+          c['liveFraction'], c['podRate'], c['lostRate'], c['vetoRate']))
+
+if args.plot:
+    import matplotlib.pyplot as plt
+    t = series['edges'][:-1]
+    fig, (ax0, ax1) = plt.subplots(2, 1, sharex=True)
+    for name, live in zip(series['dna'], series['live']):
+        ax0.step(t, live, where='post', label=name)
+    ax0.set_ylabel('live fraction')
+    ax0.legend(fontsize=6)
+    for ch in np.flatnonzero(series['pods'].sum(axis=1)):
+        ax1.step(t, series['lost'][ch], where='post', label=ld.CHANNEL_LABELS[ch])
+    ax1.set_ylabel('lost triggers (Hz)')
+    ax1.set_xlabel('time (s)')
+    ax1.legend(fontsize=6)
+    plt.show()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+#-----------------------------------------------------------------------------
+# Title      : LZTS pedestal run
+#-----------------------------------------------------------------------------
+# File       : lztsPedestals.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Computes the pedestals, noise and noise spectra of an external trigger
+# run and stores them in the pedestal database (lztsData.PedestalDb).
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to 
+# the license terms in the LICENSE.txt file found in the top-level directory 
+# of this distribution and at: 
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html. 
+# No part of the LZTS rogue, including this file, may be 
+# copied, modified, propagated, or distributed except according to the terms 
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import os
+import argparse
+import lztsData as ld
+
+# Set the argument parser
+parser = argparse.ArgumentParser()
+
+parser.add_argument(
+    "file", 
+    type     = str,
+    help     = "external trigger run file",
+)
+
+parser.add_argument(
+    "--type", 
+    type     = str,
+    required = False,
+    default  = 'rogue',
+    help     = "file type (rogue, lzrd or pods)",
+)  
+
+parser.add_argument(
+    "--db", 
+    type     = str,
+    required = False,
+    default  = 'pedestals.db',
+    help     = "pedestal database file",
+)  
+
+parser.add_argument(
+    "--nfft", 
+    type     = int,
+    required = False,
+    default  = 1024,
+    help     = "maximum samples per noise spectrum segment (power of two)",
+)  
+
+parser.add_argument(
+    "--dna", 
+    type     = str,
+    required = False,
+    default  = None,
+    help     = "board DNA (hex) for files without footers",
+)  
+
+# Get the arguments
+args = parser.parse_args()
+
+runFile = ld.RunFile(args.file, fileType=args.type)
+records, psd, freqs = ld.measurePedestals(runFile, nfft=args.nfft)
+
+db = ld.PedestalDb(args.db)
+# the run time is the time the file was last written
+db.store(records, psd, freqs, timestamp=os.path.getmtime(args.file), run=os.path.basename(args.file), dna=args.dna)
+db.close()
+
+print('%-20s %-16s %8s %10s %8s %8s' %('Board', 'Channel', 'PODs', 'Mean', 'RMS', 'Noise'))
+for rec in records:
+    print('%-20s %-16s %8d %10.2f %8.3f %8.3f' %(args.dna or rec['dna'], ld.CHANNEL_LABELS[rec['channel']],
+          rec['pods'], rec['mean'], rec['rms'], rec['noise']))
@@ -19,24 +19,20 @@
 # copied, modified, propagated, or distributed except according to the terms 
 # contained in the LICENSE.txt file.
 #-----------------------------------------------------------------------------
+import time
+startTime = time.time()
 import rogue.hardware.pgp
 import pyrogue.utilities.prbs
 import pyrogue.utilities.fileio
-import pyrogue.gui
-import surf
 import threading
 import signal
 import atexit
 import yaml
-import time
 import sys
 import argparse
-import PyQt4.QtGui
-import PyQt4.QtCore
 import lztsFpga as fpga
-import lztsViewer as vi
-import operator
 #################
+# this script needs no GUI, the viewer and PyQt are not imported
 
 
 # Set the argument parser
@@ -57,6 +53,12 @@ parser.add_argument(
     help     = "define the PCIe card type (either pgp-gen3 or datadev-pgp2b)",
 )  
 
+parser.add_argument(
+    "--profile", 
+    action   = 'store_true',
+    help     = "print the import and device construction times",
+)  
+
 # Get the arguments
 args = parser.parse_args()
 
@@ -156,7 +158,9 @@ class LztsBoard(pyrogue.Root):
         self.add(dataWriter)
 
         # Add Devices
-        self.add(fpga.Lzts(name='Lzts', offset=0, memBase=srp, hidden=False, enabled=True))
+        # Only the power registers and the temperature memories are read
+        self.add(fpga.Lzts(name='Lzts', offset=0, memBase=srp, hidden=False, enabled=True,
+                           devices=['PwrReg', 'TempLocMem', 'TempRemMem']))
 
         @self.command()
         def Trigger():
@@ -175,6 +179,11 @@ class LztsBoard(pyrogue.Root):
 # Create board
 LztsBoard = LztsBoard(cmd, dataWriter, srp)
 
+if args.profile:
+    print(fpga.importReport())
+    print(LztsBoard.Lzts.buildReport())
+    print('Startup: %.3f s' %(time.time() - startTime))
+
 #enable all needed devices
 LztsBoard.Lzts.PwrReg.enable.set(True)
 LztsBoard.Lzts.TempLocMem.enable.set(True)
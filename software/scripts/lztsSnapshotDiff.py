@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+#-----------------------------------------------------------------------------
+# Title      : LZTS register snapshot diff
+#-----------------------------------------------------------------------------
+# File       : lztsSnapshotDiff.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Prints the registers that differ between two snapshots (.npz or .yaml)
+# taken with lztsFpga.takeSnapshot.
+#-----------------------------------------------------------------------------
+# This file is part of the rogue software platform. It is subject to 
+# the license terms in the LICENSE.txt file found in the top-level directory 
+# of this distribution and at: 
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html. 
+# No part of the rogue software platform, including this file, may be 
+# copied, modified, propagated, or distributed except according to the terms 
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import argparse
+import time
+import lztsFpga as fpga
+
+# Set the argument parser
+parser = argparse.ArgumentParser()
+
+parser.add_argument(
+    "first", 
+    type     = str,
+    help     = "first snapshot file",
+)
+
+parser.add_argument(
+    "second", 
+    type     = str,
+    help     = "second snapshot file",
+)
+
+# Get the arguments
+args = parser.parse_args()
+
+snaps = [fpga.RegisterSnapshot.load(f) for f in (args.first, args.second)]
+for name, snap in zip((args.first, args.second), snaps):
+    print('%s: %s, %d registers' %(name, time.ctime(snap.timestamp), len(snap.values)))
+
+def fmt(value):
+    return '-' if value is None else '0x%x' %(value)
+
+diffs = fpga.diffSnapshots(*snaps)
+for path, a, b in diffs:
+    print('%-60s %18s %18s' %(path, fmt(a), fmt(b)))
+print('%d registers differ' %(len(diffs)))
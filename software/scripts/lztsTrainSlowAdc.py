@@ -224,8 +224,10 @@ LztsBoard.Lzts.SadcPatternTester.Mask.set(0xffff)
 
 delays = [0 for x in range(512)]
 
-fileName = 'SADC_Delays_DeviceDna' + hex(LztsBoard.Lzts.AxiVersion.DeviceDna.get()) + '.csv'
-f = open(fileName, 'a')
+# best delay of every ADC lane, written as one line at the end so an
+# interrupted training leaves no partial table
+trained = []
+trainStart = time.time()
 
 #iterate all ADCs
 for adcNo in range(0, 8):
@@ -315,14 +317,14 @@ for adcNo in range(0, 8):
          setDelay = 0
       
       print('Delay %d' %(setDelay))
-      f.write('%d,' %(setDelay))
+      trained.append(setDelay)
       
       # set best delay
       delayRegs[lane+adcNo*8].set(setDelay)
 
-#close the file
-f.write('\n')
-f.close()
+# date of the training first, so SadcInit can pick the newest table
+fileName = fpga.appendSadcDelays(LztsBoard.Lzts.AxiVersion.DeviceDna.get(), trained, timestamp=trainStart)
+print('Delays written to %s' %(fileName))
 
 
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+#-----------------------------------------------------------------------------
+# Title      : LZTS offline run viewer
+#-----------------------------------------------------------------------------
+# File       : lztsViewRun.py
+# Created    : 2026-10-19
+#-----------------------------------------------------------------------------
+# Description:
+# Opens a recorded run in the LZTS data viewer without any hardware.
+# The first open builds the POD index (<file>.lzidx.npz), later opens reuse it.
+#-----------------------------------------------------------------------------
+# This file is part of the LZTS rogue. It is subject to 
+# the license terms in the LICENSE.txt file found in the top-level directory 
+# of this distribution and at: 
+#    https://confluence.slac.stanford.edu/display/ppareg/LICENSE.html. 
+# No part of the LZTS rogue, including this file, may be 
+# copied, modified, propagated, or distributed except according to the terms 
+# contained in the LICENSE.txt file.
+#-----------------------------------------------------------------------------
+import sys
+import argparse
+import PyQt4.QtGui
+import lztsViewer as vi
+
+# Set the argument parser
+parser = argparse.ArgumentParser()
+
+parser.add_argument(
+    "file", 
+    type     = str,
+    nargs    = '?',
+    default  = None,
+    help     = "run file to open",
+)
+
+parser.add_argument(
+    "--type", 
+    type     = str,
+    required = False,
+    default  = 'rogue',
+    help     = "file type (rogue, lzrd or pods)",
+)  
+
+# Get the arguments
+args = parser.parse_args()
+
+appTop = PyQt4.QtGui.QApplication(sys.argv)
+gui = vi.Window()
+if args.file is not None:
+    gui.openRun(args.file, fileType=args.type)
+appTop.exec_()
@@ -25,9 +25,11 @@ UINT64_VERSION_OF_32 = n.uint64(32)
 
 
 class processStream:
-    def __init__(self, digi_time_at_start_ns, outfile_base='data/lzrd_sue_raw', buffer_size_bytes=1048576, buffer_write_timeout_s = 60, max_file_size_bytes = 1073741824, verbose=0):
+    def __init__(self, digi_time_at_start_ns, outfile_base='data/lzrd_sue_raw', buffer_size_bytes=1048576, buffer_write_timeout_s = 60, max_file_size_bytes = 1073741824, frame_filter=None, verbose=0):
         """
         
+        frame_filter, if given, is called with every frame and returns the
+        bytes to write (e.g. a lztsData.ZeroSuppressor)
         """
         # store verbose level. 0 means no output. 1 mean minimum output. And so forth
         self.verbose = verbose
@@ -57,6 +59,9 @@ class processStream:
         self.buffer_size_bytes = buffer_size_bytes
         self.buffer_write_timeout_s = buffer_write_timeout_s
         
+        # optional stage applied to every frame before it is buffered
+        self.frame_filter = frame_filter
+        
         # get the info string for this data set
         self.acq_string = self.construct_acq_string()
         
@@ -178,6 +183,9 @@ class processStream:
         """
         # open file for writing if None open
         if self.outfile_handle is None: self.new_file()
+        # trim the frame (zero suppression) before it is stored
+        if self.frame_filter is not None:
+            frame_bytes = self.frame_filter(frame_bytes)
         # store the dead time along with the size of the current frame
         deadtime = n.uint64(deadtime)
         deadtime_highbits = n.uint32(deadtime >> UINT64_VERSION_OF_32)
@@ -30,10 +30,12 @@ import atexit
 import yaml
 import time
 import sys
+import os
 import argparse
 import PyQt4.QtGui
 import PyQt4.QtCore
 import lztsFpga as fpga
+import lztsData as ld
 #import lztsViewer as vi
 
 import rogueFreeStreamRaw_PyMod as freeStream
@@ -52,6 +54,39 @@ parser.add_argument(
     help     = "true to show gui",
 )  
 
+parser.add_argument(
+    "--zs_threshold", 
+    type     = int,
+    required = False,
+    default  = 0,
+    help     = "software zero suppression threshold in ADU (0 writes every sample)",
+)  
+
+parser.add_argument(
+    "--zs_margins", 
+    type     = int,
+    nargs    = 2,
+    required = False,
+    default  = [16, 32],
+    help     = "samples kept before and after each threshold crossing",
+)  
+
+parser.add_argument(
+    "--snapshot_dir", 
+    type     = str,
+    required = False,
+    default  = None,
+    help     = "directory for the register snapshot taken at every run start",
+)  
+
+parser.add_argument(
+    "--srp_profile", 
+    type     = str,
+    required = False,
+    default  = None,
+    help     = "profile the register transactions, report written to <srp_profile>.txt and .folded",
+)  
+
 
 # Get the arguments
 args = parser.parse_args()
@@ -72,7 +107,11 @@ print("PGP Card Version: %x" % (pgpVc0.getInfo().version))
 
 #***************** Tomasz's code
 # create the file writer object
-sevts = freeStream.processStream(0., verbose=2)
+if args.zs_threshold > 0:
+    zeroSuppress = ld.ZeroSuppressor(args.zs_threshold, args.zs_margins[0], args.zs_margins[1])
+else:
+    zeroSuppress = None
+sevts = freeStream.processStream(0., frame_filter=zeroSuppress, verbose=2)
 # create the processor/data writer
 prc = freeStreamMulti.StreamProc(0., sevts)  # inherits from rogue.interfaces.stream.Slave
 pyrogue.streamConnect(pgpVc1, prc)
@@ -114,6 +153,10 @@ class MyRunControl(pyrogue.RunControl):
     def _setRunState(self,dev,var,value,changed):
         if changed: 
             if self.runState.get(read=False) == 'Running': 
+                if args.snapshot_dir is not None:
+                    snap = fpga.takeSnapshot(self.root.Lzts)
+                    snap.save(os.path.join(args.snapshot_dir, time.strftime('lztsRegs_%Y%m%d_%H%M%S.npz')))
+                    print('Register snapshot: %(reads)d reads, %(variables)d registers in %(seconds).3f s' %(snap.info))
                 self._thread = threading.Thread(target=self._run) 
                 self._thread.start() 
             else: 
@@ -164,6 +207,11 @@ class LztsBoard(pyrogue.Root):
 # Create board
 LztsBoard = LztsBoard(cmd, prc, srp)
 
+# Count and time the register transactions per command, device and variable
+if args.srp_profile is not None:
+    profiler = fpga.SrpProfiler()
+    profiler.attach(LztsBoard.Lzts)
+
 # Create GUI
 if (args.start_gui):
     appTop = PyQt4.QtGui.QApplication(sys.argv)
@@ -176,6 +224,14 @@ if (args.start_gui):
 if (args.start_gui):
     appTop.exec_()
 
+if args.srp_profile is not None:
+    report = profiler.report()
+    print(report)
+    with open(args.srp_profile + '.txt', 'w') as f:
+        f.write(report + '\n')
+    with open(args.srp_profile + '.folded', 'w') as f:
+        f.write('\n'.join(profiler.folded()) + '\n')
+
 # Close window and stop polling
 def stop():
     mNode.stop()